@@ -0,0 +1,79 @@
+"""Measures the bytes each vector layer encoding sends to the browser.
+
+For geogo.Map it reports the size of the widget state of the GeoJSON layer.
+For geogo.foliummap.Map it reports the size of the rendered HTML.
+
+Usage:
+    python benchmarks/bench_encoding.py [n_cells] [segment_length]
+"""
+
+import json
+import sys
+
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import Polygon
+
+
+def make_coverage(n=20, segment_length=0.01):
+    x0, y0 = -100 + np.pi / 10, 30 + np.e / 10
+    size = 10 / n
+    cells = [
+        Polygon(
+            [
+                (x0 + i * size, y0 + j * size),
+                (x0 + (i + 1) * size, y0 + j * size),
+                (x0 + (i + 1) * size, y0 + (j + 1) * size),
+                (x0 + i * size, y0 + (j + 1) * size),
+            ]
+        ).segmentize(segment_length)
+        for i in range(n)
+        for j in range(n)
+    ]
+    return gpd.GeoDataFrame(
+        {
+            "cell": np.arange(len(cells)),
+            "name": [f"cell {i}" for i in range(len(cells))],
+        },
+        geometry=cells,
+        crs="EPSG:4326",
+    )
+
+
+def widget_bytes(**kwargs):
+    from geogo import Map
+
+    layer = Map().add_gdf(gdf, zoom_to_layer=False, **kwargs)
+    return len(json.dumps(layer.get_state()["data"], separators=(",", ":")))
+
+
+def html_bytes(**kwargs):
+    from geogo.foliummap import Map
+
+    m = Map()
+    m.add_gdf(gdf, **kwargs)
+    return len(m.get_root().render())
+
+
+def main(n=20, segment_length=0.01):
+    global gdf
+    gdf = make_coverage(n, segment_length)
+    vertices = int(gdf.count_coordinates().sum())
+    print(f"{len(gdf)} polygons, {vertices} vertices")
+
+    rows = [
+        ("ipyleaflet GeoJSON", widget_bytes()),
+        ("ipyleaflet precision=5", widget_bytes(precision=5)),
+        ("folium GeoJSON", html_bytes()),
+        ("folium precision=5", html_bytes(precision=5)),
+        ("folium TopoJSON", html_bytes(compact=True)),
+    ]
+    base = {"ipyleaflet": rows[0][1], "folium": rows[2][1]}
+    print(f"{'encoding':<26}{'bytes':>12}{'ratio':>8}")
+    for label, size in rows:
+        ratio = base[label.split()[0]] / size
+        print(f"{label:<26}{size:>12}{ratio:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(*[float(arg) if "." in arg else int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,71 @@
+"""Benchmarks vector ingestion into geogo.Map.
+
+Compares the previous add_gdf path (reproject, serialize, rebuild a
+GeoDataFrame for bounds) with the current one. It reports wall time and the
+peak memory traced by tracemalloc.
+
+Usage:
+    python benchmarks/bench_ingestion.py [n_polygons]
+"""
+
+import sys
+import time
+import tracemalloc
+
+import geopandas as gpd
+import ipyleaflet
+import numpy as np
+from shapely import box
+
+
+def make_parcels(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(-100, -80, n)
+    y = rng.uniform(25, 45, n)
+    size = rng.uniform(0.001, 0.01, n)
+    return gpd.GeoDataFrame(
+        {"parcel": np.arange(n), "value": rng.uniform(0, 1e6, n)},
+        geometry=box(x, y, x + size, y + size),
+        crs="EPSG:4326",
+    )
+
+
+def legacy_add_gdf(m, gdf):
+    gdf = gdf.to_crs(epsg=4326)
+    geojson = gdf.__geo_interface__
+    layer = ipyleaflet.GeoJSON(
+        data=geojson, hover_style={"color": "yellow", "fillOpacity": 0.5}
+    )
+    m.add_layer(layer)
+    bounds = gpd.GeoDataFrame.from_features(
+        geojson["features"], crs="EPSG:4326"
+    ).total_bounds
+    m.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
+    return layer
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24}{elapsed:>10.3f} s{peak / 2**20:>12.1f} MiB")
+
+
+def main(n=20000):
+    from geogo import Map
+
+    gdf = make_parcels(n)
+    geojson = gdf.__geo_interface__
+
+    print(f"{n} polygons")
+    print(f"{'path':<24}{'time':>12}{'peak':>16}")
+    measure("legacy add_gdf", lambda: legacy_add_gdf(Map(), gdf))
+    measure("add_gdf", lambda: Map().add_gdf(gdf))
+    measure("add_geojson (dict)", lambda: Map().add_geojson(geojson))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
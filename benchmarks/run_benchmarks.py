@@ -0,0 +1,306 @@
+"""Runs the geogo benchmark suite offline and records the results per commit.
+
+Storm benchmarks use SyntheticTrackDataset, so nothing is downloaded. For
+each case the suite reports the best wall time over a few runs, the peak
+memory traced by tracemalloc in a separate run, and the size of the payload
+the map sends to the browser: the widget data for geogo.Map, the HTML page
+and sidecar files for geogo.foliummap.Map.
+
+Results are appended to benchmarks/history.jsonl with the current commit,
+and --compare prints the change against the last run of another commit.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--quick] [--sizes 1000,100000]
+        [--filter add_gdf] [--repeat 3] [--compare] [--history PATH]
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import SyntheticTrackDataset, install_dataset, make_parcels  # noqa
+
+SIZES = (1000, 100000, 1000000)
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.jsonl")
+
+CASES = []
+
+
+def case(name, sized=False):
+    """Registers a benchmark case.
+
+    The decorated function prepares the case for a size and returns a run
+    function, which is timed, and a payload function, which measures the
+    bytes of the run's result.
+    """
+
+    def register(setup):
+        CASES.append((name, setup, sized))
+        return setup
+
+    return register
+
+
+def json_bytes(data):
+    return len(json.dumps(data).encode())
+
+
+@case("add_tropycal_storm")
+def bench_add_tropycal_storm(size, dataset):
+    from geogo import Map
+
+    storm = dataset.keys[len(dataset) // 2]
+    return lambda: Map().add_tropycal_storm(storm), lambda layer: json_bytes(layer.data)
+
+
+@case("get_storm_options cold")
+def bench_storm_options_cold(size, dataset):
+    from geogo import Map, storms
+
+    def run():
+        storms.clear_track_datasets()
+        return Map.get_storm_options(None, years=(2005, None), min_category="C1")
+
+    return run, json_bytes
+
+
+@case("get_storm_options warm")
+def bench_storm_options_warm(size, dataset):
+    from geogo import Map
+
+    Map.get_storm_options(None)
+
+    def run():
+        return Map.get_storm_options(None, years=(2005, None), min_category="C1")
+
+    return run, json_bytes
+
+
+@case("add_storm_wg select x20")
+def bench_storm_selection(size, dataset):
+    import ipywidgets as widgets
+
+    from geogo import Map
+
+    m = Map()
+    m.add_storm_wg(legend=False)
+    control = m.controls[-1]
+    dropdown = [
+        child
+        for box in control.widget.children
+        if isinstance(box, widgets.VBox)
+        for child in box.children
+        if isinstance(child, widgets.Dropdown)
+    ][0]
+    values = [value for _, value in dropdown.options][:21]
+
+    def run():
+        # Step through the dropdown and wait until each track is shown. Tracks
+        # are rebuilt on every run rather than served from the prefetch cache.
+        m._storm_prefetcher._cache.clear()
+        for value in values[1:] + values[:1]:
+            dropdown.value = value
+            track = m._storm_prefetcher.submit(value).result()[0]
+            deadline = time.perf_counter() + 10
+            while m._storm_layer.data is not track:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f"Storm {value} was not shown")
+                time.sleep(0.0005)
+        return m._storm_layer.data
+
+    return run, json_bytes
+
+
+@case("geogo add_gdf", sized=True)
+def bench_add_gdf(size, dataset):
+    from geogo import Map
+
+    gdf = make_parcels(size)
+    return lambda: Map().add_gdf(gdf), lambda layer: json_bytes(layer.data)
+
+
+@case("geogo add_geojson", sized=True)
+def bench_add_geojson(size, dataset):
+    from geogo import Map
+    from geogo.common import gdf_to_geojson
+
+    geojson = gdf_to_geojson(make_parcels(size))
+    return lambda: Map().add_geojson(geojson), lambda layer: json_bytes(layer.data)
+
+
+@case("folium export", sized=True)
+def bench_folium_export(size, dataset):
+    from geogo import FoliumMap
+
+    gdf = make_parcels(size)
+
+    def run():
+        m = FoliumMap()
+        m.add_gdf(gdf)
+        return m.get_root().render()
+
+    return run, lambda html: len(html.encode())
+
+
+@case("folium export sidecar", sized=True)
+def bench_folium_sidecar(size, dataset):
+    from geogo import FoliumMap
+
+    gdf = make_parcels(size)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "map.html")
+
+    def run():
+        m = FoliumMap(sidecar=True)
+        m.add_gdf(gdf)
+        m.save(path)
+        return path
+
+    def payload(path):
+        files = os.path.join(directory, "map_files")
+        return os.path.getsize(path) + sum(
+            os.path.getsize(os.path.join(files, name)) for name in os.listdir(files)
+        )
+
+    return run, payload
+
+
+def measure(run, payload, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - start)
+        # Slow cases run once.
+        if times[-1] > 5:
+            break
+    size = payload(result)
+    del result
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak, size
+
+
+def git_commit():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "diff", "--quiet", "HEAD", "--", "geogo"], cwd=root
+        ).returncode
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, bool(dirty)
+
+
+def previous_run(history, commit):
+    if not os.path.exists(history):
+        return None
+    last = None
+    with open(history) as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["commit"] != commit:
+                last = entry
+    return last
+
+
+def change(value, before):
+    if not before:
+        return ""
+    return f"{(value - before) / before:+.0%}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--quick", action="store_true", help="Only use 1000 features.")
+    parser.add_argument("--sizes", help="Comma-separated feature counts.")
+    parser.add_argument("--filter", default="", help="Only run cases containing this.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case.")
+    parser.add_argument("--storms", type=int, default=500, help="Synthetic storms.")
+    parser.add_argument(
+        "--length", type=int, default=40, help="Observations per storm."
+    )
+    parser.add_argument(
+        "--compare", action="store_true", help="Compare to the last commit."
+    )
+    parser.add_argument("--history", default=HISTORY, help="The results file.")
+    parser.add_argument("--no-save", action="store_true", help="Do not record results.")
+    args = parser.parse_args(argv)
+
+    if args.sizes:
+        sizes = [int(size) for size in args.sizes.split(",")]
+    else:
+        sizes = [1000] if args.quick else list(SIZES)
+    commit, dirty = git_commit()
+    before = previous_run(args.history, commit) if args.compare else None
+    before = {(r["case"], r["size"]): r for r in (before or {}).get("results", [])}
+
+    dataset = SyntheticTrackDataset(n_storms=args.storms, length=args.length)
+    results = []
+    print(f"commit {commit}{' (modified)' if dirty else ''}, {len(dataset)} storms")
+    print(f"{'case':<28}{'size':>9}{'time':>12}{'peak':>12}{'payload':>12}")
+    with install_dataset(dataset):
+        for name, setup, sized in CASES:
+            if args.filter not in name:
+                continue
+            for size in sizes if sized else [None]:
+                run, payload = setup(size, dataset)
+                seconds, peak, payload_bytes = measure(run, payload, args.repeat)
+                result = {
+                    "case": name,
+                    "size": size,
+                    "seconds": seconds,
+                    "peak_bytes": peak,
+                    "payload_bytes": payload_bytes,
+                }
+                results.append(result)
+
+                old = before.get((name, size), {})
+                print(
+                    f"{name:<28}{size or '':>9}{seconds:>10.3f} s"
+                    f"{peak / 2**20:>8.1f} MiB{payload_bytes / 2**10:>8.0f} KiB"
+                    + (
+                        f"   time {change(seconds, old.get('seconds'))}"
+                        f" peak {change(peak, old.get('peak_bytes'))}"
+                        f" payload {change(payload_bytes, old.get('payload_bytes'))}"
+                        if old
+                        else ""
+                    )
+                )
+
+    if not args.no_save:
+        entry = {
+            "commit": commit,
+            "dirty": dirty,
+            "date": dt.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "storms": len(dataset),
+            "results": results,
+        }
+        with open(args.history, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+    return results
+
+
+if __name__ == "__main__":
+    main()
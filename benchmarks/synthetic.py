@@ -0,0 +1,194 @@
+"""Synthetic stand-ins for the data geogo benchmarks need, generated offline.
+
+SyntheticTrackDataset mimics the parts of tropycal's TrackDataset that geogo
+reads: ``keys``, ``data`` (one storm dict per ID) and ``get_storm``. Use
+install_dataset to make geogo.storms serve it instead of downloading HURDAT.
+"""
+
+import contextlib
+import datetime as dt
+
+import numpy as np
+
+NAMES = [
+    "ALPHA",
+    "BRAVO",
+    "CHARLIE",
+    "DELTA",
+    "ECHO",
+    "FOXTROT",
+    "GOLF",
+    "HOTEL",
+    "INDIA",
+    "JULIET",
+    "KILO",
+    "LIMA",
+    "MIKE",
+    "NOVEMBER",
+    "OSCAR",
+    "PAPA",
+    "QUEBEC",
+    "ROMEO",
+    "SIERRA",
+    "TANGO",
+    "UNIFORM",
+    "VICTOR",
+    "WHISKEY",
+    "XRAY",
+    "YANKEE",
+    "ZULU",
+]
+
+
+def storm_type(vmax):
+    if vmax < 34:
+        return "TD"
+    if vmax < 64:
+        return "TS"
+    return "HU"
+
+
+class SyntheticTrackDataset:
+    """Generates random but plausible storm tracks.
+
+    Storms are spread evenly over the seasons. Each track drifts west and
+    recurves north-east, and its winds rise to a random peak and decay.
+    Every tenth storm is unnamed.
+
+    Args:
+        n_storms (int, optional): The number of storms. Defaults to 500.
+        length (int, optional): The number of 6-hourly observations per storm. Defaults to 40.
+        start_year (int, optional): The first season. Defaults to 1980.
+        seasons (int, optional): The number of seasons. Defaults to 45.
+        basin (str, optional): The basin recorded in the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source recorded in the storms. Defaults to 'hurdat'.
+        seed (int, optional): The random seed. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        n_storms=500,
+        length=40,
+        start_year=1980,
+        seasons=45,
+        basin="north_atlantic",
+        source="hurdat",
+        seed=0,
+    ):
+        rng = np.random.default_rng(seed)
+        self.basin = basin
+        self.source = source
+        self.keys = []
+        self.data = {}
+
+        per_season = {}
+        for i in range(n_storms):
+            year = start_year + i * seasons // n_storms
+            number = per_season[year] = per_season.get(year, 0) + 1
+            key = f"AL{number:02d}{year}"
+            if i % 10 == 9:
+                name = "UNNAMED"
+            else:
+                name = NAMES[(number - 1) % len(NAMES)]
+
+            steps = np.arange(length)
+            heading = np.radians(190 - 120 * steps / length + rng.normal(0, 5, length))
+            speed = rng.uniform(0.3, 0.8)
+            lon = -30 - rng.uniform(0, 30) + np.cumsum(speed * np.cos(heading))
+            lat = 10 + rng.uniform(0, 10) + np.cumsum(speed * np.abs(np.sin(heading)))
+            peak = rng.uniform(30, 165)
+            vmax = np.round(
+                25 + (peak - 25) * np.sin(np.pi * (steps + 1) / (length + 1)), 0
+            )
+            start = dt.datetime(year, 6, 1) + dt.timedelta(
+                hours=6 * int(rng.integers(0, 700))
+            )
+
+            self.keys.append(key)
+            self.data[key] = {
+                "id": key,
+                "operational_id": key,
+                "name": name,
+                "year": year,
+                "season": year,
+                "basin": basin,
+                "source": source,
+                "time": [start + dt.timedelta(hours=6 * j) for j in range(length)],
+                "lat": np.round(lat, 1).tolist(),
+                "lon": np.round(lon, 1).tolist(),
+                "vmax": vmax.tolist(),
+                "mslp": np.round(1010 - 0.8 * vmax, 0).tolist(),
+                "type": [storm_type(v) for v in vmax],
+            }
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get_storm(self, storm):
+        """Returns a storm by ID or by (name, year).
+
+        Args:
+            storm (str or tuple): The storm ID, or a tuple with the storm name and year.
+
+        Returns:
+            geogo.stormstore.StoredStorm: The storm.
+        """
+        from geogo.stormstore import StoredStorm
+
+        if isinstance(storm, tuple):
+            name, year = storm
+            matches = [
+                key
+                for key in self.keys
+                if self.data[key]["name"] == name.upper()
+                and self.data[key]["year"] == year
+            ]
+            if not matches:
+                raise RuntimeError("Storm not found")
+            storm = matches[0]
+        return StoredStorm(self.data[storm])
+
+
+@contextlib.contextmanager
+def install_dataset(dataset):
+    """Makes geogo.storms serve a dataset instead of building one with tropycal.
+
+    Args:
+        dataset (SyntheticTrackDataset): The dataset to serve for every basin.
+    """
+    from unittest import mock
+
+    from geogo import storms
+
+    storms.clear_track_datasets()
+    try:
+        with mock.patch.object(
+            storms, "_build_track_dataset", side_effect=lambda basin, source: dataset
+        ):
+            yield dataset
+    finally:
+        storms.clear_track_datasets()
+
+
+def make_parcels(n, seed=0):
+    """Builds n small square polygons with two attributes.
+
+    Args:
+        n (int): The number of polygons.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        geopandas.GeoDataFrame: The polygons in EPSG:4326.
+    """
+    import geopandas as gpd
+    from shapely import box
+
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(-100, -80, n)
+    y = rng.uniform(25, 45, n)
+    size = rng.uniform(0.001, 0.01, n)
+    return gpd.GeoDataFrame(
+        {"parcel": np.arange(n), "value": rng.uniform(0, 1e6, n)},
+        geometry=box(x, y, x + size, y + size),
+        crs="EPSG:4326",
+    )
@@ -4,4 +4,59 @@ __author__ = """Jordyn Hammel"""
 __email__ = "jlhammel134@gmail.com"
 __version__ = "1.0.0"
 
-from .geogo import *
+import importlib
+
+# Public names and the submodules that define them. They are imported on
+# first access, so that importing geogo does not load ipyleaflet, folium,
+# geopandas or the rest of the mapping stack.
+_lazy_attributes = {
+    "Map": ("geogo", "Map"),
+    "FoliumMap": ("foliummap", "Map"),
+    "get_storm": ("storms", "get_storm"),
+    "get_storm_index": ("analysis", "get_storm_index"),
+    "storm_exposure": ("analysis", "storm_exposure"),
+    "storm_wind_swath": ("analysis", "storm_wind_swath"),
+    "track_density": ("analysis", "track_density"),
+    # Exported by the former ``from .geogo import *``.
+    "ipyleaflet": ("geogo", "ipyleaflet"),
+    "gpd": ("geogo", "gpd"),
+    "dt": ("geogo", "dt"),
+}
+
+_submodules = {
+    "analysis",
+    "batch",
+    "cli",
+    "common",
+    "encoding",
+    "foliummap",
+    "geogo",
+    "media",
+    "prefetch",
+    "profiling",
+    "rasters",
+    "server",
+    "storms",
+    "stormstore",
+    "tilecache",
+    "timeseries",
+    "vectors",
+    "vectortiles",
+}
+
+__all__ = ["Map", "ipyleaflet", "gpd", "dt"]
+
+
+def __getattr__(name):
+    if name in _lazy_attributes:
+        module, attribute = _lazy_attributes[name]
+        value = getattr(importlib.import_module(f".{module}", __name__), attribute)
+        globals()[name] = value
+        return value
+    if name in _submodules:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes) | _submodules)
@@ -0,0 +1,568 @@
+"""The analysis module provides spatial queries and overlays for storm tracks."""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+KM_PER_DEGREE = 111.32
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_densities = OrderedDict()
+_densities_lock = threading.Lock()
+_density_cache_size = 16
+
+
+def _datetime64(value):
+    if value is None:
+        return None
+    return np.datetime64(value, "s")
+
+
+class StormIndex:
+    """A spatial index over the track segments of a basin.
+
+    Every segment between consecutive observations is stored in a shapely
+    STRtree together with the storm it belongs to and the time span it
+    covers, so proximity and region queries only test nearby segments.
+
+    Args:
+        columns (dict): Columns as returned by geogo.stormstore.dataset_columns.
+    """
+
+    def __init__(self, columns):
+        import shapely
+        from shapely import STRtree
+
+        offsets = np.asarray(columns["offsets"])
+        owner = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        keep = np.flatnonzero(owner[:-1] == owner[1:])
+
+        lon = np.asarray(columns["lon"], dtype=float)
+        lat = np.asarray(columns["lat"], dtype=float)
+        time = np.asarray(columns["time"]).astype("datetime64[s]")
+
+        self.ids = np.asarray(columns["ids"])
+        self.storm = owner[keep]
+        self.start = time[keep]
+        self.end = time[keep + 1]
+        self.coords = np.stack(
+            [
+                np.column_stack([lon[keep], lat[keep]]),
+                np.column_stack([lon[keep + 1], lat[keep + 1]]),
+            ],
+            axis=1,
+        )
+        self.segments = shapely.linestrings(self.coords)
+        self.tree = STRtree(self.segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __repr__(self):
+        return f"<StormIndex: {len(self.ids)} storms, {len(self)} segments>"
+
+    def _storm_ids(self, segments, start=None, end=None):
+        segments = np.asarray(segments, dtype=np.int64)
+        start, end = _datetime64(start), _datetime64(end)
+        if start is not None:
+            segments = segments[self.end[segments] >= start]
+        if end is not None:
+            segments = segments[self.start[segments] <= end]
+        return self.ids[np.unique(self.storm[segments])].tolist()
+
+    def storms_in_window(self, start=None, end=None):
+        """Returns the storms with observations in a time window.
+
+        Args:
+            start (str or datetime, optional): Start of the window. Defaults to None.
+            end (str or datetime, optional): End of the window. Defaults to None.
+
+        Returns:
+            list: Storm IDs.
+        """
+        return self._storm_ids(np.arange(len(self)), start, end)
+
+    def storms_near(self, point, radius_km, start=None, end=None):
+        """Returns the storms whose track passed within a distance of a point.
+
+        Candidate segments come from the STRtree. Distances are then measured
+        on a local equirectangular projection centred on the point, which is
+        accurate for radii of a few hundred kilometres.
+
+        Args:
+            point (tuple or shapely.geometry.Point): The (lon, lat) location.
+            radius_km (float): The search radius in kilometres.
+            start (str or datetime, optional): Only consider track segments after this time. Defaults to None.
+            end (str or datetime, optional): Only consider track segments before this time. Defaults to None.
+
+        Returns:
+            list: Storm IDs.
+        """
+        from shapely.geometry import box
+
+        if hasattr(point, "x"):
+            lon0, lat0 = point.x, point.y
+        else:
+            lon0, lat0 = point
+
+        kx = KM_PER_DEGREE * np.cos(np.radians(lat0))
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = radius_km / max(kx, 1e-6)
+        candidates = self.tree.query(
+            box(lon0 - dlon, lat0 - dlat, lon0 + dlon, lat0 + dlat)
+        )
+
+        xy = (self.coords[candidates] - [lon0, lat0]) * [kx, KM_PER_DEGREE]
+        a, b = xy[:, 0], xy[:, 1]
+        ab = b - a
+        length = np.einsum("ij,ij->i", ab, ab)
+        t = np.clip(
+            -np.einsum("ij,ij->i", a, ab) / np.where(length > 0, length, 1), 0, 1
+        )
+        distance = np.hypot(*(a + t[:, None] * ab).T)
+        return self._storm_ids(candidates[distance <= radius_km], start, end)
+
+    def storms_intersecting(self, geometry, start=None, end=None):
+        """Returns the storms whose track crosses a geometry.
+
+        Args:
+            geometry (shapely geometry, geopandas.GeoSeries or geopandas.GeoDataFrame): The
+                region, in EPSG:4326 unless it carries another CRS.
+            start (str or datetime, optional): Only consider track segments after this time. Defaults to None.
+            end (str or datetime, optional): Only consider track segments before this time. Defaults to None.
+
+        Returns:
+            list: Storm IDs.
+        """
+        if hasattr(geometry, "geometry") or hasattr(geometry, "crs"):
+            if geometry.crs is not None:
+                geometry = geometry.to_crs(epsg=4326)
+            geometry = np.asarray(geometry.geometry.values)
+            segments = self.tree.query(geometry, predicate="intersects")[1]
+        else:
+            segments = self.tree.query(geometry, predicate="intersects")
+        return self._storm_ids(np.unique(segments), start, end)
+
+
+def get_storm_index(basin="north_atlantic", source="hurdat", snapshot=False):
+    """Returns the spatial index of a basin.
+
+    The index is built once and kept for as long as the basin's data stays in
+    the shared dataset cache or snapshot.
+
+    Args:
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        snapshot (bool, optional): Whether to use the basin snapshot. Defaults to False.
+
+    Returns:
+        StormIndex: The spatial index.
+    """
+    from .storms import get_storm_columns
+
+    columns = get_storm_columns(basin, source, snapshot=snapshot)
+    key = (basin, source, snapshot)
+    with _indexes_lock:
+        cached = _indexes.get(key)
+    if cached is not None and cached[0] is columns["offsets"]:
+        return cached[1]
+
+    index = StormIndex(columns)
+    with _indexes_lock:
+        _indexes[key] = (columns["offsets"], index)
+    return index
+
+
+# Radius of the swath drawn around a track segment, by category of the segment.
+CATEGORY_RADII_KM = {
+    "TD": 50,
+    "TS": 100,
+    "C1": 130,
+    "C2": 150,
+    "C3": 170,
+    "C4": 190,
+    "C5": 210,
+}
+
+_exposure_tree = None
+
+
+def _init_exposure_worker(wkb):
+    global _exposure_tree
+    import shapely
+
+    _exposure_tree = shapely.STRtree(shapely.from_wkb(wkb))
+
+
+def _exposure_chunk(coords, radii, tree=None):
+    import shapely
+
+    if tree is None:
+        tree = _exposure_tree
+    swaths = shapely.buffer(shapely.linestrings(coords), radii)
+    return tree.query(swaths, predicate="intersects")
+
+
+def storm_exposure(
+    polygons,
+    storms=None,
+    basin="north_atlantic",
+    source="hurdat",
+    snapshot=False,
+    radius_km=None,
+    chunk_size=25,
+    max_workers=None,
+):
+    """Finds which polygons each storm's swath touched.
+
+    Every track segment is buffered by a fixed radius or by the radius of its
+    category in CATEGORY_RADII_KM, and the buffers are joined against the
+    polygons with an STRtree. Work is split into chunks of storms and spread
+    over a process pool; each worker receives the polygons once.
+
+    Segments are buffered in Web Mercator with the radius scaled by the local
+    scale factor, which keeps swath widths close to the requested distance.
+
+    Args:
+        polygons (geopandas.GeoDataFrame): The polygons to test, such as counties or parcels.
+            Polygons without a CRS are assumed to be in EPSG:4326.
+        storms (list, optional): Storm IDs or (name, year) tuples. Defaults to every storm in the basin.
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        snapshot (bool, optional): Whether to read storms from the basin snapshot. Defaults to False.
+        radius_km (float, optional): A fixed swath radius. Defaults to the category radii.
+        chunk_size (int, optional): Number of storms per task. Defaults to 25.
+        max_workers (int, optional): Number of worker processes. 1 runs in the current
+            process. Defaults to the number of CPUs.
+
+    Returns:
+        pandas.DataFrame: One row per exposed polygon and storm with the polygon's index
+            label, the storm id, name and season, and the highest category and vmax of
+            the segments that touched it.
+    """
+    import os
+    import pandas as pd
+    import shapely
+    from concurrent.futures import ProcessPoolExecutor
+    from pyproj import Transformer
+    from .storms import CATEGORIES, classify_vmax, get_storm_catalog
+    from .storms import get_storm_columns, storm_rows
+
+    catalog = get_storm_catalog(basin, source, snapshot=snapshot)
+    if storms is not None:
+        catalog = catalog.select(storms)
+    columns = get_storm_columns(basin, source, snapshot=snapshot)
+    positions = np.sort(pd.Index(columns["ids"]).get_indexer(catalog.df.index))
+
+    rows, owner = storm_rows(columns["offsets"], positions)
+    keep = np.flatnonzero(owner[:-1] == owner[1:])
+    storm = owner[keep]
+    vmax = np.asarray(columns["vmax"], dtype=float)[rows][keep]
+    codes = classify_vmax(vmax)
+
+    lon = np.asarray(columns["lon"], dtype=float)[rows]
+    lat = np.clip(np.asarray(columns["lat"], dtype=float)[rows], -85, 85)
+    x, y = Transformer.from_crs(4326, 3857, always_xy=True).transform(lon, lat)
+    coords = np.stack(
+        [
+            np.column_stack([x[keep], y[keep]]),
+            np.column_stack([x[keep + 1], y[keep + 1]]),
+        ],
+        axis=1,
+    )
+
+    if radius_km is None:
+        radius = np.array([CATEGORY_RADII_KM[c] for c in CATEGORIES], dtype=float)[
+            codes
+        ]
+    else:
+        radius = np.full(len(keep), float(radius_km))
+    mid_lat = np.radians((lat[keep] + lat[keep + 1]) / 2)
+    radii = radius * 1000 / np.cos(mid_lat)
+
+    if polygons.crs is None:
+        # Polygons without a CRS are taken to be in lon/lat, like the tracks.
+        polygons = polygons.set_crs(epsg=4326)
+    geometry = np.asarray(polygons.to_crs(epsg=3857).geometry.values)
+    bounds = np.searchsorted(
+        storm, np.arange(0, len(positions) + chunk_size, chunk_size)
+    )
+    starts = [int(b) for b, e in zip(bounds[:-1], bounds[1:]) if e > b]
+    ends = [int(e) for b, e in zip(bounds[:-1], bounds[1:]) if e > b]
+    chunks = [(coords[b:e], radii[b:e]) for b, e in zip(starts, ends)]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(chunks))
+    if max_workers <= 1:
+        tree = shapely.STRtree(geometry)
+        results = [_exposure_chunk(c, r, tree) for c, r in chunks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_exposure_worker,
+            initargs=(shapely.to_wkb(geometry),),
+        ) as executor:
+            results = list(executor.map(_exposure_chunk, *zip(*chunks)))
+
+    segment = np.concatenate(
+        [np.array([], dtype=np.int64)] + [r[0] + b for r, b in zip(results, starts)]
+    )
+    polygon = np.concatenate([np.array([], dtype=np.int64)] + [r[1] for r in results])
+
+    hits = pd.DataFrame(
+        {
+            "polygon": polygon,
+            "storm": positions[storm[segment]],
+            "code": codes[segment],
+            "vmax": vmax[segment],
+        }
+    )
+    table = hits.groupby(["polygon", "storm"], as_index=False).max()
+    return pd.DataFrame(
+        {
+            "polygon": polygons.index.to_numpy()[table["polygon"].to_numpy()],
+            "id": np.asarray(columns["ids"])[table["storm"].to_numpy()],
+            "name": np.asarray(columns["names"])[table["storm"].to_numpy()],
+            "season": np.asarray(columns["seasons"])[table["storm"].to_numpy()],
+            "category": np.array(CATEGORIES)[table["code"].to_numpy()],
+            "vmax": table["vmax"].to_numpy(),
+        }
+    )
+
+
+def track_density(
+    basin="north_atlantic",
+    source="hurdat",
+    years=None,
+    resolution=1.0,
+    weight=None,
+    snapshot=False,
+):
+    """Bins the track observations of a basin onto a regular lat/lon grid.
+
+    Results are cached per (basin, source, years, resolution, weight) for as
+    long as the basin's data stays the same, so showing the same climatology
+    again is cheap. The returned grid is read-only.
+
+    Args:
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        years (int or tuple, optional): A season or (start, end) range of seasons. Defaults to all.
+        resolution (float, optional): Cell size in degrees. Defaults to 1.0.
+        weight (str, optional): None to count observations, "vmax" to sum their maximum
+            wind, or "hours" to sum the time until the next observation. Defaults to None.
+        snapshot (bool, optional): Whether to read storms from the basin snapshot. Defaults to False.
+
+    Returns:
+        tuple: The grid as a 2D array with the northernmost row first, and its
+            bounds as [[south, west], [north, east]].
+    """
+    import pandas as pd
+    from .storms import get_storm_catalog, get_storm_columns, storm_rows
+
+    if weight not in (None, "vmax", "hours"):
+        raise ValueError("weight must be None, 'vmax' or 'hours'")
+    if isinstance(years, list):
+        years = tuple(years)
+
+    key = (basin, source, snapshot, years, float(resolution), weight)
+    columns = get_storm_columns(basin, source, snapshot=snapshot)
+    with _densities_lock:
+        cached = _densities.get(key)
+        # A rebuilt dataset or snapshot comes with new columns.
+        if cached is not None and cached[0] is columns["offsets"]:
+            _densities.move_to_end(key)
+            return cached[1]
+
+    catalog = get_storm_catalog(basin, source, snapshot=snapshot)
+    if years is not None:
+        catalog = catalog.filter(years=years)
+    positions = np.sort(pd.Index(columns["ids"]).get_indexer(catalog.df.index))
+    rows, owner = storm_rows(columns["offsets"], positions)
+
+    lon = np.asarray(columns["lon"], dtype=float)[rows]
+    lat = np.asarray(columns["lat"], dtype=float)[rows]
+    values = None
+    if weight == "vmax":
+        values = np.nan_to_num(np.asarray(columns["vmax"], dtype=float)[rows])
+    elif weight == "hours":
+        time = np.asarray(columns["time"]).astype("datetime64[s]")[rows]
+        step = np.diff(time).astype("timedelta64[s]").astype(float) / 3600
+        values = np.append(np.where(owner[:-1] == owner[1:], step, 0), 0)
+
+    valid = np.isfinite(lon) & np.isfinite(lat)
+    if valid.any():
+        west = np.floor(lon[valid].min() / resolution) * resolution
+        east = np.floor(lon[valid].max() / resolution) * resolution + resolution
+        south = np.floor(lat[valid].min() / resolution) * resolution
+        north = np.floor(lat[valid].max() / resolution) * resolution + resolution
+    else:
+        west, east, south, north = -180.0, 180.0, -90.0, 90.0
+    lat_edges = np.arange(south, north + resolution / 2, resolution)
+    lon_edges = np.arange(west, east + resolution / 2, resolution)
+
+    grid, _, _ = np.histogram2d(
+        lat[valid],
+        lon[valid],
+        bins=[lat_edges, lon_edges],
+        weights=None if values is None else values[valid],
+    )
+    grid = grid[::-1]
+    grid.setflags(write=False)
+    result = (
+        grid,
+        [
+            [float(lat_edges[0]), float(lon_edges[0])],
+            [float(lat_edges[-1]), float(lon_edges[-1])],
+        ],
+    )
+
+    with _densities_lock:
+        _densities[key] = (columns["offsets"], result)
+        while len(_densities) > _density_cache_size:
+            _densities.popitem(last=False)
+    return result
+
+
+def clear_track_densities():
+    """Removes every gridded result from the track density cache."""
+    with _densities_lock:
+        _densities.clear()
+
+
+def storm_wind_swath(
+    storm,
+    filename,
+    basin="north_atlantic",
+    source="hurdat",
+    snapshot=False,
+    resolution_km=1.0,
+    radius_km=None,
+    step_minutes=30,
+    chunk_size=1024,
+):
+    """Rasterizes the maximum wind swath of a storm to a Cloud-Optimized GeoTIFF.
+
+    Observations are interpolated in time, and at every step the storm's vmax
+    is spread over a radius, decaying linearly to zero at its edge. Each cell
+    keeps the highest wind it saw. The raster is computed one chunk_size x
+    chunk_size window at a time, and each step only touches the cells within
+    its radius, so neither the full grid per time step nor a dense stack of
+    steps is ever held in memory.
+
+    Args:
+        storm (str or tuple): The storm ID, or a tuple with the storm name and year.
+        filename (str): The output GeoTIFF path.
+        basin (str, optional): The basin of the storm. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        snapshot (bool, optional): Whether to read the storm from the basin snapshot. Defaults to False.
+        resolution_km (float, optional): Approximate cell size. Defaults to 1.0.
+        radius_km (float, optional): A fixed wind radius. Defaults to the category radii
+            in CATEGORY_RADII_KM.
+        step_minutes (float, optional): Interpolation time step. Defaults to 30.
+        chunk_size (int, optional): Width and height of the windows that are computed
+            and written at a time. Defaults to 1024.
+
+    Returns:
+        str: The output path.
+    """
+    import os
+    import tempfile
+
+    import rasterio
+    import rasterio.shutil
+    from pyproj import Transformer
+    from rasterio.transform import from_origin
+    from rasterio.windows import Window
+    from .storms import CATEGORIES, classify_vmax, get_storm
+
+    storm_dict = get_storm(storm, basin, source, snapshot=snapshot).dict
+    time = np.asarray(storm_dict["time"], dtype="datetime64[s]").astype(np.int64)
+    steps = np.arange(time[0], time[-1] + 1, int(step_minutes * 60))
+    lon = np.interp(steps, time, np.asarray(storm_dict["lon"], dtype=float))
+    lat = np.interp(steps, time, np.asarray(storm_dict["lat"], dtype=float))
+    vmax = np.interp(
+        steps, time, np.nan_to_num(np.asarray(storm_dict["vmax"], dtype=float))
+    )
+    lat = np.clip(lat, -85, 85)
+
+    if radius_km is None:
+        radii = np.array([CATEGORY_RADII_KM[c] for c in CATEGORIES], dtype=float)
+        radius = radii[classify_vmax(vmax)]
+    else:
+        radius = np.full(len(steps), float(radius_km))
+
+    # Web Mercator stretches distances by 1 / cos(lat), so radii and the cell
+    # size are scaled to stay close to true kilometres.
+    x, y = Transformer.from_crs(4326, 3857, always_xy=True).transform(lon, lat)
+    r = radius * 1000 / np.cos(np.radians(lat))
+    res = resolution_km * 1000 / np.cos(np.radians(np.mean(lat)))
+
+    west, north = (x - r).min(), (y + r).max()
+    width = int(np.ceil(((x + r).max() - west) / res))
+    height = int(np.ceil((north - (y - r).min()) / res))
+    profile = {
+        "driver": "GTiff",
+        "width": width,
+        "height": height,
+        "count": 1,
+        "dtype": "float32",
+        "crs": "EPSG:3857",
+        "transform": from_origin(west, north, res, res),
+        "nodata": 0,
+        "tiled": True,
+        "blockxsize": 512,
+        "blockysize": 512,
+        "compress": "deflate",
+        "BIGTIFF": "IF_SAFER",
+    }
+
+    fd, tmp = tempfile.mkstemp(
+        suffix=".tif", dir=os.path.dirname(os.path.abspath(filename))
+    )
+    os.close(fd)
+    try:
+        with rasterio.open(tmp, "w", **profile) as dst:
+            for row0 in range(0, height, chunk_size):
+                for col0 in range(0, width, chunk_size):
+                    h = min(chunk_size, height - row0)
+                    w = min(chunk_size, width - col0)
+                    left = west + col0 * res
+                    top = north - row0 * res
+                    block = np.zeros((h, w), dtype=np.float32)
+
+                    near = (
+                        (x + r >= left)
+                        & (x - r <= left + w * res)
+                        & (y - r <= top)
+                        & (y + r >= top - h * res)
+                    )
+                    for px, py, pr, pv in zip(x[near], y[near], r[near], vmax[near]):
+                        c0 = max(int((px - pr - left) / res), 0)
+                        c1 = min(int((px + pr - left) / res) + 1, w)
+                        r0 = max(int((top - py - pr) / res), 0)
+                        r1 = min(int((top - py + pr) / res) + 1, h)
+                        if c0 >= c1 or r0 >= r1:
+                            continue
+                        cx = left + (np.arange(c0, c1) + 0.5) * res - px
+                        cy = top - (np.arange(r0, r1) + 0.5) * res - py
+                        distance = np.hypot(cx[None, :], cy[:, None])
+                        wind = pv * np.clip(1 - distance / pr, 0, 1)
+                        np.maximum(block[r0:r1, c0:c1], wind, out=block[r0:r1, c0:c1])
+
+                    dst.write(block, 1, window=Window(col0, row0, w, h))
+
+        rasterio.shutil.copy(
+            tmp,
+            filename,
+            driver="COG",
+            compress="DEFLATE",
+            overview_resampling="AVERAGE",
+            blocksize=512,
+        )
+    finally:
+        os.remove(tmp)
+    return filename
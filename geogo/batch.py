@@ -0,0 +1,213 @@
+"""The batch module renders storm tracks to standalone HTML maps in parallel."""
+
+import os
+import time
+
+_worker_store = None
+
+
+def season_storms(season, basin="north_atlantic", source="hurdat", directory=None):
+    """Lists the storms of a season.
+
+    Args:
+        season (int): The season.
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        directory (str, optional): The snapshot root directory. Defaults to None.
+
+    Returns:
+        list: The storm IDs.
+    """
+    from .stormstore import get_storm_store
+
+    store = get_storm_store(basin, source, directory=directory)
+    return store.ids[store.seasons == season].tolist()
+
+
+def export_storm(storm, path, store, weight=8, **kwargs):
+    """Renders one storm track to a standalone HTML map.
+
+    The page is written to a temporary file first and then moved into place,
+    so an interrupted export never leaves a partial file behind.
+
+    Args:
+        storm (str or tuple): The storm ID, or a tuple with the storm name and year.
+        path (str): The HTML file to write.
+        store (geogo.stormstore.StormStore): The snapshot to read the storm from.
+        weight (int, optional): Line width of the track. Defaults to 8.
+        **kwargs: Additional keyword arguments for geogo.foliummap.Map.
+
+    Returns:
+        str: The path of the written file.
+    """
+    from .foliummap import Map
+
+    m = Map(**kwargs)
+    m.add_tropycal_storm(storm, weight=weight, store=store)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        m.save(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+
+def _storm_key(store, storm):
+    if not isinstance(storm, tuple):
+        return storm
+    key = store.get_storm_id(storm)
+    if not isinstance(key, str):
+        raise RuntimeError(
+            f"Multiple IDs were identified for the requested storm: {', '.join(key)}"
+        )
+    return key
+
+
+def _open_worker_store(path):
+    global _worker_store
+    from .stormstore import StormStore
+
+    _worker_store = StormStore(path)
+
+
+def _export_task(task):
+    storm, path, weight, kwargs = task
+    start = time.perf_counter()
+    try:
+        export_storm(storm, path, _worker_store, weight=weight, **kwargs)
+    except Exception as e:
+        status, error = "failed", f"{type(e).__name__}: {e}"
+    else:
+        status, error = "written", None
+    return {
+        "storm": storm,
+        "path": path,
+        "status": status,
+        "seconds": time.perf_counter() - start,
+        "bytes": os.path.getsize(path) if status == "written" else 0,
+        "error": error,
+    }
+
+
+def export_storms(
+    storms,
+    output_dir,
+    basin="north_atlantic",
+    source="hurdat",
+    max_workers=None,
+    overwrite=False,
+    weight=8,
+    directory=None,
+    **kwargs,
+):
+    """Renders storm tracks to standalone HTML maps across a process pool.
+
+    The basin snapshot is built once, if needed, and every worker
+    memory-maps it read-only, so the storm data is loaded neither per storm
+    nor per worker. Maps are written to ``<output_dir>/<storm ID>.html``.
+    Files that already exist are skipped unless overwrite is set, so an
+    interrupted export can be resumed by running it again. Storms that cannot
+    be found are reported as failed without stopping the others.
+
+    Args:
+        storms (list): Storm IDs, or tuples with a storm name and year.
+        output_dir (str): The directory to write the maps to.
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        max_workers (int, optional): Number of worker processes. Defaults to None, which uses
+            one per CPU. With 1, the maps are rendered in this process.
+        overwrite (bool, optional): Whether to render maps that already exist. Defaults to False.
+        weight (int, optional): Line width of the tracks. Defaults to 8.
+        directory (str, optional): The snapshot root directory. Defaults to None.
+        **kwargs: Additional keyword arguments for geogo.foliummap.Map.
+
+    Returns:
+        list: One dict per storm with its storm ID, path, status ("written",
+            "skipped" or "failed"), seconds, bytes and error.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    from .stormstore import get_storm_store
+
+    store = get_storm_store(basin, source, directory=directory)
+    os.makedirs(output_dir, exist_ok=True)
+
+    keys = []
+    results = {}
+    tasks = []
+    for storm in storms:
+        try:
+            key = _storm_key(store, storm)
+        except RuntimeError as e:
+            key = " ".join(str(part) for part in storm)
+            keys.append(key)
+            results[key] = {
+                "storm": key,
+                "path": None,
+                "status": "failed",
+                "seconds": 0.0,
+                "bytes": 0,
+                "error": f"{type(e).__name__}: {e}",
+            }
+            continue
+        keys.append(key)
+        path = os.path.join(output_dir, f"{key}.html")
+        if not overwrite and os.path.exists(path):
+            results[key] = {
+                "storm": key,
+                "path": path,
+                "status": "skipped",
+                "seconds": 0.0,
+                "bytes": os.path.getsize(path),
+                "error": None,
+            }
+        else:
+            tasks.append((key, path, weight, kwargs))
+
+    if max_workers == 1 or len(tasks) <= 1:
+        _open_worker_store(store.path)
+        for result in map(_export_task, tasks):
+            results[result["storm"]] = result
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_open_worker_store,
+            initargs=(store.path,),
+        ) as executor:
+            for result in executor.map(_export_task, tasks):
+                results[result["storm"]] = result
+
+    return [results[key] for key in keys]
+
+
+def format_summary(results):
+    """Formats export results as a table with one line per file and a total.
+
+    Args:
+        results (list): The results returned by export_storms.
+
+    Returns:
+        str: The summary.
+    """
+    lines = [f"{'storm':<12} {'status':<8} {'seconds':>8} {'KiB':>9}  path"]
+    for result in results:
+        line = (
+            f"{result['storm']:<12} {result['status']:<8} "
+            f"{result['seconds']:>8.2f} {result['bytes'] / 1024:>9.1f}  "
+            f"{result['path'] or ''}"
+        )
+        if result["error"]:
+            line += f"  ({result['error']})"
+        lines.append(line)
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    seconds = sum(result["seconds"] for result in results)
+    lines.append(
+        ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+        + f" in {seconds:.2f} s of rendering"
+    )
+    return "\n".join(lines)
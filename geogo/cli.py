@@ -0,0 +1,70 @@
+"""Console script for geogo."""
+
+import argparse
+import sys
+
+
+def export_storms_command(args):
+    from .batch import export_storms, format_summary, season_storms
+
+    storms = list(args.storms)
+    for season in args.season or []:
+        storms.extend(
+            season_storms(season, args.basin, args.source, directory=args.snapshot_dir)
+        )
+    if not storms:
+        print("No storms to export. Give storm IDs or --season.", file=sys.stderr)
+        return 2
+
+    results = export_storms(
+        storms,
+        args.output,
+        basin=args.basin,
+        source=args.source,
+        max_workers=args.workers,
+        overwrite=args.overwrite,
+        weight=args.weight,
+        directory=args.snapshot_dir,
+    )
+    print(format_summary(results))
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+def main(argv=None):
+    """Runs the geogo command line.
+
+    Args:
+        argv (list, optional): The arguments. Defaults to None, which reads sys.argv.
+
+    Returns:
+        int: The exit status.
+    """
+    parser = argparse.ArgumentParser(prog="geogo")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser(
+        "export-storms", help="Render storm tracks to standalone HTML maps."
+    )
+    export.add_argument("storms", nargs="*", help="Storm IDs, e.g. AL122005.")
+    export.add_argument(
+        "--season", type=int, action="append", help="Export every storm of a season."
+    )
+    export.add_argument("-o", "--output", default=".", help="The output directory.")
+    export.add_argument("--basin", default="north_atlantic")
+    export.add_argument("--source", default="hurdat")
+    export.add_argument(
+        "-j", "--workers", type=int, help="Worker processes. Defaults to one per CPU."
+    )
+    export.add_argument(
+        "--overwrite", action="store_true", help="Re-render maps that already exist."
+    )
+    export.add_argument("--weight", type=int, default=8, help="Track line width.")
+    export.add_argument("--snapshot-dir", help="The storm snapshot root directory.")
+    export.set_defaults(func=export_storms_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
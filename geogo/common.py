@@ -4,3 +4,147 @@
 def hello_world():
     """Prints "Hello World!" to the console."""
     print("Hello World!")
+
+
+def array_to_png(array, bounds=None, cmap="YlOrRd", vmin=None, vmax=None):
+    """Renders a 2D array as a PNG image with a matplotlib colormap.
+
+    Cells that are zero or NaN are transparent. When bounds are given, rows
+    are resampled so that the image lines up with a Web Mercator map when
+    stretched over those bounds.
+
+    Args:
+        array (numpy.ndarray): The values, with the northernmost row first.
+        bounds (list, optional): [[south, west], [north, east]] of a regular lat/lon grid. Defaults to None.
+        cmap (str, optional): Matplotlib colormap name. Defaults to "YlOrRd".
+        vmin (float, optional): Value mapped to the bottom of the colormap. Defaults to the minimum.
+        vmax (float, optional): Value mapped to the top of the colormap. Defaults to the maximum.
+
+    Returns:
+        bytes: The PNG image.
+    """
+    import io
+
+    import matplotlib
+    import matplotlib.image
+    import numpy as np
+
+    array = np.asarray(array, dtype=float)
+    if bounds is not None:
+        south, north = bounds[0][0], bounds[1][0]
+
+        def mercator(lat):
+            lat = np.radians(np.clip(lat, -85.0511, 85.0511))
+            return np.log(np.tan(np.pi / 4 + lat / 2))
+
+        y = np.linspace(mercator(north), mercator(south), array.shape[0] * 2)
+        lat = np.degrees(2 * np.arctan(np.exp(y)) - np.pi / 2)
+        rows = (north - lat) / (north - south) * array.shape[0]
+        array = array[np.clip(rows.astype(int), 0, array.shape[0] - 1)]
+
+    empty = ~np.isfinite(array) | (array == 0)
+    values = np.where(empty, np.nan, array)
+    if vmin is None:
+        vmin = np.nanmin(values) if not empty.all() else 0
+    if vmax is None:
+        vmax = np.nanmax(values) if not empty.all() else 1
+    norm = matplotlib.colors.Normalize(vmin=vmin, vmax=vmax)
+    rgba = matplotlib.colormaps[cmap](norm(np.nan_to_num(values)))
+    rgba[empty, 3] = 0
+
+    buffer = io.BytesIO()
+    matplotlib.image.imsave(buffer, rgba, format="png")
+    return buffer.getvalue()
+
+
+def geojson_bounds(geojson):
+    """Computes the bounds of GeoJSON data by scanning its coordinates.
+
+    A top-level "bbox" member is used as is. Otherwise coordinates are read
+    geometry by geometry, without building any geometry objects.
+
+    Args:
+        geojson (dict): A FeatureCollection, Feature or geometry.
+
+    Returns:
+        list or None: [min_x, min_y, max_x, max_y], or None if there are no coordinates.
+    """
+    import numpy as np
+
+    if "bbox" in geojson:
+        bbox = geojson["bbox"]
+        half = len(bbox) // 2
+        return [bbox[0], bbox[1], bbox[half], bbox[half + 1]]
+
+    bounds = [np.inf, np.inf, -np.inf, -np.inf]
+
+    def scan(coords):
+        if not coords:
+            return
+        if isinstance(coords[0], (int, float)):
+            xy = np.asarray([coords[:2]], dtype=float)
+        elif isinstance(coords[0][0], (int, float)):
+            xy = np.asarray([c[:2] for c in coords], dtype=float)
+        else:
+            for part in coords:
+                scan(part)
+            return
+        low, high = xy.min(axis=0), xy.max(axis=0)
+        bounds[0] = min(bounds[0], low[0])
+        bounds[1] = min(bounds[1], low[1])
+        bounds[2] = max(bounds[2], high[0])
+        bounds[3] = max(bounds[3], high[1])
+
+    def visit(obj):
+        if obj is None:
+            return
+        kind = obj.get("type")
+        if kind == "FeatureCollection":
+            for feature in obj.get("features", []):
+                visit(feature)
+        elif kind == "Feature":
+            visit(obj.get("geometry"))
+        elif kind == "GeometryCollection":
+            for geometry in obj.get("geometries", []):
+                visit(geometry)
+        else:
+            scan(obj.get("coordinates"))
+
+    visit(geojson)
+    if not np.isfinite(bounds[0]):
+        return None
+    return [float(b) for b in bounds]
+
+
+def gdf_to_geojson(gdf, style=None, precision=None):
+    """Converts a GeoDataFrame to a GeoJSON dictionary in EPSG:4326.
+
+    The frame is reprojected only when it is in another CRS. A uniform style
+    is written into each feature's properties, where ipyleaflet reads it
+    without copying the data.
+
+    Args:
+        gdf (geopandas.GeoDataFrame): The GeoDataFrame to convert.
+        style (dict, optional): Style applied to every feature. Per-feature styles take precedence. Defaults to None.
+        precision (int, optional): The number of decimals to keep in coordinates. Defaults to None, which keeps them all.
+
+    Returns:
+        dict: The GeoJSON FeatureCollection.
+    """
+    from .profiling import phase
+
+    if gdf.crs is not None and not gdf.crs.equals("EPSG:4326"):
+        with phase("reproject"):
+            gdf = gdf.to_crs(epsg=4326)
+    with phase("serialize"):
+        if precision is not None:
+            from .encoding import round_coordinates
+
+            gdf = gdf.set_geometry(round_coordinates(gdf.geometry, precision))
+        geojson = gdf.__geo_interface__
+
+        if style:
+            for feature in geojson["features"]:
+                properties = feature.setdefault("properties", {})
+                properties["style"] = {**style, **(properties.get("style") or {})}
+    return geojson
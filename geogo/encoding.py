@@ -0,0 +1,229 @@
+"""The encoding module writes compact, quantized encodings of vector layers."""
+
+import json
+
+import numpy as np
+
+
+def round_coordinates(geometries, precision=6):
+    """Rounds geometry coordinates to a number of decimals.
+
+    Rounded coordinates serialize to short JSON numbers. Six decimals keep
+    about 0.1 m of precision in degrees.
+
+    Args:
+        geometries (geopandas.GeoSeries): The geometries.
+        precision (int, optional): The number of decimals to keep. Defaults to 6.
+
+    Returns:
+        geopandas.GeoSeries: The geometries with rounded coordinates.
+    """
+    import geopandas as gpd
+    import shapely
+
+    return gpd.GeoSeries(
+        shapely.transform(geometries.values, lambda c: np.round(c, precision)),
+        index=geometries.index,
+        crs=geometries.crs,
+    )
+
+
+def round_geojson(geojson, precision=6):
+    """Rounds the coordinates of GeoJSON data to a number of decimals.
+
+    Args:
+        geojson (dict): A FeatureCollection, Feature or geometry.
+        precision (int, optional): The number of decimals to keep. Defaults to 6.
+
+    Returns:
+        dict: A copy of the data with rounded coordinates.
+    """
+
+    def round_coords(coords):
+        if isinstance(coords, (int, float)):
+            return round(coords, precision)
+        return [round_coords(c) for c in coords]
+
+    def walk(value):
+        if isinstance(value, dict):
+            return {
+                key: round_coords(item) if key == "coordinates" else walk(item)
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [walk(item) for item in value]
+        return value
+
+    return walk(geojson)
+
+
+def _quantized_parts(coords, scale, translate):
+    quantized = np.round((np.asarray(coords)[:, :2] - translate) / scale)
+    quantized = quantized.astype(np.int64)
+    keep = np.ones(len(quantized), dtype=bool)
+    keep[1:] = np.any(quantized[1:] != quantized[:-1], axis=1)
+    return [tuple(p) for p in quantized[keep].tolist()]
+
+
+class _ArcBuilder:
+    """Splits lines and rings at junctions and stores each distinct arc once."""
+
+    def __init__(self):
+        self.lines = []
+        self.neighbours = {}
+        self.junctions = set()
+        self.arcs = []
+        self._index = {}
+
+    def add(self, points, ring):
+        """Registers a line or ring and returns its position."""
+        if ring:
+            points = points[:-1] if points[0] == points[-1] else points
+        n = len(points)
+        for i, point in enumerate(points):
+            if ring:
+                pair = (points[i - 1], points[(i + 1) % n])
+            elif 0 < i < n - 1:
+                pair = (points[i - 1], points[i + 1])
+            else:
+                self.junctions.add(point)
+                continue
+            pair = pair if pair[0] <= pair[1] else pair[::-1]
+            seen = self.neighbours.setdefault(point, pair)
+            if seen != pair:
+                self.junctions.add(point)
+        self.lines.append((points, ring))
+        return len(self.lines) - 1
+
+    def _ref(self, arc):
+        arc = tuple(arc)
+        if arc in self._index:
+            return self._index[arc]
+        reverse = arc[::-1]
+        if reverse in self._index:
+            return ~self._index[reverse]
+        self._index[arc] = len(self.arcs)
+        self.arcs.append(arc)
+        return self._index[arc]
+
+    def refs(self, position):
+        """Returns the arc references of a registered line or ring."""
+        points, ring = self.lines[position]
+        cuts = [i for i, point in enumerate(points) if point in self.junctions]
+        if ring:
+            if not cuts:
+                start = points.index(min(points))
+                points = points[start:] + points[:start]
+                return [self._ref(points + [points[0]])]
+            points = points[cuts[0] :] + points[: cuts[0]] + [points[cuts[0]]]
+            cuts = [i - cuts[0] for i in cuts] + [len(points) - 1]
+        refs = []
+        for start, end in zip(cuts[:-1], cuts[1:]):
+            refs.append(self._ref(points[start : end + 1]))
+        return refs
+
+    def encoded_arcs(self):
+        """Returns the arcs with delta-encoded positions."""
+        encoded = []
+        for arc in self.arcs:
+            arc = np.array(arc, dtype=np.int64)
+            arc[1:] = np.diff(arc, axis=0)
+            encoded.append(arc.tolist())
+        return encoded
+
+
+def to_topojson(gdf, precision=5, object_name="data"):
+    """Encodes a GeoDataFrame as quantized TopoJSON.
+
+    Coordinates are quantized to the given number of decimals and stored as
+    integer deltas. Lines and polygon rings are split into arcs at the points
+    where they meet. Shared borders are stored once and referenced by every
+    geometry that uses them. The result can be decoded in the browser with
+    topojson-client, which folium's TopoJson layer loads.
+
+    Args:
+        gdf (geopandas.GeoDataFrame): The features to encode.
+        precision (int, optional): The number of decimals of the coordinates in
+            EPSG:4326. Defaults to 5, about 1 m.
+        object_name (str, optional): The name of the object in the topology. Defaults to "data".
+
+    Returns:
+        dict: The TopoJSON Topology.
+    """
+    if gdf.crs is not None and not gdf.crs.equals("EPSG:4326"):
+        gdf = gdf.to_crs(epsg=4326)
+
+    bounds = gdf.total_bounds
+    if not np.isfinite(bounds).all():
+        bounds = np.zeros(4)
+    scale = 10.0**-precision
+    translate = bounds[:2]
+    builder = _ArcBuilder()
+
+    def register(geometry):
+        kind = geometry.geom_type
+        if geometry.is_empty:
+            return None
+        if kind == "Point":
+            return kind, _quantized_parts([geometry.coords[0]], scale, translate)[0]
+        if kind == "MultiPoint":
+            points = [part.coords[0] for part in geometry.geoms]
+            return kind, _quantized_parts(points, scale, translate)
+        if kind == "LineString":
+            points = _quantized_parts(geometry.coords, scale, translate)
+            if len(points) < 2:
+                return None
+            return kind, builder.add(points, ring=False)
+        if kind == "Polygon":
+            rings = []
+            for ring in [geometry.exterior, *geometry.interiors]:
+                points = _quantized_parts(ring.coords, scale, translate)
+                if len(points) < 4:
+                    if not rings:
+                        return None
+                    continue
+                rings.append(builder.add(points, ring=True))
+            return kind, rings
+        if kind.startswith("Multi") or kind == "GeometryCollection":
+            parts = [register(part) for part in geometry.geoms]
+            return kind, [part for part in parts if part is not None]
+        return None
+
+    def encode(registered):
+        if registered is None:
+            return {"type": None}
+        kind, value = registered
+        if kind in ("Point", "MultiPoint"):
+            return {"type": kind, "coordinates": value}
+        if kind == "LineString":
+            return {"type": kind, "arcs": builder.refs(value)}
+        if kind == "Polygon":
+            return {"type": kind, "arcs": [builder.refs(ring) for ring in value]}
+        if kind == "GeometryCollection":
+            return {"type": kind, "geometries": [encode(part) for part in value]}
+        parts = [encode(part) for part in value]
+        key = "coordinates" if kind == "MultiPoint" else "arcs"
+        return {"type": kind, key: [part[key] for part in parts]}
+
+    registered = [
+        None if geometry is None else register(geometry) for geometry in gdf.geometry
+    ]
+    properties = json.loads(
+        gdf.drop(columns=gdf.geometry.name).to_json(orient="records")
+    )
+
+    geometries = []
+    for item, props in zip(registered, properties):
+        geometry = encode(item)
+        geometry["properties"] = props
+        geometries.append(geometry)
+
+    return {
+        "type": "Topology",
+        "bbox": [float(b) for b in bounds],
+        "transform": {"scale": [scale, scale], "translate": translate.tolist()},
+        "objects": {
+            object_name: {"type": "GeometryCollection", "geometries": geometries}
+        },
+        "arcs": builder.encoded_arcs(),
+    }
@@ -2,12 +2,137 @@
 
 import folium
 import folium.plugins
+import json
 import os
 
+from branca.element import Template
+
+from .profiling import instrument, phase
+
+_SCRIPT_ESCAPES = str.maketrans(
+    {"<": "\\u003c", ">": "\\u003e", "&": "\\u0026", "'": "\\u0027"}
+)
+
+
+class SidecarGeoJson(folium.map.Layer):
+    """A GeoJSON layer whose data is loaded from a gzipped sidecar file.
+
+    The page fetches the file after it loads and adds the features to the
+    layer, and logs an error to the console if the file cannot be loaded.
+    Features are styled with the layer style merged with their "style"
+    property. Until the map is saved, the data is embedded instead.
+
+    Args:
+        key (str): The content hash of the data, used as the file name.
+        payload (bytes): The gzipped GeoJSON.
+        name (str, optional): The layer name. Defaults to None.
+        style (dict, optional): The Leaflet path options of the features. Defaults to None.
+        overlay (bool, optional): Whether the layer is an overlay. Defaults to True.
+        control (bool, optional): Whether the layer is listed in layer controls. Defaults to True.
+        show (bool, optional): Whether the layer is shown on opening. Defaults to True.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = L.geoJson(null, {
+            style: function(feature) {
+                return Object.assign(
+                    {}, {{ this.style|tojson }}, (feature.properties || {}).style
+                );
+            }
+        });
+        {%- if this.url %}
+        fetch({{ this.url|tojson }})
+            .then(function(response) {
+                if (!response.ok) {
+                    throw new Error(response.status + " " + response.statusText);
+                }
+                return response.arrayBuffer();
+            })
+            .then(function(buffer) {
+                var bytes = new Uint8Array(buffer);
+                // Servers may already have decoded the file.
+                if (bytes[0] !== 0x1f || bytes[1] !== 0x8b) {
+                    return new TextDecoder().decode(bytes);
+                }
+                var stream = new Blob([buffer]).stream()
+                    .pipeThrough(new DecompressionStream("gzip"));
+                return new Response(stream).text();
+            })
+            .then(function(text) {
+                {{ this.get_name() }}.addData(JSON.parse(text));
+            })
+            .catch(function(error) {
+                console.error(
+                    "Could not load the sidecar file " + {{ this.url|tojson }}, error
+                );
+            });
+        {%- else %}
+        {{ this.get_name() }}.addData({{ this.script_data() }});
+        {%- endif %}
+        {% endmacro %}
+        """)
+
+    def __init__(
+        self, key, payload, name=None, style=None, overlay=True, control=True, show=True
+    ):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = "SidecarGeoJson"
+        self.key = key
+        self.payload = payload
+        self.style = style or {}
+        self.url = None
+
+    def data(self):
+        """Returns the GeoJSON text of the layer."""
+        import gzip
+
+        return gzip.decompress(self.payload).decode()
 
+    def script_data(self):
+        """Returns the GeoJSON text escaped for embedding in a script element.
+
+        Like Jinja's tojson filter, this escapes the characters that could
+        close the script element, which JSON only allows inside strings.
+        """
+        return self.data().translate(_SCRIPT_ESCAPES)
+
+
+def _with_feature_styles(data, style_function):
+    """Returns a copy of GeoJSON data with the style of each feature in its properties."""
+    if data.get("type") == "FeatureCollection":
+        return dict(
+            data,
+            features=[
+                _with_feature_styles(feature, style_function)
+                for feature in data["features"]
+            ],
+        )
+    if data.get("type") == "Feature":
+        properties = dict(data.get("properties") or {})
+        properties["style"] = style_function(data)
+        return dict(data, properties=properties)
+    return _with_feature_styles(
+        {"type": "Feature", "geometry": data, "properties": {}}, style_function
+    )
+
+
+@instrument
 class Map(folium.Map):
-    def __init__(self, center=(0, 0), zoom=2, **kwargs):
+    def __init__(self, center=(0, 0), zoom=2, sidecar=False, **kwargs):
+        """Creates a folium map.
+
+        Args:
+            center (tuple, optional): The map center. Defaults to (0, 0).
+            zoom (int, optional): The initial zoom level. Defaults to 2.
+            sidecar (bool, optional): Whether vector layers are written to gzipped sidecar
+                files by default when the map is saved. Defaults to False.
+            **kwargs: Additional keyword arguments for folium.Map.
+        """
         super().__init__(location=center, zoom_start=zoom, **kwargs)
+        self.sidecar = sidecar
+        self._sidecars = {}
+        self._layer_sizes = []
 
     def add_basemap(self, basemap="OpenTopoMap"):
         """Add basemap to the map.
@@ -25,6 +150,8 @@ class Map(folium.Map):
         data,
         zoom_to_layer=True,
         hover_style=None,
+        sidecar=None,
+        precision=None,
         **kwargs,
     ):
         """Add a GeoJSON layer to the map.
@@ -33,20 +160,47 @@ class Map(folium.Map):
             data (_type_): _file path, GeoDataFrame, or GeoJSON dictionary.
             zoom_to_layer (bool, optional): Zoom in to the layer on the map. Defaults to True.
             hover_style (_type_, optional): Changes color when hover over place on map.. Defaults to None.
+            sidecar (bool, optional): Whether to write the layer to a sidecar file when the map is
+                saved. Defaults to None, which uses the map's sidecar setting. Sidecar layers
+                accept name, style, style_function, overlay, control and show.
+            precision (int, optional): The number of decimals to keep in coordinates.
+                Defaults to None, which keeps them all, or 6 with sidecar.
         """
         import geopandas as gpd
 
         if hover_style is None:
             hover_style = {"color": "yellow", "fillOpacity": 0.2}
+        if sidecar is None:
+            sidecar = self.sidecar
 
         if isinstance(data, str):
-            gdf = gpd.read_file(data)
-            geojson = gdf.__geo_interface__
-        elif isinstance(data, dict):
-            geojson = data
-
-        geojson = folium.GeoJson(data=geojson, **kwargs)
+            with phase("load"):
+                data = gpd.read_file(data)
+        if isinstance(data, gpd.GeoDataFrame):
+            return self.add_gdf(
+                data,
+                zoom_to_layer=zoom_to_layer,
+                sidecar=sidecar,
+                precision=precision,
+                **kwargs,
+            )
+
+        if sidecar and precision is None:
+            precision = 6
+        if precision is not None:
+            from .encoding import round_geojson
+
+            with phase("serialize"):
+                data = round_geojson(data, precision)
+
+        if sidecar:
+            return self._add_sidecar(data, zoom_to_layer=zoom_to_layer, **kwargs)
+
+        with phase("serialize"):
+            geojson = folium.GeoJson(data=data, **kwargs)
         geojson.add_to(self)
+        self._record_layer(geojson, "geojson", data, None)
+        return geojson
 
     def add_shp(self, data, **kwargs):
         """Add a shapefile to the map.
@@ -56,20 +210,190 @@ class Map(folium.Map):
         """
         import geopandas as gpd
 
-        gdf = gpd.read_file(data)
-        gdf = gdf.to_crs(epsg=4326)
-        geojson = gdf.__geo_interface__
-        self.add_geojson(geojson, **kwargs)
+        with phase("load"):
+            gdf = gpd.read_file(data)
+        return self.add_gdf(gdf, **kwargs)
 
-    def add_gdf(self, gdf, **kwargs):
+    def add_gdf(self, gdf, compact=False, precision=None, sidecar=None, **kwargs):
         """Add a GeoDataFrame to the map.
 
+        With compact, the layer is embedded as quantized TopoJSON, in which
+        coordinates are integer deltas and shared borders are stored once. It
+        is decoded in the browser by folium's TopoJson layer.
+
         Args:
             gdf (_type_): The GeoDataFrame to add.
+            compact (bool, optional): Whether to embed the layer as TopoJSON. Defaults to False.
+            precision (int, optional): The number of decimals to keep in coordinates.
+                Defaults to None, which keeps them all, or 5 with compact and 6 with sidecar.
+            sidecar (bool, optional): Whether to write the layer to a sidecar file when the map is
+                saved. Defaults to None, which uses the map's sidecar setting.
         """
-        gdf = gdf.to_crs(epsg=4326)
-        geojson = gdf.__geo_interface__
-        self.add_geojson(geojson, **kwargs)
+        from .common import gdf_to_geojson
+
+        if sidecar is None:
+            sidecar = self.sidecar
+
+        if compact:
+            from .encoding import to_topojson
+
+            kwargs.pop("zoom_to_layer", None)
+            with phase("serialize"):
+                topojson = to_topojson(
+                    gdf, precision=5 if precision is None else precision
+                )
+            layer = folium.TopoJson(topojson, "objects.data", **kwargs)
+            layer.add_to(self)
+            self._record_layer(layer, "topojson", topojson, None)
+            return layer
+
+        if sidecar and precision is None:
+            precision = 6
+        geojson = gdf_to_geojson(gdf, precision=precision)
+        return self.add_geojson(geojson, sidecar=sidecar, **kwargs)
+
+    def _add_sidecar(
+        self,
+        data,
+        name=None,
+        style=None,
+        zoom_to_layer=True,
+        style_function=None,
+        **kwargs,
+    ):
+        import gzip
+        import hashlib
+
+        from .common import geojson_bounds
+
+        unsupported = sorted(set(kwargs) - {"overlay", "control", "show"})
+        if unsupported:
+            raise ValueError(
+                f"Sidecar layers do not support {', '.join(unsupported)}. "
+                "Add the layer with sidecar=False to use them."
+            )
+
+        with phase("serialize"):
+            if style_function is not None:
+                # The page merges the "style" property into the layer style.
+                data = _with_feature_styles(data, style_function)
+            text = json.dumps(data, separators=(",", ":"))
+            key = hashlib.sha1(text.encode()).hexdigest()[:16]
+            shared = key in self._sidecars
+            if not shared:
+                self._sidecars[key] = gzip.compress(text.encode(), 9, mtime=0)
+
+        layer = SidecarGeoJson(
+            key, self._sidecars[key], name=name, style=style, **kwargs
+        )
+        layer.add_to(self)
+        self._record_layer(
+            layer,
+            "sidecar",
+            data,
+            0,
+            raw_bytes=len(text),
+            sidecar_bytes=0 if shared else len(self._sidecars[key]),
+            shared=shared,
+        )
+
+        bounds = geojson_bounds(data) if zoom_to_layer else None
+        if bounds is not None:
+            self.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
+        return layer
+
+    def _record_layer(
+        self,
+        layer,
+        kind,
+        data,
+        page_bytes,
+        raw_bytes=None,
+        sidecar_bytes=0,
+        shared=False,
+    ):
+        if data.get("type") == "Topology":
+            features = sum(
+                len(obj.get("geometries", [])) for obj in data["objects"].values()
+            )
+        else:
+            features = len(data.get("features", [data]))
+        entry = {
+            "name": layer.layer_name,
+            "format": kind,
+            "features": features,
+            "raw_bytes": page_bytes if raw_bytes is None else raw_bytes,
+            "page_bytes": page_bytes,
+            "sidecar_bytes": sidecar_bytes,
+            "shared": shared,
+        }
+        if page_bytes is None:
+            # Embedded data is only serialized when the sizes are reported.
+            entry["_data"] = data
+        self._layer_sizes.append(entry)
+
+    def layer_sizes(self):
+        """Reports how many bytes each vector layer adds to the exported page.
+
+        Returns:
+            pandas.DataFrame: One row per layer added with add_geojson or add_gdf, with
+                its name, format ("geojson", "topojson" or "sidecar"), number of features,
+                size of its serialized data (raw_bytes), bytes of data embedded in the
+                page (page_bytes), bytes of its compressed sidecar file (sidecar_bytes,
+                0 when the file is shared with an earlier layer) and whether it reuses
+                the data of an earlier layer (shared).
+        """
+        import pandas as pd
+
+        columns = [
+            "name",
+            "format",
+            "features",
+            "raw_bytes",
+            "page_bytes",
+            "sidecar_bytes",
+            "shared",
+        ]
+        for entry in self._layer_sizes:
+            data = entry.pop("_data", None)
+            if data is not None:
+                entry["page_bytes"] = entry["raw_bytes"] = len(json.dumps(data))
+        return pd.DataFrame(self._layer_sizes, columns=columns)
+
+    def save(self, outfile, close_file=True, **kwargs):
+        """Saves the map to an HTML file.
+
+        Sidecar layers are written to ``<name>_files/<hash>.json.gz`` next to
+        the page, and layers with the same data share one file. Browsers do
+        not fetch sidecar files from pages opened with file://, so serve the
+        directory over HTTP, e.g. with ``python -m http.server``.
+
+        Args:
+            outfile (str or file): The file, or file name, to write.
+            close_file (bool, optional): Whether to close the file after writing. Defaults to True.
+            **kwargs: Additional keyword arguments for rendering.
+        """
+        path = outfile if isinstance(outfile, (str, os.PathLike)) else None
+        path = path or getattr(outfile, "name", None)
+        layers = [
+            child
+            for child in self._children.values()
+            if isinstance(child, SidecarGeoJson)
+        ]
+        if layers and isinstance(path, (str, os.PathLike)):
+            path = os.fspath(path)
+            folder = os.path.splitext(os.path.basename(path))[0] + "_files"
+            directory = os.path.join(os.path.dirname(os.path.abspath(path)), folder)
+            os.makedirs(directory, exist_ok=True)
+            for layer in layers:
+                with open(os.path.join(directory, f"{layer.key}.json.gz"), "wb") as f:
+                    f.write(layer.payload)
+                layer.url = f"{folder}/{layer.key}.json.gz"
+        try:
+            super().save(outfile, close_file=close_file, **kwargs)
+        finally:
+            for layer in layers:
+                layer.url = None
 
     def add_vector(self, data, **kwargs):
         """Add vector data to the map.
@@ -83,15 +407,65 @@ class Map(folium.Map):
         import geopandas as gpd
 
         if isinstance(data, str):
-            gdf = gpd.read_file(data)
-            self.add_gdf(gdf, **kwargs)
+            with phase("load"):
+                gdf = gpd.read_file(data)
+            return self.add_gdf(gdf, **kwargs)
         elif isinstance(data, gpd.GeoDataFrame):
-            self.add_gdf(data, **kwargs)
+            return self.add_gdf(data, **kwargs)
         elif isinstance(data, dict):
-            self.add_geojson(data, **kwargs)
+            return self.add_geojson(data, **kwargs)
         else:
             raise ValueError("Invalid data type")
 
+    def add_tropycal_storm(
+        self,
+        name_or_tuple,
+        basin="north_atlantic",
+        source="hurdat",
+        zoom_to_layer=True,
+        weight=8,
+        snapshot=False,
+        store=None,
+    ):
+        """Adds a storm track to the map, colored by category.
+
+        Args:
+            name_or_tuple (str or tuple): The storm ID, or a tuple with the storm name and year.
+            basin (str, optional): The basin of the storm. Defaults to 'north_atlantic'.
+            source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+            zoom_to_layer (bool, optional): Whether to zoom to the track. Defaults to True.
+            weight (int, optional): Line width of the track. Defaults to 8.
+            snapshot (bool, optional): Whether to read the storm from the memory-mapped basin
+                snapshot instead of a tropycal TrackDataset. Defaults to False.
+            store (geogo.stormstore.StormStore, optional): Read the storm from this snapshot.
+                Defaults to None.
+
+        Returns:
+            folium.GeoJson: The track layer.
+        """
+        from .storms import get_storm, storm_track_geojson, track_bounds
+
+        with phase("load"):
+            if store is not None:
+                storm = store.get_storm(name_or_tuple)
+            else:
+                storm = get_storm(name_or_tuple, basin, source, snapshot=snapshot)
+
+        with phase("geometry"):
+            geojson = storm_track_geojson(storm.dict, weight=weight)
+        name = f"{str(storm.dict['name']).title()} {storm.dict['year']}"
+        with phase("serialize"):
+            layer = folium.GeoJson(
+                data=geojson,
+                name=name,
+                style_function=lambda feature: feature["properties"]["style"],
+            )
+        layer.add_to(self)
+
+        if zoom_to_layer:
+            self.fit_bounds(track_bounds(storm.dict["lon"], storm.dict["lat"]))
+        return layer
+
     def add_layer_control(self):
         """Adds a layer control to the map."""
         folium.LayerControl().add_to(self)
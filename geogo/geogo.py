@@ -4,7 +4,10 @@ import ipyleaflet
 import geopandas as gpd
 import datetime as dt
 
+from .profiling import instrument, phase
 
+
+@instrument
 class Map(ipyleaflet.Map):
     def __init__(self, center=[20, 0], zoom=2, height="600px", **kwargs):
 
@@ -12,6 +15,46 @@ class Map(ipyleaflet.Map):
         self.layout.height = height
         self.scroll_wheel_zoom = True
 
+    def _on_kernel_loop(self, callback):
+        # Background work finishes on worker threads, while map updates belong
+        # on the kernel's event loop, which is running when a widget is built.
+        import asyncio
+        import threading
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        def call(*args):
+            if (
+                loop is not None
+                and threading.current_thread() is not threading.main_thread()
+            ):
+                loop.call_soon_threadsafe(callback, *args)
+            else:
+                callback(*args)
+
+        return call
+
+    def use_tile_cache(self, cache=True, **kwargs):
+        """Routes basemaps and WMS layers added from now on through a local tile cache.
+
+        Args:
+            cache (bool or geogo.tilecache.TileCacheProxy, optional): True for the shared
+                proxy, a proxy to use, or False to stop caching. Defaults to True.
+            **kwargs: Keyword arguments for the shared proxy, used when it is created.
+
+        Returns:
+            geogo.tilecache.TileCacheProxy or None: The proxy in use.
+        """
+        from .tilecache import get_tile_cache
+
+        if cache is True:
+            cache = get_tile_cache(**kwargs)
+        self._tile_cache = cache or None
+        return self._tile_cache
+
     def add_basemap(self, basemap="OpenStreetMap.Mapnik"):
         """Add basemap to the map.
 
@@ -19,7 +62,14 @@ class Map(ipyleaflet.Map):
             basemap (str, optional): Basemap name. Defaults to "Esri.WorldImagery".
         """
 
-        url = eval(f"ipyleaflet.basemaps.{basemap}").build_url()
+        provider = eval(f"ipyleaflet.basemaps.{basemap}")
+        if getattr(self, "_tile_cache", None) is not None:
+            url = self._tile_cache.tile_url(
+                provider.build_url(fill_subdomain=False),
+                subdomains=provider.get("subdomains", "abc"),
+            )
+        else:
+            url = provider.build_url()
         layer = ipyleaflet.TileLayer(url=url, name=basemap)
         self.add(layer)
 
@@ -29,6 +79,9 @@ class Map(ipyleaflet.Map):
         basin="north_atlantic",
         source="hurdat",
         zoom_to_layer=True,
+        single_layer=True,
+        weight=8,
+        snapshot=False,
     ):
         """Adds a storm track to the map using Tropycal.
         Args:
@@ -36,87 +89,502 @@ class Map(ipyleaflet.Map):
             basin (str, optional): The basin of the storm. Defaults to 'north_atlantic'.
             source (str, optional): The source of the storm data. Defaults to 'hurdat'.
             zoom_to_layer (bool, optional): Whether to zoom to the layer after adding it. Defaults to True.
+            single_layer (bool, optional): Whether to render the whole track as one GeoJSON layer
+                colored by category through a per-feature style. If False, one layer is added per
+                segment. Defaults to True.
+            weight (int, optional): Line width of the track. Defaults to 8.
+            snapshot (bool, optional): Whether to read the storm from the memory-mapped basin
+                snapshot instead of a tropycal TrackDataset. Defaults to False.
+
+        Returns:
+            ipyleaflet.GeoJSON or list: The track layer, or the list of segment layers when
+                single_layer is False.
         """
-        import tropycal.tracks as tracks
-        import geopandas as gpd
-        from shapely.geometry import Point, LineString
-        import pandas as pd
+        from .storms import get_storm, storm_track_geojson, track_bounds
 
-        category_colors = {
-            "TD": "#6baed6",
-            "TS": "#3182bd",
-            "C1": "#31a354",
-            "C2": "#addd8e",
-            "C3": "#fdae6b",
-            "C4": "#fd8d3c",
-            "C5": "#e31a1c",
-        }
-
-        def get_category(vmax):
-            if vmax < 39:
-                return "TD"
-            elif vmax < 74:
-                return "TS"
-            elif vmax < 96:
-                return "C1"
-            elif vmax < 111:
-                return "C2"
-            elif vmax < 130:
-                return "C3"
-            elif vmax < 157:
-                return "C4"
+        with phase("load"):
+            storm = get_storm(name_or_tuple, basin, source, snapshot=snapshot)
+
+        with phase("geometry"):
+            geojson = storm_track_geojson(storm.dict, weight=weight)
+        name = f"{str(storm.dict['name']).title()} {storm.dict['year']}"
+
+        with phase("sync"):
+            if single_layer:
+                layer = ipyleaflet.GeoJSON(data=geojson, name=name)
+                self.add(layer)
             else:
-                return "C5"
-
-        dataset = tracks.TrackDataset(basin=basin, source=source)
-        storm = dataset.get_storm(name_or_tuple)
-
-        df = pd.DataFrame(
-            {
-                "datetime": storm.dict["time"],
-                "lat": storm.dict["lat"],
-                "lon": storm.dict["lon"],
-                "vmax": storm.dict["vmax"],
-                "mslp": storm.dict["mslp"],
-                "type": storm.dict["type"],
-                "id": storm.dict["id"],
-                "name": storm.dict["name"],
-            }
-        )
+                layer = []
+                for feature in geojson["features"]:
+                    segment = ipyleaflet.GeoJSON(data=feature, name=name)
+                    self.add(segment)
+                    layer.append(segment)
 
-        df["category"] = df["vmax"].apply(get_category)
-        df["color"] = df["category"].map(category_colors)
-        df["geometry"] = [Point(xy) for xy in zip(df.lon, df.lat)]
-        gdf_points = gpd.GeoDataFrame(df, crs="EPSG:4326")
+        if zoom_to_layer:
+            self.fit_bounds(track_bounds(storm.dict["lon"], storm.dict["lat"]))
 
-        segments = []
-        for i in range(len(gdf_points) - 1):
-            seg = LineString(
-                [gdf_points.geometry.iloc[i], gdf_points.geometry.iloc[i + 1]]
-            )
-            color = gdf_points.color.iloc[i]
-            segments.append({"geometry": seg, "color": color})
-
-        gdf_line = gpd.GeoDataFrame(segments, crs="EPSG:4326")
-        for _, row in gdf_line.iterrows():
-            self.add_gdf(
-                gpd.GeoDataFrame([row], crs="EPSG:4326"),
-                style={"color": row["color"], "weight": 3, "weight": 8},
-                zoom_to_layer=False,
+        return layer
+
+    def add_storm_playback(
+        self,
+        name_or_tuple,
+        basin="north_atlantic",
+        source="hurdat",
+        snapshot=False,
+        weight=8,
+        interval=200,
+        zoom_to_layer=True,
+        position="topright",
+    ):
+        """Adds a storm track that can be replayed over time.
+
+        A play control and slider step through the storm's observations. The
+        track is a fixed set of segment lines, and the current position is a
+        marker colored by intensity. All frames are computed up front. A step
+        fills in or clears only the segments between the previous frame and
+        the new one, so playing forward sends one segment per frame and the
+        frame cost does not grow with the track length.
+
+        Args:
+            name_or_tuple (str or tuple): The storm ID, or a tuple with the storm name and year.
+            basin (str, optional): The basin of the storm. Defaults to 'north_atlantic'.
+            source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+            snapshot (bool, optional): Whether to read the storm from the basin snapshot. Defaults to False.
+            weight (int, optional): Line width of the track. Defaults to 8.
+            interval (int, optional): Milliseconds between frames during playback. Defaults to 200.
+            zoom_to_layer (bool, optional): Whether to zoom to the whole track. Defaults to True.
+            position (str, optional): The position of the controls on the map. Defaults to 'topright'.
+
+        Returns:
+            ipyleaflet.LayerGroup: The track, a layer group of segment lines, and the
+                marker. Its ``playback`` attribute holds the geogo.storms.StormPlayback
+                frames and ``slider`` the frame slider.
+        """
+        import ipywidgets as widgets
+        from ipyleaflet import WidgetControl
+        from .storms import StormPlayback, get_storm
+
+        with phase("load"):
+            storm = get_storm(name_or_tuple, basin, source, snapshot=snapshot)
+        with phase("geometry"):
+            playback = StormPlayback(storm.dict, weight=weight)
+        name = f"{str(storm.dict['name']).title()} {storm.dict['year']}"
+
+        lines = [
+            ipyleaflet.Polyline(
+                locations=[], color=color, weight=playback.weight, opacity=1
             )
+            for color in playback.segment_colors
+        ]
+        track = ipyleaflet.LayerGroup(layers=lines, name="Track")
+        marker = ipyleaflet.CircleMarker(
+            location=playback.locations[0],
+            radius=playback.radii[0],
+            color="black",
+            weight=1,
+            fill_color=playback.colors[0],
+            fill_opacity=0.9,
+            name="Position",
+        )
+        group = ipyleaflet.LayerGroup(layers=[track, marker], name=name)
+        self.add(group)
 
+        play = widgets.Play(
+            min=0, max=len(playback) - 1, interval=interval, layout={"width": "80px"}
+        )
+        slider = widgets.IntSlider(
+            min=0, max=len(playback) - 1, readout=False, layout={"width": "200px"}
+        )
+        widgets.jslink((play, "value"), (slider, "value"))
+        label = widgets.HTML(playback.labels[0])
+
+        def show_frame(change):
+            i = change["new"]
+            for j, locations in playback.changed_segments(change["old"], i):
+                lines[j].locations = locations
+            marker.location = playback.locations[i]
+            marker.radius = playback.radii[i]
+            marker.fill_color = playback.colors[i]
+            label.value = playback.labels[i]
+
+        slider.observe(show_frame, names="value")
+        controls = widgets.VBox([widgets.HBox([play, slider]), label])
+        self.add(WidgetControl(widget=controls, position=position))
+
+        group.playback = playback
+        group.slider = slider
         if zoom_to_layer:
+            self.fit_bounds(playback.bounds)
+        return group
+
+    def add_storms(
+        self,
+        season=None,
+        storms=None,
+        filter=None,
+        basin="north_atlantic",
+        source="hurdat",
+        snapshot=False,
+        weight=3,
+        zoom_to_layer=True,
+        name="Storms",
+    ):
+        """Adds the tracks of many storms to the map at once.
+
+        All observations are classified in one pass and the tracks are grouped
+        by category, so the map gets one layer group holding at most one GeoJSON
+        layer per category no matter how many storms are selected.
+
+        Args:
+            season (int or tuple, optional): A season or (start, end) range of seasons. Defaults to None.
+            storms (list, optional): Storm IDs or (name, year) tuples. Defaults to None.
+            filter (dict or callable, optional): Keyword arguments for geogo.storms.StormCatalog.filter,
+                or a function that takes the catalogue DataFrame and returns a boolean mask.
+                Defaults to None.
+            basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+            source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+            snapshot (bool, optional): Whether to read storms from the basin snapshot. Defaults to False.
+            weight (int, optional): Line width of the tracks. Defaults to 3.
+            zoom_to_layer (bool, optional): Whether to zoom to the tracks. Defaults to True.
+            name (str, optional): Name of the layer group. Defaults to "Storms".
+
+        Returns:
+            ipyleaflet.LayerGroup: The track layers, one per category.
+        """
+        import numpy as np
+        import pandas as pd
+        from .storms import StormCatalog, get_storm_catalog, get_storm_columns
+        from .storms import storms_geojson
+
+        catalog = get_storm_catalog(basin, source, snapshot=snapshot)
+        if season is not None:
+            catalog = catalog.filter(years=season)
+        if storms is not None:
+            catalog = catalog.select(storms)
+        if callable(filter):
+            catalog = StormCatalog(catalog.df[np.asarray(filter(catalog.df))])
+        elif filter is not None:
+            catalog = catalog.filter(**filter)
+
+        columns = get_storm_columns(basin, source, snapshot=snapshot)
+        positions = np.sort(pd.Index(columns["ids"]).get_indexer(catalog.df.index))
+        collections = storms_geojson(columns, positions, weight=weight)
+
+        layers = [
+            ipyleaflet.GeoJSON(data=geojson, name=category)
+            for category, geojson in collections.items()
+        ]
+        group = ipyleaflet.LayerGroup(layers=layers, name=name)
+        self.add(group)
+
+        if zoom_to_layer and len(catalog):
+            df = catalog.df
             self.fit_bounds(
-                gdf_points.total_bounds[[1, 0, 3, 2]].reshape(2, 2).tolist()
+                [
+                    [float(df["min_lat"].min()), float(df["min_lon"].min())],
+                    [float(df["max_lat"].max()), float(df["max_lon"].max())],
+                ]
+            )
+
+        return group
+
+    def add_storms_near(
+        self,
+        point,
+        radius_km=150,
+        start=None,
+        end=None,
+        basin="north_atlantic",
+        source="hurdat",
+        snapshot=False,
+        **kwargs,
+    ):
+        """Adds the tracks of the storms that passed near a point.
+
+        Args:
+            point (tuple or shapely.geometry.Point): The (lon, lat) location.
+            radius_km (float, optional): The search radius in kilometres. Defaults to 150.
+            start (str or datetime, optional): Start of the time window. Defaults to None.
+            end (str or datetime, optional): End of the time window. Defaults to None.
+            basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+            source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+            snapshot (bool, optional): Whether to read storms from the basin snapshot. Defaults to False.
+            **kwargs: Additional keyword arguments for add_storms.
+
+        Returns:
+            ipyleaflet.LayerGroup: The track layers, one per category.
+        """
+        from .analysis import get_storm_index
+
+        index = get_storm_index(basin, source, snapshot=snapshot)
+        storms = index.storms_near(point, radius_km, start=start, end=end)
+        return self.add_storms(
+            storms=storms, basin=basin, source=source, snapshot=snapshot, **kwargs
+        )
+
+    def add_storms_intersecting(
+        self,
+        geometry,
+        start=None,
+        end=None,
+        basin="north_atlantic",
+        source="hurdat",
+        snapshot=False,
+        **kwargs,
+    ):
+        """Adds the tracks of the storms that crossed a region.
+
+        Args:
+            geometry (shapely geometry, geopandas.GeoSeries or geopandas.GeoDataFrame): The region.
+            start (str or datetime, optional): Start of the time window. Defaults to None.
+            end (str or datetime, optional): End of the time window. Defaults to None.
+            basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+            source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+            snapshot (bool, optional): Whether to read storms from the basin snapshot. Defaults to False.
+            **kwargs: Additional keyword arguments for add_storms.
+
+        Returns:
+            ipyleaflet.LayerGroup: The track layers, one per category.
+        """
+        from .analysis import get_storm_index
+
+        index = get_storm_index(basin, source, snapshot=snapshot)
+        storms = index.storms_intersecting(geometry, start=start, end=end)
+        return self.add_storms(
+            storms=storms, basin=basin, source=source, snapshot=snapshot, **kwargs
+        )
+
+    def add_storm_exposure(
+        self,
+        polygons,
+        storms=None,
+        basin="north_atlantic",
+        source="hurdat",
+        snapshot=False,
+        radius_km=None,
+        color=True,
+        max_workers=None,
+        **kwargs,
+    ):
+        """Computes which polygons were exposed to storms and optionally maps them.
+
+        Args:
+            polygons (geopandas.GeoDataFrame): The polygons to test, such as counties or parcels.
+            storms (list, optional): Storm IDs or (name, year) tuples. Defaults to every storm in the basin.
+            basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+            source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+            snapshot (bool, optional): Whether to read storms from the basin snapshot. Defaults to False.
+            radius_km (float, optional): A fixed swath radius. Defaults to radii by category.
+            color (bool, optional): Whether to add the polygons colored by the highest category
+                they were exposed to. Defaults to True.
+            max_workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+            **kwargs: Additional keyword arguments for the GeoJSON layer.
+
+        Returns:
+            pandas.DataFrame: The per-polygon, per-storm exposure table.
+        """
+        import numpy as np
+        from .analysis import storm_exposure
+        from .storms import CATEGORIES, CATEGORY_COLORS
+
+        # Polygons are matched by position, as index labels may repeat.
+        table = storm_exposure(
+            polygons.reset_index(drop=True),
+            storms=storms,
+            basin=basin,
+            source=source,
+            snapshot=snapshot,
+            radius_km=radius_km,
+            max_workers=max_workers,
+        )
+
+        if color:
+            levels = table["category"].map(CATEGORIES.index)
+            worst = levels.groupby(table["polygon"]).max()
+            exposure = worst.reindex(range(len(polygons)))
+            gdf = polygons.copy()
+            categories = [
+                None if np.isnan(level) else CATEGORIES[int(level)]
+                for level in exposure
+            ]
+            gdf["exposure"] = categories
+            gdf["style"] = [
+                (
+                    {"color": "#999999", "weight": 1, "fillOpacity": 0.05}
+                    if category is None
+                    else {
+                        "color": CATEGORY_COLORS[category],
+                        "fillColor": CATEGORY_COLORS[category],
+                        "weight": 1,
+                        "fillOpacity": 0.6,
+                    }
+                )
+                for category in categories
+            ]
+            kwargs.setdefault("zoom_to_layer", False)
+            self.add_gdf(gdf, **kwargs)
+
+        table["polygon"] = polygons.index.to_numpy()[table["polygon"].to_numpy()]
+        return table
+
+    def add_storm_density(
+        self,
+        years=None,
+        resolution=1.0,
+        weight=None,
+        basin="north_atlantic",
+        source="hurdat",
+        snapshot=False,
+        cmap="YlOrRd",
+        opacity=0.7,
+        name="Track density",
+        filename=None,
+        **kwargs,
+    ):
+        """Adds a climatology of storm track density as a single raster overlay.
+
+        Args:
+            years (int or tuple, optional): A season or (start, end) range of seasons. Defaults to all.
+            resolution (float, optional): Cell size in degrees. Defaults to 1.0.
+            weight (str, optional): None to count observations, "vmax" to weight them by maximum
+                wind, or "hours" to weight them by time step. Defaults to None.
+            basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+            source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+            snapshot (bool, optional): Whether to read storms from the basin snapshot. Defaults to False.
+            cmap (str, optional): Matplotlib colormap name. Defaults to "YlOrRd".
+            opacity (float, optional): Opacity of the overlay. Defaults to 0.7.
+            name (str, optional): Name of the layer. Defaults to "Track density".
+            filename (str, optional): If given, the grid is written to this GeoTIFF and added
+                with add_raster instead of as an image overlay. Defaults to None.
+            **kwargs: Additional keyword arguments for the ipyleaflet.ImageOverlay layer, or
+                for add_raster when filename is given.
+
+        Returns:
+            ipyleaflet.ImageOverlay: The overlay, or None when filename is given.
+        """
+        import base64
+        from .analysis import track_density
+        from .common import array_to_png
+
+        grid, bounds = track_density(
+            basin,
+            source,
+            years=years,
+            resolution=resolution,
+            weight=weight,
+            snapshot=snapshot,
+        )
+
+        if filename is not None:
+            import rasterio
+            from rasterio.transform import from_bounds
+
+            (south, west), (north, east) = bounds
+            with rasterio.open(
+                filename,
+                "w",
+                driver="GTiff",
+                height=grid.shape[0],
+                width=grid.shape[1],
+                count=1,
+                dtype="float32",
+                crs="EPSG:4326",
+                transform=from_bounds(
+                    west, south, east, north, grid.shape[1], grid.shape[0]
+                ),
+                nodata=0,
+            ) as dst:
+                dst.write(grid.astype("float32"), 1)
+            kwargs.setdefault("colormap", cmap.lower())
+            self.add_raster(filename, name=name, opacity=opacity, **kwargs)
+            return None
+
+        png = array_to_png(grid, bounds, cmap=cmap)
+        url = "data:image/png;base64," + base64.b64encode(png).decode()
+        overlay = ipyleaflet.ImageOverlay(
+            url=url, bounds=bounds, opacity=opacity, name=name, **kwargs
+        )
+        self.add(overlay)
+        return overlay
+
+    def add_storm_swath(
+        self,
+        name_or_tuple,
+        filename=None,
+        basin="north_atlantic",
+        source="hurdat",
+        snapshot=False,
+        resolution_km=1.0,
+        radius_km=None,
+        colormap="ylorrd",
+        **kwargs,
+    ):
+        """Adds the maximum wind swath of a storm as a raster layer.
+
+        The swath is written to a Cloud-Optimized GeoTIFF with
+        geogo.analysis.storm_wind_swath and displayed with add_raster.
+
+        Args:
+            name_or_tuple (str or tuple): The storm ID, or a tuple with the storm name and year.
+            filename (str, optional): The output GeoTIFF path. Defaults to a file in the
+                temporary directory named after the storm.
+            basin (str, optional): The basin of the storm. Defaults to 'north_atlantic'.
+            source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+            snapshot (bool, optional): Whether to read the storm from the basin snapshot. Defaults to False.
+            resolution_km (float, optional): Approximate cell size. Defaults to 1.0.
+            radius_km (float, optional): A fixed wind radius. Defaults to radii by category.
+            colormap (str, optional): Colormap for the tile layer. Defaults to "ylorrd".
+            **kwargs: Additional keyword arguments for add_raster.
+
+        Returns:
+            str: The GeoTIFF path.
+        """
+        import os
+        import tempfile
+        from .analysis import storm_wind_swath
+
+        if filename is None:
+            label = (
+                name_or_tuple
+                if isinstance(name_or_tuple, str)
+                else "_".join(str(part) for part in name_or_tuple)
             )
+            filename = os.path.join(tempfile.gettempdir(), f"{label}_swath.tif")
+
+        storm_wind_swath(
+            name_or_tuple,
+            filename,
+            basin=basin,
+            source=source,
+            snapshot=snapshot,
+            resolution_km=resolution_km,
+            radius_km=radius_km,
+        )
+        kwargs.setdefault("nodata", 0)
+        self.add_raster(filename, colormap=colormap, **kwargs)
+        return filename
 
-    def get_storm_options(self, basin="north_atlantic", source="hurdat"):
-        from tropycal import tracks
+    def get_storm_options(
+        self, basin="north_atlantic", source="hurdat", snapshot=False, **kwargs
+    ):
+        """Returns the storms of a basin from the storm catalogue.
 
-        dataset = tracks.TrackDataset(basin=basin, source=source)
-        storms = dataset.keys
-        years = [dataset.get_storm(storm).season for storm in storms]
-        return list(zip(storms, years))
+        Args:
+            basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+            source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+            snapshot (bool, optional): Whether to read the catalogue from the basin snapshot. Defaults to False.
+            **kwargs: Filters passed to geogo.storms.StormCatalog.filter, such as years,
+                name_prefix or min_category.
+
+        Returns:
+            list: (storm id, season) tuples.
+        """
+        from .storms import get_storm_catalog
+
+        catalog = get_storm_catalog(basin, source, snapshot=snapshot)
+        if kwargs:
+            catalog = catalog.filter(**kwargs)
+        return catalog.options()
 
     def add_storm_wg(
         self,
@@ -125,6 +593,11 @@ class Map(ipyleaflet.Map):
         source="hurdat",
         position="topright",
         legend=True,
+        years=(2005, None),
+        name_prefix=None,
+        min_category="C1",
+        snapshot=False,
+        prefetch=2,
     ):
         """Adds a storm widget to the map.
         Args:
@@ -134,10 +607,21 @@ class Map(ipyleaflet.Map):
             source (str): The source of the storm data. Defaults to 'hurdat'.
             position (str): The position of the widget on the map. Defaults to 'topright'.
             legend (bool): Whether to show a legend. Defaults to True.
+            years (int or tuple, optional): The season or (start, end) seasons listed in the
+                dropdown. Defaults to (2005, None).
+            name_prefix (str, optional): Only list storms whose name starts with this prefix.
+                Defaults to None.
+            min_category (str, optional): Only list storms that reached this category.
+                Defaults to "C1".
+            snapshot (bool, optional): Whether to read storms from the basin snapshot. Defaults to False.
+            prefetch (int, optional): Number of dropdown entries on each side of the selection to
+                prepare in the background. Defaults to 2.
         """
+        import threading
+        import warnings
         import ipywidgets as widgets
-        import tropycal.tracks as tracks
         from ipyleaflet import WidgetControl
+        from .storms import TrackPrefetcher, get_storm_catalog
 
         if options is None:
             options = ["OpenStreetMap.Mapnik", "OpenTopoMap", "Esri.WorldImagery"]
@@ -149,36 +633,19 @@ class Map(ipyleaflet.Map):
             layout=widgets.Layout(width="38px", height="38px"),
         )
 
-        storm_list = [
-            ("Wilma", 2005),
-            ("Katrina", 2005),
-            ("Rita", 2005),
-            ("Sandy", 2012),
-            ("Hermine", 2016),
-            ("Matthew", 2016),
-            ("Otto", 2016),
-            ("Nate", 2017),
-            ("Harvey", 2017),
-            ("Irma", 2017),
-            ("Michael", 2018),
-            ("Dorian", 2019),
-            ("Lorenzo", 2019),
-            ("Laura", 2020),
-            ("Ida", 2021),
-            ("Ian", 2022),
-            ("Nicole", 2022),
-            ("Lee", 2023),
-            ("Ophelia", 2023),
-            ("Franklin", 2023),
-            ("Elsa", 2021),
-            ("Fiona", 2022),
-            ("Sally", 2020),
-            ("Teddy", 2020),
-            ("Zeta", 2020),
-            ("Helene", 2024),
+        catalog = get_storm_catalog(basin, source, snapshot=snapshot).filter(
+            years=years,
+            name_prefix=name_prefix,
+            min_category=min_category,
+            named_only=True,
+        )
+        storm_options = [
+            (f"{name.title()} ({season})", storm_id)
+            for storm_id, name, season in zip(
+                catalog.df.index, catalog.df["name"], catalog.df["season"]
+            )
         ]
-        storm_options = [(f"{s[0]} ({s[1]})", (s[0].lower(), s[1])) for s in storm_list]
-        default_value = storm_options[0][1]
+        default_value = storm_options[0][1] if storm_options else None
 
         storm_dropdown = widgets.Dropdown(
             options=storm_options,
@@ -188,20 +655,47 @@ class Map(ipyleaflet.Map):
             layout=widgets.Layout(width="250px", height="38px"),
         )
 
-        self._storm_dataset = tracks.TrackDataset(basin=basin, source=source)
+        self._storm_catalog = catalog
         self._current_storm = None
+        self._storm_prefetcher = TrackPrefetcher(basin, source, snapshot=snapshot)
+        self._storm_layer = ipyleaflet.GeoJSON(
+            data={"type": "FeatureCollection", "features": []}, name="Storm track"
+        )
+        storm_ids = [value for _, value in storm_options]
+
+        def neighbours(storm_id):
+            i = storm_ids.index(storm_id)
+            return storm_ids[max(i - prefetch, 0) : i + prefetch + 1]
+
+        def show_storm(storm_id, future):
+            if future.cancelled() or self._current_storm != storm_id:
+                return
+            try:
+                geojson, bounds = future.result()
+            except Exception as e:
+                warnings.warn(f"Could not load storm {storm_id}: {e}")
+                return
+            self._storm_layer.data = geojson
+            if self._storm_layer not in self.layers:
+                self.add(self._storm_layer)
+            if threading.current_thread() is threading.main_thread():
+                self.fit_bounds(bounds)
+
+        storm_ready = self._on_kernel_loop(show_storm)
 
         def on_storm_change(change):
             if change["type"] == "change" and change["name"] == "value":
-                storm_name, storm_year = change["new"]
-                self.layers = self.layers[:3]
-                if hasattr(self, "_storm_layer") and self._storm_layer in self.layers:
-                    self.remove_layer(self._storm_layer)
-                self._storm_layer = self.add_tropycal_storm(
-                    (storm_name, storm_year), basin=basin, source=source
-                )
+                storm_id = change["new"]
+                self._current_storm = storm_id
+                nearby = neighbours(storm_id)
+                self._storm_prefetcher.cancel(keep=nearby)
+                future = self._storm_prefetcher.submit(storm_id)
+                future.add_done_callback(lambda f: storm_ready(storm_id, f))
+                self._storm_prefetcher.prefetch(nearby)
 
         storm_dropdown.observe(on_storm_change, names="value")
+        if default_value is not None:
+            self._storm_prefetcher.prefetch(neighbours(default_value))
 
         controls_box = widgets.VBox([storm_dropdown])
         controls_box.layout.display = "flex" if widget_toggle.value else "none"
@@ -273,13 +767,18 @@ class Map(ipyleaflet.Map):
             url (str): The WMS service URL.
             layers (str): The layers to display.
             **kwargs: Additional keyword arguments for the ipyleaflet.WMSLayer layer.
+
+        Returns:
+            ipyleaflet.WMSLayer: The WMS layer.
         """
-        from ipywidgets import DatePicker, Layout
-        from datetime import date
+        if getattr(self, "_tile_cache", None) is not None:
+            url = self._tile_cache.wms_url(url)
 
-        layers = ipyleaflet.WMSLayer(
+        layer = ipyleaflet.WMSLayer(
             url=url, layers=layers, format=format, transparent=transparent, **kwargs
         )
+        self.add(layer)
+        return layer
 
     def add_time_wms_layer(
         self,
@@ -293,8 +792,19 @@ class Map(ipyleaflet.Map):
         legend=True,
         custom_legend=None,
         position="bottomleft",
+        end=None,
+        step_days=1,
+        prefetch=3,
+        max_frames=16,
+        interval=1000,
     ):
         """Adds a WMS layer with time control to the map.
+
+        Without end, a date picker switches the layer between dates. With end,
+        the layer plays back the dates from time to end: each date is shown as
+        one image of the current view, the next dates are fetched in the
+        background, and recent frames are kept so they show without new requests.
+
         Args:
             url (str): The WMS service URL. Defaults to "https://gibs.earthdata.nasa.gov/wms/epsg3857/best/wms.cgi".
             layers (str): The layers to display. Defaults to "MODIS_Aqua_L3_Land_Surface_Temp_Daily_Day".
@@ -306,38 +816,135 @@ class Map(ipyleaflet.Map):
             legend (bool): Whether to show a legend. Defaults to True.
             custom_legend (dict, optional): Custom legend items. Defaults to None.
             position (str): Position of the legend on the map. Defaults to "bottomleft".
+            end (str, optional): The last date of the playback. Defaults to None, which shows a date picker.
+            step_days (int, optional): Days between playback dates. Defaults to 1.
+            prefetch (int, optional): Number of upcoming dates to fetch ahead. Defaults to 3.
+            max_frames (int, optional): Number of frames to keep. Defaults to 16.
+            interval (int, optional): Milliseconds between frames during playback. Defaults to 1000.
+
+        Returns:
+            ipyleaflet.WMSLayer or ipyleaflet.ImageOverlay: The layer. During playback it is an
+                ImageOverlay whose ``frames`` attribute is the geogo.timeseries.WMSFramePrefetcher.
         """
+        import warnings
         from ipyleaflet import WMSLayer, WidgetControl
         import ipywidgets as widgets
         from datetime import date
 
-        time_url = f"{url}?TIME={time}"
+        tile_cache = getattr(self, "_tile_cache", None)
 
-        wms_layer = WMSLayer(
-            url=time_url,
-            layers=layers,
-            format=format,
-            transparent=transparent,
-            attribution=attribution,
-            name=name,
-        )
-        self.add_layer(wms_layer)
+        if end is not None:
+            from .timeseries import WMSFramePrefetcher, date_range
 
-        date_picker = widgets.DatePicker(
-            description="Select Date",
-            value=date.fromisoformat(time),
-            layout=widgets.Layout(width="200px"),
-        )
+            dates = date_range(time, end, step_days)
+            frames = WMSFramePrefetcher(
+                url,
+                layers,
+                format=format,
+                transparent=transparent,
+                max_frames=max_frames,
+                tile_cache=tile_cache,
+            )
+            wms_layer = ipyleaflet.ImageOverlay(
+                url="",
+                bounds=((-85, -180), (85, 180)),
+                attribution=attribution,
+                name=name,
+            )
+            wms_layer.frames = frames
+            self.add(wms_layer)
 
-        def update_time(change):
-            if change["new"]:
-                new_date = change["new"].isoformat()
-                wms_layer.url = f"{url}?TIME={new_date}"
+            play = widgets.Play(
+                min=0, max=len(dates) - 1, interval=interval, layout={"width": "80px"}
+            )
+            slider = widgets.SelectionSlider(
+                options=dates, description="Date", layout={"width": "280px"}
+            )
+            widgets.jslink((play, "value"), (slider, "index"))
+            previous_button = widgets.Button(
+                icon="step-backward", layout={"width": "38px"}
+            )
+            next_button = widgets.Button(icon="step-forward", layout={"width": "38px"})
+            previous_button.on_click(
+                lambda _: setattr(slider, "index", max(slider.index - 1, 0))
+            )
+            next_button.on_click(
+                lambda _: setattr(
+                    slider, "index", min(slider.index + 1, len(dates) - 1)
+                )
+            )
+
+            state = {"key": None}
+
+            def show_frame(key, bounds, future):
+                if future.cancelled() or state["key"] != key:
+                    return
+                try:
+                    frame = future.result()
+                except Exception as e:
+                    warnings.warn(f"Could not load {key[0]}: {e}")
+                    return
+                wms_layer.bounds = bounds
+                wms_layer.url = frame
+
+            frame_ready = self._on_kernel_loop(show_frame)
+
+            def update_frame(change=None):
+                bounds = self.bounds or ((-85, -180), (85, 180))
+                (x0, y0), (x1, y1) = self.pixel_bounds or ((0, 0), (1024, 512))
+                size = (min(max(x1 - x0, 1), 2048), min(max(y1 - y0, 1), 2048))
+                view = frames.view(bounds, size)
+
+                index = slider.index
+                ahead = [
+                    dates[(index + i) % len(dates)] for i in range(1, prefetch + 1)
+                ]
+                key = (dates[index], view)
+                state["key"] = key
+                ahead = [(date, view) for date in ahead]
+                frames.cancel(keep=[key] + ahead)
+                future = frames.submit(key)
+                future.add_done_callback(lambda f: frame_ready(key, bounds, f))
+                frames.prefetch(ahead)
+
+            slider.observe(update_frame, names="index")
+            self.observe(update_frame, names="bounds")
+            update_frame()
+
+            controls = widgets.VBox(
+                [widgets.HBox([previous_button, play, next_button]), slider]
+            )
+            self.add(WidgetControl(widget=controls, position="topright"))
+        else:
+            if tile_cache is not None:
+                url = tile_cache.wms_url(url)
+            time_url = f"{url}?TIME={time}"
+
+            wms_layer = WMSLayer(
+                url=time_url,
+                layers=layers,
+                format=format,
+                transparent=transparent,
+                attribution=attribution,
+                name=name,
+            )
+            self.add_layer(wms_layer)
+
+            date_picker = widgets.DatePicker(
+                description="Select Date",
+                value=date.fromisoformat(time),
+                layout=widgets.Layout(width="200px"),
+            )
+
+            def update_time(change):
+                if change["new"]:
+                    new_date = change["new"].isoformat()
+                    wms_layer.url = f"{url}?TIME={new_date}"
 
-        date_picker.observe(update_time, names="value")
+            date_picker.observe(update_time, names="value")
 
-        date_control = WidgetControl(widget=date_picker, position="topright")
-        self.add_control(date_control)
+            date_control = WidgetControl(widget=date_picker, position="topright")
+            self.add_control(date_control)
 
         if legend:
             built_in_legends = {
@@ -412,115 +1019,477 @@ class Map(ipyleaflet.Map):
     ):
         """Adds a GeoJSON layer to the map.
 
+        GeoJSON dictionaries are passed to the layer as is. When zooming, their
+        bounds come from a scan of the coordinates rather than a GeoDataFrame.
+
         Args:
             data (_type_): _file path, GeoDataFrame, or GeoJSON dictionary.
             zoom_to_layer (bool, optional): Zoom in to the layer on the map. Defaults to True.
             hover_style (dict, optional): Changes color when hover over place on map. Defaults to {"color": "yellow", "fillOpacity": 0.5}.
+
+        Returns:
+            ipyleaflet.GeoJSON: The GeoJSON layer.
         """
-        import json
+        from .common import geojson_bounds
 
         if isinstance(data, str):
-            gdf = gpd.read_file(data)
-            geojson = gdf.__geo_interface__
-        elif isinstance(data, dict):
-            geojson = data
-            gdf = gpd.GeoDataFrame.from_features(geojson["features"], crs="EPSG:4326")
-        layer = ipyleaflet.GeoJSON(data=geojson, hover_style=hover_style, **kwargs)
-        self.add_layer(layer)
+            with phase("load"):
+                data = gpd.read_file(data)
+        if isinstance(data, gpd.GeoDataFrame):
+            return self.add_gdf(
+                data, zoom_to_layer=zoom_to_layer, hover_style=hover_style, **kwargs
+            )
+
+        with phase("sync"):
+            layer = ipyleaflet.GeoJSON(data=data, hover_style=hover_style, **kwargs)
+            self.add_layer(layer)
 
         if zoom_to_layer:
-            bounds = gdf.total_bounds
-            self.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
+            bounds = geojson_bounds(data)
+            if bounds is not None:
+                self.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
+        return layer
 
-    def add_shp(self, data, **kwargs):
+    def add_shp(self, data, lazy=False, **kwargs):
         """Adds a shapefile to the map.
 
         Args:
             data (str): The file path to the shapefile.
+            lazy (bool, optional): Only load the features in the current view. See add_lazy_vector. Defaults to False.
             **kwargs: Additional keyword arguments for the GeoJSON layer.
+
+        Returns:
+            ipyleaflet.GeoJSON: The GeoJSON layer.
         """
+        if lazy:
+            return self.add_lazy_vector(data, **kwargs)
 
-        gdf = gpd.read_file(data)
-        gdf = gdf.to_crs(epsg=4326)
-        geojson = gdf.__geo_interface__
-        self.add_geojson(geojson, **kwargs)
+        with phase("load"):
+            gdf = gpd.read_file(data)
+        return self.add_gdf(gdf, **kwargs)
 
-    def add_gdf(self, gdf, **kwargs):
+    def add_gdf(
+        self,
+        gdf,
+        zoom_to_layer=True,
+        lod=False,
+        lod_levels=(3, 6, 9, 12),
+        precision=None,
+        **kwargs,
+    ):
         """Adds a GeoDataFrame to the map.
 
+        The frame is reprojected only when it is not already in EPSG:4326 and is
+        converted to GeoJSON once. A uniform style is written into the feature
+        properties of that copy, so the layer does not have to deep-copy the
+        data to apply it.
+
+        With lod, the layer shows geometries simplified for the map zoom and
+        swaps them as the zoom changes, until it is removed from the map.
+
         Args:
             gdf (geopandas.GeoDataFrame): The GeoDataFrame to add.
+            zoom_to_layer (bool, optional): Zoom in to the layer on the map. Defaults to True.
+            lod (bool, optional): Whether to show zoom-dependent simplified geometries. Defaults to False.
+            lod_levels (tuple, optional): The zoom levels with simplified geometries. Beyond the
+                last level the full geometries are shown. Defaults to (3, 6, 9, 12).
+            precision (int, optional): The number of decimals to keep in coordinates, which
+                shortens the data sent to the browser. Defaults to None, which keeps them all.
             **kwargs: Additional keyword arguments for the GeoJSON layer.
+
+        Returns:
+            ipyleaflet.GeoJSON: The GeoJSON layer. With lod, its ``lod`` attribute is the
+                geogo.vectors.LevelOfDetailCache of the layer.
         """
-        gdf = gdf.to_crs(epsg=4326)
-        geojson = gdf.__geo_interface__
-        self.add_geojson(geojson, **kwargs)
+        from .common import gdf_to_geojson
+
+        style = None
+        if "style_callback" not in kwargs:
+            style = kwargs.pop("style", None)
 
-    def add_vector(self, data, **kwargs):
+        if lod:
+            import threading
+            from .vectors import LevelOfDetailCache
+
+            cache = LevelOfDetailCache(
+                gdf, levels=lod_levels, style=style, precision=precision
+            )
+            layer = self.add_geojson(
+                cache.geojson(self.zoom), zoom_to_layer=False, **kwargs
+            )
+            layer.lod = cache
+
+            def update_level(change):
+                if cache.level(change["old"]) != cache.level(change["new"]):
+                    layer.data = cache.geojson(change["new"])
+
+            def detach(change):
+                if all(item is not layer for item in change["new"]):
+                    self.unobserve(update_level, names="zoom")
+                    self.unobserve(detach, names="layers")
+
+            self.observe(update_level, names="zoom")
+            self.observe(detach, names="layers")
+            threading.Thread(target=cache.precompute, daemon=True).start()
+        else:
+            geojson = gdf_to_geojson(gdf, style=style, precision=precision)
+            layer = self.add_geojson(geojson, zoom_to_layer=False, **kwargs)
+
+        if zoom_to_layer and len(gdf):
+            bounds = gdf.total_bounds
+            if gdf.crs is not None and not gdf.crs.equals("EPSG:4326"):
+                from pyproj import Transformer
+
+                with phase("reproject"):
+                    bounds = Transformer.from_crs(
+                        gdf.crs, "EPSG:4326", always_xy=True
+                    ).transform_bounds(*bounds)
+            self.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
+        return layer
+
+    def add_vector(self, data, lazy=False, **kwargs):
         """Adds vector data to the map.
 
         Args:
             data (str, geopandas.GeoDataFrame, or dict): The vector data. Can be a file path, GeoDataFrame, or GeoJSON dictionary.
+            lazy (bool, optional): Only load the features of a file that are in the current view.
+                See add_lazy_vector. Defaults to False.
             **kwargs: Additional keyword arguments for the GeoJSON layer.
 
+        Returns:
+            ipyleaflet.GeoJSON: The GeoJSON layer.
+
         Raises:
             ValueError: If the data type is invalid.
         """
 
         if isinstance(data, str):
-            gdf = gpd.read_file(data)
-            self.add_gdf(gdf, **kwargs)
+            if lazy:
+                return self.add_lazy_vector(data, **kwargs)
+            with phase("load"):
+                gdf = gpd.read_file(data)
+            return self.add_gdf(gdf, **kwargs)
         elif isinstance(data, gpd.GeoDataFrame):
-            self.add_gdf(data, **kwargs)
+            return self.add_gdf(data, **kwargs)
         elif isinstance(data, dict):
-            self.add_geojson(data, **kwargs)
+            return self.add_geojson(data, **kwargs)
         else:
             raise ValueError("Invalid data type")
 
+    def add_lazy_vector(
+        self,
+        data,
+        layer=None,
+        columns=None,
+        max_features=5000,
+        min_zoom=None,
+        debounce=0.25,
+        cache_size=256,
+        zoom_to_layer=True,
+        hover_style={"color": "yellow", "fillOpacity": 0.5},
+        style=None,
+        **kwargs,
+    ):
+        """Adds a vector file that is read as the map moves.
+
+        Only the features in the current view are read, tile by tile, with a
+        bounding-box filter that uses the file's spatial index. Recently read
+        tiles are cached and map moves are debounced.
+
+        Args:
+            data (str): The file path to the vector data.
+            layer (str or int, optional): The layer of the file to read. Defaults to the first layer.
+            columns (list, optional): The attribute columns to read. Defaults to all columns.
+            max_features (int, optional): The maximum number of features shown at once. Defaults to 5000.
+            min_zoom (int, optional): Below this zoom no features are shown. Defaults to None.
+            debounce (float, optional): Seconds to wait after the map stops moving. Defaults to 0.25.
+            cache_size (int, optional): The number of tiles of features to cache. Defaults to 256.
+            zoom_to_layer (bool, optional): Zoom in to the layer on the map. Defaults to True.
+            hover_style (dict, optional): Changes color when hover over place on map. Defaults to {"color": "yellow", "fillOpacity": 0.5}.
+            style (dict, optional): Style applied to every feature. Defaults to None.
+            **kwargs: Additional keyword arguments for the GeoJSON layer.
+
+        Returns:
+            ipyleaflet.GeoJSON: The GeoJSON layer. Its ``loader`` attribute is the
+                geogo.vectors.ViewportLoader that keeps it up to date.
+        """
+        from .vectors import VectorTileReader, ViewportLoader
+
+        reader = VectorTileReader(
+            data,
+            layer=layer,
+            columns=columns,
+            max_features=max_features,
+            cache_size=cache_size,
+        )
+        geo_layer = ipyleaflet.GeoJSON(
+            data={"type": "FeatureCollection", "features": []},
+            hover_style=hover_style,
+            **kwargs,
+        )
+        geo_layer.loader = ViewportLoader(
+            self,
+            reader,
+            geo_layer,
+            style=style,
+            min_zoom=min_zoom,
+            debounce=debounce,
+        )
+        self.add_layer(geo_layer)
+
+        bounds = reader.total_bounds
+        if zoom_to_layer and bounds is not None:
+            self.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
+        elif self.bounds:
+            geo_layer.loader.schedule()
+        return geo_layer
+
+    def add_vector_tiles(
+        self,
+        data,
+        layer_name="features",
+        style=None,
+        columns=None,
+        zoom_to_layer=True,
+        cache_size=512,
+        **kwargs,
+    ):
+        """Adds a large vector dataset as vector tiles served from localhost.
+
+        The data is sliced into Mapbox Vector Tiles on demand by a local
+        geogo.vectortiles.VectorTileServer, so the browser only holds the tiles
+        in view.
+
+        Args:
+            data (str or geopandas.GeoDataFrame): The file path to the vector data, or a GeoDataFrame.
+            layer_name (str, optional): The name of the layer in the tiles. Defaults to "features".
+            style (dict, optional): Leaflet style of the features. Defaults to a thin blue outline.
+            columns (list, optional): The attribute columns to include in the tiles. Defaults to all columns.
+            zoom_to_layer (bool, optional): Zoom in to the layer on the map. Defaults to True.
+            cache_size (int, optional): The number of encoded tiles the server keeps. Defaults to 512.
+            **kwargs: Additional keyword arguments for the ipyleaflet.VectorTileLayer layer.
+
+        Returns:
+            ipyleaflet.VectorTileLayer: The vector tile layer. Its ``server`` attribute is the
+                tile server, which can be stopped with ``layer.server.stop()``.
+        """
+        from .vectortiles import VectorTileServer
+
+        if isinstance(data, str):
+            with phase("load"):
+                data = gpd.read_file(data, columns=columns)
+        if style is None:
+            style = {"color": "#3388ff", "weight": 1, "fill": True, "fillOpacity": 0.2}
+
+        server = VectorTileServer(
+            data, layer_name=layer_name, columns=columns, cache_size=cache_size
+        ).start()
+        kwargs.setdefault("name", layer_name)
+        layer = ipyleaflet.VectorTileLayer(
+            url=server.tile_url, layer_styles={layer_name: style}, **kwargs
+        )
+        layer.server = server
+        self.add(layer)
+
+        if zoom_to_layer and server.bounds is not None:
+            bounds = server.bounds
+            self.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
+        return layer
+
     def add_layer_control(self):
         """Adds a layer control widget to the map."""
         control = ipyleaflet.LayersControl(position="topright")
         self.add_control(control)
 
-    def add_raster(self, filepath, **kwargs):
+    def add_raster(self, filepath, overviews="warn", zoom_to_layer=True, **kwargs):
         """Adds a raster layer to the map.
+
+        Tile clients come from the shared geogo.rasters.TileClientPool, so a
+        raster shown in several layers is opened once. A client is released
+        when its last layer is removed from the map.
+
         Args:
             filepath (str): The file path to the raster file.
+            overviews (str, optional): What to do when a large raster has no overviews: "warn",
+                "build" or None. Defaults to "warn".
+            zoom_to_layer (bool, optional): Whether to zoom to the raster. Defaults to True.
             **kwargs: Additional keyword arguments for the ipyleaflet.TileLayer layer.
+
+        Returns:
+            ipyleaflet.TileLayer: The raster layer.
         """
-        from localtileserver import TileClient, get_leaflet_tile_layer
+        from .rasters import check_overviews, get_tile_client_pool
 
-        client = TileClient(filepath)
-        tile_layer = get_leaflet_tile_layer(client, **kwargs)
+        check_overviews(filepath, overviews)
+        client = get_tile_client_pool().acquire(filepath)
+        tile_layer = self._add_raster_layer(filepath, client, **kwargs)
 
-        self.add(tile_layer)
-        self.center = client.center()
-        self.zoom = client.default_zoom
+        if zoom_to_layer:
+            self.center = client.center()
+            self.zoom = client.default_zoom
+        return tile_layer
+
+    def add_rasters(
+        self, filepaths, overviews="warn", zoom_to_layer=True, max_workers=4, **kwargs
+    ):
+        """Adds several raster layers to the map, opening the files concurrently.
+
+        Args:
+            filepaths (list): The file paths to the raster files.
+            overviews (str, optional): What to do when a large raster has no overviews: "warn",
+                "build" or None. Defaults to "warn".
+            zoom_to_layer (bool, optional): Whether to zoom to the rasters. Defaults to True.
+            max_workers (int, optional): Number of files opened at once. Defaults to 4.
+            **kwargs: Additional keyword arguments for the ipyleaflet.TileLayer layers.
+
+        Returns:
+            list: The raster layers, in the order of filepaths.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from .rasters import check_overviews, get_tile_client_pool
+
+        pool = get_tile_client_pool()
+
+        def open_raster(filepath):
+            check_overviews(filepath, overviews)
+            return pool.acquire(filepath)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            clients = list(executor.map(open_raster, filepaths))
 
-    def add_image(self, image, bounds=None, **kwargs):
+        layers = [
+            self._add_raster_layer(filepath, client, **kwargs)
+            for filepath, client in zip(filepaths, clients)
+        ]
+
+        if zoom_to_layer and clients:
+            bounds = [client.bounds() for client in clients]
+            self.fit_bounds(
+                [
+                    [min(b[0] for b in bounds), min(b[2] for b in bounds)],
+                    [max(b[1] for b in bounds), max(b[3] for b in bounds)],
+                ]
+            )
+        return layers
+
+    def _add_raster_layer(self, filepath, client, **kwargs):
+        from localtileserver import get_leaflet_tile_layer
+
+        tile_layer = get_leaflet_tile_layer(client, **kwargs)
+        tile_layer.raster_source = filepath
+        tile_layer.raster_options = kwargs
+        tile_layer.raster_held = True
+        if not getattr(self, "_tracks_rasters", False):
+            self.observe(self._track_rasters, names="layers")
+            self._tracks_rasters = True
+        self.add(tile_layer)
+        return tile_layer
+
+    def _track_rasters(self, change):
+        from .rasters import get_tile_client_pool
+
+        pool = get_tile_client_pool()
+        old = set(map(id, change["old"]))
+        new = set(map(id, change["new"]))
+        for layer in change["old"]:
+            if id(layer) not in new and getattr(layer, "raster_held", False):
+                pool.release(layer.raster_source)
+                layer.raster_held = False
+        for layer in change["new"]:
+            if id(layer) in old or not hasattr(layer, "raster_held"):
+                continue
+            if not layer.raster_held:
+                # A layer added back holds the raster again, as its client may
+                # have been shut down when it was removed.
+                client = pool.acquire(layer.raster_source)
+                if client.server_port != layer.tile_server.server_port:
+                    from localtileserver import get_leaflet_tile_layer
+
+                    layer.url = get_leaflet_tile_layer(
+                        client, **layer.raster_options
+                    ).url
+                layer.tile_server = client
+                layer.raster_held = True
+
+    def add_image(self, image, bounds=None, tiled=None, tile_threshold=4096, **kwargs):
         """Adds an image to the map.
 
+        Local files are served by the shared geogo.media.MediaServer. Large
+        local images are cut into tiles from a downsampled pyramid that is
+        built on disk with windowed reads, so the overlay loads progressively
+        and the image is never decoded in memory as a whole.
+
         Args:
-            image (str): The file path to the image.
+            image (str): The file path or URL of the image.
             bounds (list, optional): The bounds for the image. Defaults to None.
-            **kwargs: Additional keyword arguments for the ipyleaflet.ImageOverlay layer.
+            tiled (bool, optional): Whether to show a local image as tiles. Defaults to None,
+                which tiles images larger than tile_threshold pixels on either side and
+                serves images that cannot be read as rasters, such as SVG, untiled.
+            tile_threshold (int, optional): The size above which images are tiled. Defaults to 4096.
+            **kwargs: Additional keyword arguments for the ipyleaflet.ImageOverlay layer,
+                or for the ipyleaflet.TileLayer layer when the image is tiled.
+
+        Returns:
+            ipyleaflet.ImageOverlay or ipyleaflet.TileLayer: The image layer.
         """
+        import os
 
         if bounds is None:
             bounds = [[-90, -180], [90, 180]]
-        overlay = ipyleaflet.ImageOverlay(url=image, bounds=bounds, **kwargs)
-        self.add(overlay)
+        if not os.path.isfile(image):
+            overlay = ipyleaflet.ImageOverlay(url=image, bounds=bounds, **kwargs)
+            self.add(overlay)
+            return overlay
+
+        from .media import ImagePyramid, get_media_server, image_size
+
+        server = get_media_server()
+        if tiled is None:
+            try:
+                tiled = max(image_size(image)) > tile_threshold
+            except OSError:
+                # Formats that GDAL cannot read, such as SVG, are served as they are.
+                tiled = False
+        if not tiled:
+            overlay = ipyleaflet.ImageOverlay(
+                url=server.file_url(image), bounds=bounds, **kwargs
+            )
+            self.add(overlay)
+            return overlay
+
+        pyramid = ImagePyramid(image, bounds)
+        kwargs.setdefault("name", os.path.basename(image))
+        kwargs.setdefault("max_native_zoom", pyramid.max_zoom)
+        kwargs.setdefault("max_zoom", max(pyramid.max_zoom, 22))
+        layer = ipyleaflet.TileLayer(
+            url=server.tile_url(pyramid), bounds=bounds, **kwargs
+        )
+        layer.pyramid = pyramid
+        self.add(layer)
+        return layer
 
     def add_video(self, video, bounds=None, **kwargs):
         """Adds a video to the map.
 
+        Local files are served by the shared geogo.media.MediaServer, which
+        answers range requests so the browser streams and seeks the video.
+
         Args:
-            video (str): The file path to the video.
+            video (str): The file path or URL of the video.
             bounds (list, optional): The bounds for the video. Defaults to None.
             **kwargs: Additional keyword arguments for the ipyleaflet.VideoOverlay layer.
+
+        Returns:
+            ipyleaflet.VideoOverlay: The video layer.
         """
+        import os
 
         if bounds is None:
             bounds = [[-90, -180], [90, 180]]
+        if os.path.isfile(video):
+            from .media import get_media_server
+
+            video = get_media_server().file_url(video)
         overlay = ipyleaflet.VideoOverlay(url=video, bounds=bounds, **kwargs)
         self.add(overlay)
+        return overlay
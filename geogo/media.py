@@ -0,0 +1,427 @@
+"""The media module serves local images and videos to map overlays from localhost."""
+
+import contextlib
+import hashlib
+import io
+import math
+import mimetypes
+import mmap
+import os
+import re
+import threading
+import warnings
+from collections import OrderedDict
+
+from .server import LocalServer
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def parse_range(header, size):
+    """Parses an HTTP Range header.
+
+    Only single byte ranges are supported. Other ranges are ignored, so the
+    whole file is sent.
+
+    Args:
+        header (str): The value of the Range header, e.g. "bytes=0-1023".
+        size (int): The size of the file.
+
+    Returns:
+        tuple or None: The first and last byte of the range, or None to send the whole file.
+
+    Raises:
+        ValueError: If the range lies outside the file.
+    """
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header or "")
+    if match is None or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        length = int(end)
+        if length == 0:
+            raise ValueError("Empty suffix range.")
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = size - 1 if end == "" else min(int(end), size - 1)
+    if start >= size or start > end:
+        raise ValueError(f"Range {header} is outside the file.")
+    return start, end
+
+
+def default_image_cache_dir():
+    """Returns the directory that holds image pyramids.
+
+    The location can be overridden with the GEOGO_CACHE_DIR environment variable.
+
+    Returns:
+        str: The image pyramid directory.
+    """
+    root = os.environ.get("GEOGO_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "geogo"
+    )
+    return os.path.join(root, "images")
+
+
+@contextlib.contextmanager
+def _open_image(path, mode="r", **profile):
+    import rasterio
+    from rasterio.errors import NotGeoreferencedWarning
+
+    # Plain images have no georeferencing, which is expected here.
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", NotGeoreferencedWarning)
+        with rasterio.open(path, mode, **profile) as ds:
+            yield ds
+
+
+def image_size(path):
+    """Returns the size of an image without decoding its pixels.
+
+    Args:
+        path (str): The image file.
+
+    Returns:
+        tuple: The (width, height) of the image.
+    """
+    with _open_image(path) as ds:
+        return ds.width, ds.height
+
+
+def _rgba(ds, window):
+    import numpy as np
+    from rasterio.enums import ColorInterp
+
+    data = ds.read(window=window)
+    if ds.count == 1 and ds.colorinterp[0] == ColorInterp.palette:
+        lut = np.zeros((256, 4), dtype=np.uint8)
+        for value, color in ds.colormap(1).items():
+            lut[value] = color
+        return np.moveaxis(lut[data[0]], -1, 0)
+
+    if data.dtype == np.uint16:
+        data = (data >> 8).astype(np.uint8)
+    elif data.dtype != np.uint8:
+        data = np.clip(data, 0, 255).astype(np.uint8)
+    if ds.count in (2, 4):
+        color, alpha = data[:-1], data[-1:]
+    else:
+        color, alpha = data[:3], ds.dataset_mask(window=window)[None]
+    if len(color) == 1:
+        color = np.repeat(color, 3, axis=0)
+    return np.concatenate([color[:3], alpha])
+
+
+class ImagePyramid:
+    """Cuts a large image into XYZ tiles from a downsampled pyramid.
+
+    The image is stretched over its bounds the way ipyleaflet.ImageOverlay
+    stretches it, linearly in Web Mercator. On first use it is copied in row
+    strips to a tiled RGBA GeoTIFF in the cache directory, whose overviews
+    are halved until the smallest one fits in a tile, so neither the image
+    nor its levels are ever held in memory. The pyramid is reused until the
+    image changes. Tiles are read from the coarsest level that still has
+    enough pixels, so zoomed-out views only read small levels, and encoded
+    tiles are kept in an LRU cache.
+
+    Args:
+        path (str): The image file.
+        bounds (list): [[south, west], [north, east]] of the image.
+        tile_size (int, optional): The tile size in pixels. Defaults to 256.
+        cache_size (int, optional): The number of encoded tiles to keep. Defaults to 256.
+        cache_dir (str, optional): The pyramid directory. Defaults to default_image_cache_dir().
+        strip_bytes (int, optional): The memory used to copy the image. Defaults to 64 MiB.
+    """
+
+    def __init__(
+        self,
+        path,
+        bounds,
+        tile_size=256,
+        cache_size=256,
+        cache_dir=None,
+        strip_bytes=64 * 2**20,
+    ):
+        from .timeseries import mercator_bbox
+
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.bounds = bounds
+        self.tile_size = tile_size
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir or default_image_cache_dir()
+        self.bbox = mercator_bbox(bounds)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        stat = os.stat(self.path)
+        prefix = hashlib.sha1(self.path.encode()).hexdigest()[:16]
+        version = hashlib.sha1(
+            f"{stat.st_size}:{stat.st_mtime_ns}:{tile_size}".encode()
+        ).hexdigest()[:16]
+        self.cache_path = os.path.join(self.cache_dir, f"{prefix}-{version}.tif")
+        if not os.path.exists(self.cache_path):
+            self._build(prefix, strip_bytes)
+
+        with _open_image(self.cache_path) as ds:
+            self.size = ds.width, ds.height
+            factors = ds.overviews(1)
+        self.levels = [self.size] + [
+            (math.ceil(self.size[0] / f), math.ceil(self.size[1] / f)) for f in factors
+        ]
+
+    def _build(self, prefix, strip_bytes):
+        import rasterio
+        from rasterio.errors import NotGeoreferencedWarning
+        from rasterio.windows import Window
+
+        from .rasters import build_overviews
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{self.cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # GDAL's block cache would otherwise grow to a share of the system memory.
+        env = rasterio.Env(GDAL_CACHEMAX=max(strip_bytes // 2**20, 1))
+        try:
+            with env, _open_image(self.path) as src:
+                profile = {
+                    "driver": "GTiff",
+                    "width": src.width,
+                    "height": src.height,
+                    "count": 4,
+                    "dtype": "uint8",
+                    "tiled": True,
+                    "blockxsize": self.tile_size,
+                    "blockysize": self.tile_size,
+                    "compress": "deflate",
+                    "photometric": "RGB",
+                    "alpha": "YES",
+                }
+                rows = max(
+                    strip_bytes // (8 * src.width) // self.tile_size * self.tile_size,
+                    self.tile_size,
+                )
+                with _open_image(tmp, "w", **profile) as dst:
+                    # Strips are read top to bottom, which compressed formats
+                    # such as PNG decode without restarting.
+                    for row in range(0, src.height, rows):
+                        window = Window(0, row, src.width, min(rows, src.height - row))
+                        dst.write(_rgba(src, window), window=window)
+            with env, warnings.catch_warnings():
+                warnings.simplefilter("ignore", NotGeoreferencedWarning)
+                build_overviews(tmp, min_size=2 * self.tile_size)
+            os.replace(tmp, self.cache_path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        # Pyramids of earlier versions of the image are no longer needed.
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(f"{prefix}-") and entry.path != self.cache_path:
+                with contextlib.suppress(OSError):
+                    os.remove(entry.path)
+
+    @property
+    def max_zoom(self):
+        """int: The first zoom level at which tiles show the full resolution."""
+        from .vectortiles import EARTH_HALF_CIRCUMFERENCE
+
+        min_x, min_y, max_x, max_y = self.bbox
+        resolution = min((max_x - min_x) / self.size[0], (max_y - min_y) / self.size[1])
+        world = 2 * EARTH_HALF_CIRCUMFERENCE / self.tile_size
+        return max(0, math.ceil(math.log2(world / resolution)))
+
+    def tile(self, z, x, y):
+        """Returns an encoded tile.
+
+        Args:
+            z (int): The zoom level.
+            x (int): The tile column.
+            y (int): The tile row, counted from the north.
+
+        Returns:
+            bytes or None: The PNG tile, or None if the tile does not overlap the image.
+        """
+        import numpy as np
+        from PIL import Image
+        from rasterio.enums import Resampling
+        from rasterio.windows import Window
+
+        from .vectortiles import mercator_tile_bounds
+
+        key = (z, x, y)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        tile_min_x, tile_min_y, tile_max_x, tile_max_y = mercator_tile_bounds(x, y, z)
+        min_x, min_y, max_x, max_y = self.bbox
+        left, right = max(tile_min_x, min_x), min(tile_max_x, max_x)
+        bottom, top = max(tile_min_y, min_y), min(tile_max_y, max_y)
+        if left >= right or bottom >= top:
+            return None
+
+        tile_scale = self.tile_size / (tile_max_x - tile_min_x)
+        scale_x = self.size[0] / (max_x - min_x)
+        scale_y = self.size[1] / (max_y - min_y)
+        window = Window(
+            (left - min_x) * scale_x,
+            (max_y - top) * scale_y,
+            (right - left) * scale_x,
+            (top - bottom) * scale_y,
+        )
+        target = (
+            round((left - tile_min_x) * tile_scale),
+            round((tile_max_y - top) * tile_scale),
+            round((right - tile_min_x) * tile_scale),
+            round((tile_max_y - bottom) * tile_scale),
+        )
+        width = max(target[2] - target[0], 1)
+        height = max(target[3] - target[1], 1)
+        col = min(target[0], self.tile_size - width)
+        row = min(target[1], self.tile_size - height)
+
+        # GDAL reads downsampled windows from the best overview.
+        with _open_image(self.cache_path) as ds:
+            part = ds.read(
+                window=window,
+                out_shape=(4, height, width),
+                resampling=Resampling.bilinear,
+            )
+        pixels = np.zeros((self.tile_size, self.tile_size, 4), dtype=np.uint8)
+        pixels[row : row + height, col : col + width] = np.moveaxis(part, 0, -1)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels, "RGBA").save(buffer, format="PNG")
+        data = buffer.getvalue()
+
+        with self._lock:
+            self._cache[key] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+
+class MediaServer(LocalServer):
+    """Serves local media files and image pyramids on localhost.
+
+    Files are served with HTTP range requests, which browsers use to stream
+    and seek videos, and are read through a memory map in chunks, so a large
+    file is never loaded whole. Files are registered with file_url and
+    pyramids with tile_url.
+
+    Args:
+        chunk_size (int, optional): The size of the chunks sent to the client. Defaults to 1 MiB.
+        **kwargs: Additional keyword arguments for LocalServer.
+    """
+
+    _file_path = re.compile(r"^/f/(\w+)/[^/]*$")
+    _tile_path = re.compile(r"^/p/(\w+)/(\d+)/(\d+)/(\d+)\.png$")
+
+    def __init__(self, chunk_size=2**20, **kwargs):
+        super().__init__(**kwargs)
+        self.chunk_size = chunk_size
+        self._files = {}
+        self._pyramids = {}
+
+    @staticmethod
+    def _key(name):
+        return hashlib.sha1(name.encode()).hexdigest()[:16]
+
+    def file_url(self, path):
+        """Registers a file and returns its URL.
+
+        Args:
+            path (str): The file path.
+
+        Returns:
+            str: The URL of the file.
+        """
+        path = os.path.abspath(os.path.expanduser(path))
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        key = self._key(path)
+        self._files[key] = path
+        return f"{self.url}/f/{key}/{os.path.basename(path)}"
+
+    def tile_url(self, pyramid):
+        """Registers an image pyramid and returns the XYZ template of its tiles.
+
+        Args:
+            pyramid (ImagePyramid): The pyramid.
+
+        Returns:
+            str: The URL template.
+        """
+        key = self._key(f"{pyramid.path}:{pyramid.bounds}")
+        self._pyramids[key] = pyramid
+        return f"{self.url}/p/{key}/{{z}}/{{x}}/{{y}}.png"
+
+    def _chunks(self, path, start, end):
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            for offset in range(start, end + 1, self.chunk_size):
+                yield data[offset : min(offset + self.chunk_size, end + 1)]
+
+    def _file_response(self, path, headers):
+        size = os.path.getsize(path)
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        response = {
+            "Content-Type": content_type,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "max-age=3600",
+        }
+        try:
+            byte_range = parse_range(headers.get("Range"), size)
+        except ValueError:
+            response["Content-Range"] = f"bytes */{size}"
+            return 416, response, b""
+
+        status = 200
+        start, end = 0, size - 1
+        if byte_range is not None:
+            status = 206
+            start, end = byte_range
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+        if size == 0:
+            return status, response, b""
+        return status, response, self._chunks(path, start, end)
+
+    def handle(self, path, query, headers):
+        match = self._file_path.match(path)
+        if match:
+            file = self._files.get(match.group(1))
+            if file is None or not os.path.isfile(file):
+                return 404, {}, b""
+            return self._file_response(file, headers)
+
+        match = self._tile_path.match(path)
+        if match:
+            pyramid = self._pyramids.get(match.group(1))
+            z, x, y = (int(v) for v in match.groups()[1:])
+            tile = None if pyramid is None else pyramid.tile(z, x, y)
+            if tile is None:
+                return 404, {}, b""
+            return (
+                200,
+                {"Content-Type": "image/png", "Cache-Control": "max-age=3600"},
+                tile,
+            )
+        return 404, {}, b""
+
+
+def get_media_server(**kwargs):
+    """Returns the shared media server, starting it on first use.
+
+    Args:
+        **kwargs: Keyword arguments for MediaServer, used when it is created.
+
+    Returns:
+        MediaServer: The running server.
+    """
+    global _server
+    with _server_lock:
+        if _server is None or not _server.running:
+            _server = MediaServer(**kwargs).start()
+        return _server
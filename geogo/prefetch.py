@@ -0,0 +1,135 @@
+"""The prefetch module prepares values on a background thread pool ahead of use."""
+
+import threading
+from collections import OrderedDict
+
+
+class Prefetcher:
+    """Builds values by key on a background thread pool and caches them.
+
+    Built values are kept in a bounded LRU cache, so keys that were already
+    shown or prefetched are served without building them again. Concurrent
+    requests for a key share one build, and pending builds that are no
+    longer wanted can be cancelled.
+
+    Args:
+        build (callable): Builds the value of a key. It runs on a worker thread.
+        max_workers (int, optional): Number of background threads. Defaults to 2.
+        cache_size (int, optional): Number of built values to keep. Defaults to 32.
+        thread_name_prefix (str, optional): The name prefix of the worker threads.
+            Defaults to "geogo-prefetch".
+    """
+
+    def __init__(
+        self,
+        build,
+        max_workers=2,
+        cache_size=32,
+        thread_name_prefix="geogo-prefetch",
+    ):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.build = build
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix
+        )
+
+    def _run(self, key):
+        value = self.build(key)
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def cached(self, key):
+        """Returns a built value if it is in the cache.
+
+        Args:
+            key (hashable): The key.
+
+        Returns:
+            object: The value, or None.
+        """
+        with self._lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+            return value
+
+    def submit(self, key):
+        """Schedules a value to be built.
+
+        Args:
+            key (hashable): The key.
+
+        Returns:
+            concurrent.futures.Future: A future for the value.
+        """
+        from concurrent.futures import Future
+
+        value = self.cached(key)
+        if value is not None:
+            future = Future()
+            future.set_result(value)
+            return future
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None and not future.cancelled():
+                return future
+            future = self._executor.submit(self._run, key)
+            self._pending[key] = future
+        # A build that already finished runs the callback right away, which
+        # takes the lock.
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def prepare(self, key):
+        """Returns a value, building it if needed.
+
+        Args:
+            key (hashable): The key.
+
+        Returns:
+            object: The value.
+        """
+        return self.submit(key).result()
+
+    def prefetch(self, keys):
+        """Schedules several values to be built in the background.
+
+        Args:
+            keys (list): The keys.
+        """
+        for key in keys:
+            self.submit(key)
+
+    def cancel(self, keep=()):
+        """Cancels pending builds, except for the given keys.
+
+        Builds that already started run to completion and are cached.
+
+        Args:
+            keep (iterable, optional): Keys whose builds should be kept. Defaults to ().
+        """
+        keep = set(keep)
+        with self._lock:
+            pending = [f for k, f in self._pending.items() if k not in keep]
+        for future in pending:
+            future.cancel()
+
+    def shutdown(self):
+        """Cancels pending builds and stops the background threads."""
+        self.cancel()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,249 @@
+"""The profiling module records where the time of map calls goes, on request."""
+
+import contextvars
+import functools
+import json
+import time
+
+PHASES = ("load", "geometry", "reproject", "serialize", "sync")
+
+_call = contextvars.ContextVar("geogo_profiled_call", default=None)
+
+
+class _NoPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_no_phase = _NoPhase()
+
+
+class _Phase:
+    def __init__(self, call, name):
+        self.call = call
+        self.name = name
+
+    def __enter__(self):
+        self.child = 0.0
+        self.call["_stack"].append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.call["_stack"]
+        stack.pop()
+        phases = self.call["phases"]
+        phases[self.name] = phases.get(self.name, 0.0) + elapsed - self.child
+        if stack:
+            stack[-1].child += elapsed
+        return False
+
+
+def phase(name):
+    """Times a phase of the map call being profiled.
+
+    Time spent in a nested phase only counts toward the inner phase. Outside
+    a profiled call this returns a shared no-op context manager.
+
+    Args:
+        name (str): The phase, one of PHASES.
+
+    Returns:
+        contextlib.AbstractContextManager: The phase timer.
+    """
+    call = _call.get()
+    if call is None:
+        return _no_phase
+    return _Phase(call, name)
+
+
+def _count_vertices(coords):
+    if not coords:
+        return 0
+    if isinstance(coords[0], (int, float)):
+        return 1
+    return sum(_count_vertices(c) for c in coords)
+
+
+def payload_stats(data):
+    """Counts the features and vertices of GeoJSON or TopoJSON data.
+
+    Args:
+        data (dict): A FeatureCollection, Feature, geometry or TopoJSON Topology.
+
+    Returns:
+        tuple: The number of features and of vertices.
+    """
+    if data.get("type") == "Topology":
+        features = sum(
+            len(obj.get("geometries", [])) for obj in data["objects"].values()
+        )
+        return features, sum(len(arc) for arc in data.get("arcs", []))
+
+    features = data.get("features", [data])
+    vertices = 0
+    for feature in features:
+        geometry = feature.get("geometry", feature) or {}
+        if geometry.get("type") == "GeometryCollection":
+            geometries = geometry.get("geometries", [])
+        else:
+            geometries = [geometry]
+        for part in geometries:
+            vertices += _count_vertices(part.get("coordinates"))
+    return len(features), vertices
+
+
+def layer_payload(layer):
+    """Measures the vector data that a layer sends to the browser.
+
+    Args:
+        layer: An ipyleaflet or folium layer, a list of layers, or a layer group.
+
+    Returns:
+        tuple: The number of features, vertices and serialized bytes.
+    """
+    if isinstance(layer, (list, tuple)):
+        totals = [layer_payload(item) for item in layer]
+        return tuple(sum(values) for values in zip(*totals)) or (0, 0, 0)
+    if hasattr(layer, "payload") and callable(getattr(layer, "data", None)):
+        # A folium sidecar layer, whose page fetches the compressed file.
+        features, vertices = payload_stats(json.loads(layer.data()))
+        return features, vertices, len(layer.payload)
+    data = getattr(layer, "data", None)
+    if isinstance(data, dict):
+        features, vertices = payload_stats(data)
+        return features, vertices, len(json.dumps(data).encode())
+    children = getattr(layer, "layers", None)
+    if isinstance(children, (list, tuple)):
+        return layer_payload(list(children))
+    return 0, 0, 0
+
+
+def layer_count(m):
+    """Returns the number of layers on an ipyleaflet or folium map."""
+    layers = getattr(m, "layers", None)
+    if isinstance(layers, (list, tuple)):
+        return len(layers)
+    children = getattr(m, "_children", {})
+    return sum(hasattr(child, "layer_name") for child in children.values())
+
+
+class Profiler:
+    """Collects one record per profiled map call.
+
+    Each record holds the method name, the total seconds, the seconds per
+    phase (with the unattributed rest under "other"), the features, vertices
+    and serialized bytes of the returned layers, and the number of layers on
+    the map afterwards. Use Map.profile to attach a profiler to a map.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def __repr__(self):
+        return f"<Profiler {len(self)} calls>"
+
+    def _run(self, m, name, method, args, kwargs):
+        call = {"phases": {}, "_stack": []}
+        token = _call.set(call)
+        start = time.perf_counter()
+        try:
+            result = method(m, *args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            _call.reset(token)
+
+        features, vertices, size = layer_payload(result)
+        phases = call["phases"]
+        record = {"method": name, "seconds": seconds}
+        for key in PHASES:
+            record[key] = phases.get(key, 0.0)
+        record["other"] = max(seconds - sum(phases.values()), 0.0)
+        record.update(
+            features=features, vertices=vertices, bytes=size, layers=layer_count(m)
+        )
+        self.records.append(record)
+        return result
+
+    def report(self):
+        """Returns the records as a table.
+
+        Returns:
+            pandas.DataFrame: One row per profiled call.
+        """
+        import pandas as pd
+
+        columns = (
+            ["method", "seconds"]
+            + list(PHASES)
+            + ["other", "features", "vertices", "bytes", "layers"]
+        )
+        return pd.DataFrame(self.records, columns=columns)
+
+    def clear(self):
+        """Forgets the records."""
+        self.records.clear()
+
+
+class _Profiling:
+    def __init__(self, m, profiler):
+        self.m = m
+        self.profiler = Profiler() if profiler is None else profiler
+
+    def __enter__(self):
+        self.previous = getattr(self.m, "_profiler", None)
+        self.m._profiler = self.profiler
+        return self.profiler
+
+    def __exit__(self, *exc):
+        self.m._profiler = self.previous
+        return False
+
+
+def profile(self, profiler=None):
+    """Profiles the add_* calls made on the map inside a with block.
+
+    Args:
+        profiler (Profiler, optional): The profiler to record into. Defaults to a new one.
+
+    Returns:
+        contextlib.AbstractContextManager: A context manager that yields the Profiler.
+    """
+    return _Profiling(self, profiler)
+
+
+def _instrumented(name, method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = getattr(self, "_profiler", None)
+        # Calls made by another profiled call count toward that call.
+        if profiler is None or _call.get() is not None:
+            return method(self, *args, **kwargs)
+        return profiler._run(self, name, method, args, kwargs)
+
+    return wrapper
+
+
+def instrument(cls):
+    """Makes the add_* methods of a map class profilable and adds a profile method.
+
+    When no profiler is attached, a call costs one attribute lookup more.
+
+    Args:
+        cls (type): The map class.
+
+    Returns:
+        type: The class.
+    """
+    for name, method in list(vars(cls).items()):
+        if name.startswith("add_") and callable(method):
+            setattr(cls, name, _instrumented(name, method))
+    cls.profile = profile
+    return cls
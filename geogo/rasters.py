@@ -0,0 +1,208 @@
+"""The rasters module shares local tile servers between raster layers."""
+
+import os
+import threading
+import warnings
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def has_overviews(path):
+    """Checks whether a raster has overviews.
+
+    Args:
+        path (str): The raster file.
+
+    Returns:
+        bool: True if the first band has overviews.
+    """
+    import rasterio
+
+    with rasterio.open(path) as ds:
+        return bool(ds.overviews(1))
+
+
+def build_overviews(path, resampling="average", min_size=256):
+    """Builds internal overviews for a raster in place.
+
+    Overview levels are halved until the smallest level fits in min_size pixels.
+
+    Args:
+        path (str): The raster file. It must be writable.
+        resampling (str, optional): The resampling method. Defaults to "average".
+        min_size (int, optional): The size of the smallest overview. Defaults to 256.
+
+    Returns:
+        list: The overview factors that were built.
+    """
+    import rasterio
+    from rasterio.enums import Resampling
+
+    with rasterio.open(path, "r+") as ds:
+        factors = []
+        factor = 2
+        while max(ds.width, ds.height) / factor >= min_size / 2:
+            factors.append(factor)
+            factor *= 2
+        if factors:
+            ds.build_overviews(factors, Resampling[resampling])
+            ds.update_tags(ns="rio_overview", resampling=resampling)
+    return factors
+
+
+def check_overviews(path, action="warn", min_size=1024):
+    """Warns about or builds missing overviews of a large raster.
+
+    Tiling a raster without overviews reads full-resolution pixels for every
+    zoomed-out tile, which is slow.
+
+    Args:
+        path (str): The raster file.
+        action (str, optional): "warn" to warn, "build" to build the overviews, or None to do
+            nothing. Defaults to "warn".
+        min_size (int, optional): Rasters no larger than this on either side are not checked.
+            Defaults to 1024.
+
+    Returns:
+        bool: True if the raster has overviews after the check.
+    """
+    import rasterio
+
+    if action is None or not os.path.exists(path):
+        return True
+    with rasterio.open(path) as ds:
+        if ds.overviews(1) or max(ds.width, ds.height) <= min_size:
+            return True
+
+    if action == "build":
+        try:
+            return bool(build_overviews(path))
+        except rasterio.errors.RasterioError as e:
+            warnings.warn(f"Could not build overviews for {path}: {e}")
+            return False
+    if action == "warn":
+        warnings.warn(
+            f"{path} has no overviews, so zoomed-out tiles will be slow. "
+            "Build them with geogo.rasters.build_overviews or pass overviews='build'."
+        )
+        return False
+    raise ValueError("action must be 'warn', 'build' or None")
+
+
+class TileClientPool:
+    """Shares localtileserver TileClients between layers of the same raster.
+
+    Clients are keyed by absolute file path and reference counted. A client is
+    created on the first acquire and shut down when the last holder releases it.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._opening = {}
+
+    def __len__(self):
+        return len(self._clients)
+
+    def __repr__(self):
+        return f"<TileClientPool {len(self)} clients>"
+
+    @staticmethod
+    def key(source):
+        """Returns the pool key of a raster.
+
+        Args:
+            source (str): A file path or URL.
+
+        Returns:
+            str: The absolute path, or the URL as is.
+        """
+        if "://" in source:
+            return source
+        return os.path.abspath(os.path.expanduser(source))
+
+    def acquire(self, source, **kwargs):
+        """Returns the client of a raster, creating it if needed.
+
+        Args:
+            source (str): A file path or URL.
+            **kwargs: Keyword arguments for localtileserver.TileClient, used when it is created.
+
+        Returns:
+            localtileserver.TileClient: The shared client.
+        """
+        from localtileserver import TileClient
+
+        key = self.key(source)
+        with self._lock:
+            lock = self._opening.setdefault(key, threading.Lock())
+        # Concurrent acquires of one raster open it once.
+        try:
+            with lock:
+                with self._lock:
+                    client = self._clients.get(key)
+                if client is None:
+                    with warnings.catch_warnings():
+                        warnings.filterwarnings("ignore", message=".*no Overviews")
+                        client = TileClient(key, **kwargs)
+                with self._lock:
+                    self._clients.setdefault(key, client)
+                    self._counts[key] = self._counts.get(key, 0) + 1
+                    return self._clients[key]
+        finally:
+            with self._lock:
+                if self._opening.get(key) is lock:
+                    del self._opening[key]
+
+    def release(self, source):
+        """Releases a client, shutting it down when it is no longer used.
+
+        Args:
+            source (str): A file path or URL.
+        """
+        key = self.key(source)
+        with self._lock:
+            if key not in self._counts:
+                return
+            self._counts[key] -= 1
+            if self._counts[key] > 0:
+                return
+            del self._counts[key]
+            client = self._clients.pop(key)
+        client.shutdown()
+
+    def count(self, source):
+        """Returns the number of holders of a raster's client.
+
+        Args:
+            source (str): A file path or URL.
+
+        Returns:
+            int: The reference count.
+        """
+        with self._lock:
+            return self._counts.get(self.key(source), 0)
+
+    def shutdown(self):
+        """Shuts down every client in the pool."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._counts.clear()
+        for client in clients:
+            client.shutdown()
+
+
+def get_tile_client_pool():
+    """Returns the shared TileClient pool.
+
+    Returns:
+        TileClientPool: The pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TileClientPool()
+        return _pool
@@ -0,0 +1,133 @@
+"""The server module runs small HTTP servers on localhost for map layers."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class LocalServer:
+    """An HTTP server on localhost that runs on a daemon thread.
+
+    Subclasses implement handle, which maps a request to a response. Every
+    response allows cross-origin requests, so the notebook page can fetch
+    from the server directly.
+
+    Args:
+        host (str, optional): The interface to bind. Defaults to "127.0.0.1".
+        port (int, optional): The port to bind. Defaults to 0, which picks a free port.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self._httpd = None
+        self._thread = None
+
+    def __repr__(self):
+        state = self.url if self.running else "stopped"
+        return f"<{type(self).__name__} {state}>"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def running(self):
+        """bool: Whether the server is running."""
+        return self._httpd is not None
+
+    @property
+    def url(self):
+        """str: The base URL of the server."""
+        return f"http://{self.host}:{self.port}"
+
+    def handle(self, path, query, headers):
+        """Answers a GET request.
+
+        Args:
+            path (str): The request path.
+            query (dict): The query parameters, as lists of values.
+            headers (email.message.Message): The request headers.
+
+        Returns:
+            tuple: The status code, a dict of response headers and the body.
+                The body is bytes, or an iterable of bytes chunks when the
+                Content-Length header is set.
+        """
+        return 404, {}, b""
+
+    def start(self):
+        """Starts serving in the background.
+
+        Returns:
+            LocalServer: The server itself.
+        """
+        if self.running:
+            return self
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, send_body):
+                parts = urlsplit(self.path)
+                try:
+                    status, headers, body = server.handle(
+                        parts.path, parse_qs(parts.query), self.headers
+                    )
+                except Exception as e:
+                    status, headers, body = 500, {}, str(e).encode()
+
+                chunks = [body] if isinstance(body, bytes) else body
+                headers = dict(headers)
+                if isinstance(body, bytes):
+                    headers["Content-Length"] = str(len(body))
+                headers.setdefault("Access-Control-Allow-Origin", "*")
+
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    if send_body:
+                        for chunk in chunks:
+                            self.wfile.write(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Browsers abort range requests whenever a video seeks.
+                    self.close_connection = True
+                finally:
+                    # Releases the file behind a streamed body right away.
+                    if hasattr(chunks, "close"):
+                        chunks.close()
+
+            def do_GET(self):
+                self._respond(True)
+
+            def do_HEAD(self):
+                self._respond(False)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            name=f"geogo-{type(self).__name__}",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server."""
+        if self._httpd is None:
+            return
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+        self._httpd = None
+        self._thread = None
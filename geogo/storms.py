@@ -0,0 +1,684 @@
+"""The storms module contains helpers for preparing tropical cyclone tracks for mapping."""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .prefetch import Prefetcher
+
+CATEGORY_COLORS = {
+    "TD": "#6baed6",
+    "TS": "#3182bd",
+    "C1": "#31a354",
+    "C2": "#addd8e",
+    "C3": "#fdae6b",
+    "C4": "#fd8d3c",
+    "C5": "#e31a1c",
+}
+
+CATEGORIES = list(CATEGORY_COLORS)
+
+# Upper wind bounds of TD, TS, C1, C2, C3 and C4. Anything above is C5.
+CATEGORY_BINS = [39, 74, 96, 111, 130, 157]
+
+
+def classify_vmax(vmax):
+    """Classifies maximum sustained winds into storm categories in one pass.
+
+    Args:
+        vmax (array-like): Maximum sustained wind speeds.
+
+    Returns:
+        numpy.ndarray: Integer codes indexing into CATEGORIES.
+    """
+    return np.digitize(np.asarray(vmax, dtype=float), CATEGORY_BINS)
+
+
+def track_segments(lon, lat):
+    """Builds the line segments joining consecutive track observations.
+
+    Args:
+        lon (array-like): Observation longitudes.
+        lat (array-like): Observation latitudes.
+
+    Returns:
+        numpy.ndarray: Array of shape (n - 1, 2, 2) holding the start and end
+            (lon, lat) of every segment.
+    """
+    coords = np.column_stack(
+        [np.asarray(lon, dtype=float), np.asarray(lat, dtype=float)]
+    )
+    return np.stack([coords[:-1], coords[1:]], axis=1)
+
+
+def track_bounds(lon, lat):
+    """Returns the bounds of a track in the form expected by Map.fit_bounds.
+
+    Args:
+        lon (array-like): Observation longitudes.
+        lat (array-like): Observation latitudes.
+
+    Returns:
+        list: [[south, west], [north, east]].
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    return [
+        [float(np.nanmin(lat)), float(np.nanmin(lon))],
+        [float(np.nanmax(lat)), float(np.nanmax(lon))],
+    ]
+
+
+def storm_track_geojson(storm_dict, weight=8):
+    """Builds a FeatureCollection with one LineString per track segment.
+
+    Each segment is colored by the category of its starting observation
+    through a per-feature style, so the whole track can be rendered by a
+    single GeoJSON layer.
+
+    Args:
+        storm_dict (dict): Storm data with "lon", "lat" and "vmax" entries,
+            such as tropycal's Storm.dict.
+        weight (int, optional): Line width of the track. Defaults to 8.
+
+    Returns:
+        dict: A GeoJSON FeatureCollection.
+    """
+    vmax = np.asarray(storm_dict["vmax"], dtype=float)
+    segments = track_segments(storm_dict["lon"], storm_dict["lat"])
+    codes = classify_vmax(vmax[:-1])
+    categories = np.array(CATEGORIES)[codes].tolist()
+    colors = np.array(list(CATEGORY_COLORS.values()))[codes].tolist()
+    winds = np.where(np.isnan(vmax[:-1]), None, vmax[:-1]).tolist()
+
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": coords},
+            "properties": {
+                "category": category,
+                "vmax": wind,
+                "style": {"color": color, "weight": weight},
+            },
+        }
+        for coords, category, color, wind in zip(
+            segments.tolist(), categories, colors, winds
+        )
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+_datasets = OrderedDict()
+_datasets_lock = threading.Lock()
+_dataset_build_locks = {}
+_dataset_cache_size = 4
+_catalogs = {}
+
+
+def _build_track_dataset(basin, source):
+    import tropycal.tracks as tracks
+
+    return tracks.TrackDataset(basin=basin, source=source)
+
+
+def _trim_datasets():
+    while len(_datasets) > _dataset_cache_size:
+        key, _ = _datasets.popitem(last=False)
+        _catalogs.pop(key, None)
+
+
+def get_track_dataset(basin="north_atlantic", source="hurdat"):
+    """Returns a TrackDataset from the process-wide dataset cache.
+
+    The dataset for a (basin, source) pair is parsed once and shared by every
+    Map instance. Concurrent callers asking for the same basin wait for a
+    single build instead of parsing it twice.
+
+    Args:
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+
+    Returns:
+        tropycal.tracks.TrackDataset: The cached dataset.
+    """
+    key = (basin, source)
+    with _datasets_lock:
+        if key in _datasets:
+            _datasets.move_to_end(key)
+            return _datasets[key]
+        build_lock = _dataset_build_locks.setdefault(key, threading.Lock())
+
+    with build_lock:
+        with _datasets_lock:
+            if key in _datasets:
+                _datasets.move_to_end(key)
+                return _datasets[key]
+
+        dataset = _build_track_dataset(basin, source)
+
+        with _datasets_lock:
+            _datasets[key] = dataset
+            _dataset_build_locks.pop(key, None)
+            _trim_datasets()
+    return dataset
+
+
+def evict_track_dataset(basin="north_atlantic", source="hurdat"):
+    """Removes a dataset from the process-wide dataset cache.
+
+    Args:
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+
+    Returns:
+        bool: True if the dataset was cached.
+    """
+    with _datasets_lock:
+        _catalogs.pop((basin, source), None)
+        return _datasets.pop((basin, source), None) is not None
+
+
+def clear_track_datasets():
+    """Removes every dataset from the process-wide dataset cache."""
+    with _datasets_lock:
+        _datasets.clear()
+        _catalogs.clear()
+
+
+def cached_track_datasets():
+    """Lists the cached datasets, least recently used first.
+
+    Returns:
+        list: (basin, source) tuples.
+    """
+    with _datasets_lock:
+        return list(_datasets)
+
+
+def set_track_dataset_cache_size(size):
+    """Sets how many datasets the process-wide dataset cache keeps.
+
+    Least recently used datasets are evicted when the cache shrinks.
+
+    Args:
+        size (int): The maximum number of cached datasets.
+    """
+    global _dataset_cache_size
+
+    if size < 1:
+        raise ValueError("size must be at least 1")
+    with _datasets_lock:
+        _dataset_cache_size = size
+        _trim_datasets()
+
+
+def get_storm(storm, basin="north_atlantic", source="hurdat", snapshot=False):
+    """Retrieves a storm from the shared dataset cache or the basin snapshot.
+
+    Args:
+        storm (str or tuple): The storm ID, or a tuple with the storm name and year.
+        basin (str, optional): The basin of the storm. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        snapshot (bool, optional): Whether to read the storm from the basin snapshot. Defaults to False.
+
+    Returns:
+        tropycal.tracks.Storm or geogo.stormstore.StoredStorm: The requested storm.
+    """
+    if snapshot:
+        from .stormstore import get_storm_store
+
+        return get_storm_store(basin, source).get_storm(storm)
+    return get_track_dataset(basin, source).get_storm(storm)
+
+
+class StormCatalog:
+    """A lightweight table of the storms in a basin.
+
+    The catalogue holds one row per storm with its id, name, season, start and
+    end time, peak vmax, minimum mslp, peak category and bounding box. It is
+    built in one vectorized pass over flattened observation columns, so no
+    tropycal Storm objects are created.
+
+    Args:
+        df (pandas.DataFrame): The catalogue table, indexed by storm id.
+    """
+
+    def __init__(self, df):
+        self.df = df
+
+    def __len__(self):
+        return len(self.df)
+
+    def __repr__(self):
+        return f"<StormCatalog: {len(self)} storms>"
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Builds a catalogue from observation columns.
+
+        Args:
+            columns (dict): Columns as returned by geogo.stormstore.dataset_columns.
+
+        Returns:
+            StormCatalog: The storm catalogue.
+        """
+        import pandas as pd
+
+        offsets = np.asarray(columns["offsets"])
+        starts = offsets[:-1]
+        filled = np.diff(offsets) > 0
+        first = starts[filled]
+        last = offsets[1:][filled] - 1
+
+        def reduce(ufunc, name):
+            values = np.full(len(starts), np.nan)
+            if len(first):
+                values[filled] = ufunc.reduceat(
+                    np.asarray(columns[name], dtype=float), first
+                )
+            return values
+
+        def pick(rows):
+            values = np.full(len(starts), np.datetime64("NaT"), dtype="datetime64[s]")
+            values[filled] = np.asarray(columns["time"])[rows]
+            return values
+
+        vmax = reduce(np.fmax, "vmax")
+        df = pd.DataFrame(
+            {
+                "name": columns["names"],
+                "season": columns["seasons"],
+                "start": pick(first),
+                "end": pick(last),
+                "vmax": vmax,
+                "mslp": reduce(np.fmin, "mslp"),
+                "category": np.array(CATEGORIES)[classify_vmax(vmax)],
+                "min_lon": reduce(np.fmin, "lon"),
+                "min_lat": reduce(np.fmin, "lat"),
+                "max_lon": reduce(np.fmax, "lon"),
+                "max_lat": reduce(np.fmax, "lat"),
+            },
+            index=pd.Index(columns["ids"], name="id"),
+        )
+        return cls(df)
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """Builds a catalogue from a tropycal TrackDataset.
+
+        Args:
+            dataset (tropycal.tracks.TrackDataset): The dataset to index.
+
+        Returns:
+            StormCatalog: The storm catalogue.
+        """
+        from .stormstore import dataset_columns
+
+        return cls.from_columns(dataset_columns(dataset))
+
+    def filter(
+        self,
+        years=None,
+        name_prefix=None,
+        min_vmax=None,
+        max_vmax=None,
+        min_category=None,
+        named_only=False,
+    ):
+        """Selects storms from the catalogue.
+
+        Args:
+            years (int or tuple, optional): A season, or a (start, end) range of seasons
+                where either end may be None. Defaults to None.
+            name_prefix (str, optional): Case-insensitive prefix of the storm name. Defaults to None.
+            min_vmax (float, optional): Minimum peak vmax. Defaults to None.
+            max_vmax (float, optional): Maximum peak vmax. Defaults to None.
+            min_category (str, optional): Minimum peak category, one of CATEGORIES. Defaults to None.
+            named_only (bool, optional): Whether to drop unnamed storms. Defaults to False.
+
+        Returns:
+            StormCatalog: The selected storms.
+        """
+        df = self.df
+        mask = np.ones(len(df), dtype=bool)
+
+        if years is not None:
+            if isinstance(years, int):
+                years = (years, years)
+            start, end = years
+            if start is not None:
+                mask &= df["season"].to_numpy() >= start
+            if end is not None:
+                mask &= df["season"].to_numpy() <= end
+        if name_prefix:
+            mask &= (
+                df["name"].str.upper().str.startswith(name_prefix.upper()).to_numpy()
+            )
+        if named_only:
+            mask &= (df["name"].str.upper() != "UNNAMED").to_numpy()
+        if min_category is not None:
+            level = CATEGORIES.index(min_category)
+            if level > 0:
+                min_vmax = max(min_vmax or 0, CATEGORY_BINS[level - 1])
+        if min_vmax is not None:
+            mask &= df["vmax"].to_numpy() >= min_vmax
+        if max_vmax is not None:
+            mask &= df["vmax"].to_numpy() <= max_vmax
+        return StormCatalog(df[mask])
+
+    def select(self, storms):
+        """Selects storms by id or by (name, year).
+
+        Args:
+            storms (list): Storm IDs (e.g., "AL052019") or (name, year) tuples.
+
+        Returns:
+            StormCatalog: The selected storms, in catalogue order.
+        """
+        df = self.df
+        ids = df.index.to_numpy()
+        names = df["name"].str.upper().to_numpy()
+        seasons = df["season"].to_numpy()
+
+        mask = np.zeros(len(df), dtype=bool)
+        for storm in storms:
+            if isinstance(storm, tuple):
+                matches = (names == storm[0].upper()) & (seasons == storm[1])
+            else:
+                matches = ids == storm
+            if not matches.any():
+                raise RuntimeError(f"Storm not found: {storm}")
+            mask |= matches
+        return StormCatalog(df[mask])
+
+    def options(self):
+        """Returns (id, season) tuples for the storms in the catalogue.
+
+        Returns:
+            list: (id, season) tuples.
+        """
+        return list(zip(self.df.index.tolist(), self.df["season"].tolist()))
+
+
+def _dataset_entry(basin, source):
+    from .stormstore import dataset_columns
+
+    dataset = get_track_dataset(basin, source)
+    with _datasets_lock:
+        cached = _catalogs.get((basin, source))
+    if cached is not None and cached[0] is dataset:
+        return cached
+
+    columns = dataset_columns(dataset)
+    entry = (dataset, columns, StormCatalog.from_columns(columns))
+    with _datasets_lock:
+        _catalogs[(basin, source)] = entry
+    return entry
+
+
+def get_storm_columns(basin="north_atlantic", source="hurdat", snapshot=False):
+    """Returns every observation of a basin as flat NumPy columns.
+
+    The columns are built once per basin and kept with the shared dataset
+    cache, or memory-mapped from the basin snapshot with snapshot=True.
+
+    Args:
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        snapshot (bool, optional): Whether to use the basin snapshot. Defaults to False.
+
+    Returns:
+        dict: Columns as returned by geogo.stormstore.dataset_columns.
+    """
+    if snapshot:
+        from .stormstore import get_storm_store
+
+        return get_storm_store(basin, source).as_columns()
+    return _dataset_entry(basin, source)[1]
+
+
+def get_storm_catalog(basin="north_atlantic", source="hurdat", snapshot=False):
+    """Returns the storm catalogue of a basin.
+
+    The catalogue is built once per basin and kept with the shared dataset
+    cache. With snapshot=True it is read from the memory-mapped basin snapshot
+    instead, so tropycal is not needed once the snapshot exists.
+
+    Args:
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        snapshot (bool, optional): Whether to use the basin snapshot. Defaults to False.
+
+    Returns:
+        StormCatalog: The storm catalogue.
+    """
+    if snapshot:
+        from .stormstore import get_storm_store
+
+        return get_storm_store(basin, source).catalog()
+    return _dataset_entry(basin, source)[2]
+
+
+def storm_rows(offsets, positions):
+    """Returns the observation rows of several storms.
+
+    Args:
+        offsets (array-like): Storm offsets as returned by dataset_columns.
+        positions (array-like): Positions of the storms in the storm index.
+
+    Returns:
+        tuple: The row numbers and, for every row, the index into positions
+            of the storm it belongs to.
+    """
+    offsets = np.asarray(offsets)
+    positions = np.asarray(positions, dtype=np.int64)
+    starts = offsets[positions]
+    lengths = offsets[positions + 1] - starts
+    owner = np.repeat(np.arange(len(positions)), lengths)
+    first = np.cumsum(lengths) - lengths
+    rows = np.arange(lengths.sum()) - np.repeat(first - starts, lengths)
+    return rows, owner
+
+
+def storms_geojson(columns, positions, weight=3):
+    """Builds the tracks of many storms at once, grouped by category.
+
+    Intensity is classified for all observations in one pass and the segments
+    of every storm are built together. Segments of a storm that share a
+    category are merged into one MultiLineString, so the output has at most
+    one feature per storm and category.
+
+    Args:
+        columns (dict): Columns as returned by geogo.stormstore.dataset_columns.
+        positions (array-like): Positions of the storms in the storm index.
+        weight (int, optional): Line width of the tracks. Defaults to 3.
+
+    Returns:
+        dict: A GeoJSON FeatureCollection per category label, for the
+            categories that occur.
+    """
+    rows, owner = storm_rows(columns["offsets"], positions)
+    lon = np.asarray(columns["lon"], dtype=float)[rows]
+    lat = np.asarray(columns["lat"], dtype=float)[rows]
+    vmax = np.asarray(columns["vmax"], dtype=float)[rows]
+
+    keep = np.flatnonzero(owner[:-1] == owner[1:])
+    segments = track_segments(lon, lat)[keep]
+    codes = classify_vmax(vmax[keep])
+    storm = owner[keep]
+    if len(keep) == 0:
+        return {}
+
+    order = np.lexsort((storm, codes))
+    segments, codes, storm, keep = (
+        segments[order],
+        codes[order],
+        storm[order],
+        keep[order],
+    )
+
+    # Consecutive segments of a storm within one category are joined into
+    # runs, and each run is emitted as a single polyline.
+    new_group = (np.diff(codes) != 0) | (np.diff(storm) != 0)
+    run_starts = np.flatnonzero(
+        np.concatenate([[True], new_group | (np.diff(keep) != 1)])
+    )
+    run_ends = np.concatenate([run_starts[1:], [len(keep)]])
+    points = np.insert(segments[:, 0], run_ends, segments[run_ends - 1, 1], axis=0)
+    point_starts = run_starts + np.arange(len(run_starts))
+    point_ends = run_ends + np.arange(1, len(run_ends) + 1)
+    group_starts = np.flatnonzero(np.concatenate([[True], new_group]))
+    run_group = np.searchsorted(group_starts, run_starts, side="right") - 1
+
+    positions = np.asarray(positions, dtype=np.int64)
+    ids = np.asarray(columns["ids"])[positions].tolist()
+    names = np.asarray(columns["names"])[positions].tolist()
+    seasons = np.asarray(columns["seasons"])[positions].tolist()
+
+    coordinates = points.tolist()
+    lines = [[] for _ in range(len(group_starts))]
+    for group, start, end in zip(
+        run_group.tolist(), point_starts.tolist(), point_ends.tolist()
+    ):
+        lines[group].append(coordinates[start:end])
+
+    collections = {}
+    for group, start in enumerate(group_starts.tolist()):
+        category = CATEGORIES[codes[start]]
+        i = storm[start]
+        if len(lines[group]) == 1:
+            geometry = {"type": "LineString", "coordinates": lines[group][0]}
+        else:
+            geometry = {"type": "MultiLineString", "coordinates": lines[group]}
+        collection = collections.setdefault(
+            category, {"type": "FeatureCollection", "features": []}
+        )
+        collection["features"].append(
+            {
+                "type": "Feature",
+                "geometry": geometry,
+                "properties": {
+                    "id": ids[i],
+                    "name": names[i],
+                    "season": seasons[i],
+                    "category": category,
+                    "style": {"color": CATEGORY_COLORS[category], "weight": weight},
+                },
+            }
+        )
+    return {
+        category: collections[category]
+        for category in CATEGORIES
+        if category in collections
+    }
+
+
+class TrackPrefetcher(Prefetcher):
+    """Prepares storm track GeoJSON on a background thread pool.
+
+    Keys are storm IDs or (name, year) tuples, and values are the track
+    GeoJSON and its bounds, kept in the LRU cache of geogo.prefetch.Prefetcher.
+
+    Args:
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        snapshot (bool, optional): Whether to read storms from the basin snapshot. Defaults to False.
+        weight (int, optional): Line width of the tracks. Defaults to 8.
+        max_workers (int, optional): Number of background threads. Defaults to 2.
+        cache_size (int, optional): Number of prepared tracks to keep. Defaults to 32.
+    """
+
+    def __init__(
+        self,
+        basin="north_atlantic",
+        source="hurdat",
+        snapshot=False,
+        weight=8,
+        max_workers=2,
+        cache_size=32,
+    ):
+        super().__init__(
+            self._build_track,
+            max_workers=max_workers,
+            cache_size=cache_size,
+            thread_name_prefix="geogo-tracks",
+        )
+        self.basin = basin
+        self.source = source
+        self.snapshot = snapshot
+        self.weight = weight
+
+    def _build_track(self, storm):
+        storm_dict = get_storm(storm, self.basin, self.source, self.snapshot).dict
+        return (
+            storm_track_geojson(storm_dict, weight=self.weight),
+            track_bounds(storm_dict["lon"], storm_dict["lat"]),
+        )
+
+
+class StormPlayback:
+    """Frames for replaying a storm track observation by observation.
+
+    Everything a frame needs is computed once: the colored track segments,
+    the position, color and radius of the current-position marker, and its
+    label. Frame i shows the first i segments, so stepping from one frame to
+    the next only adds or removes the segments in between and builds no
+    geometry.
+
+    Args:
+        storm_dict (dict): Storm data with "time", "lon", "lat", "vmax" and "mslp"
+            entries, such as tropycal's Storm.dict.
+        weight (int, optional): Line width of the track. Defaults to 8.
+    """
+
+    def __init__(self, storm_dict, weight=8):
+        import pandas as pd
+
+        self.weight = weight
+        features = storm_track_geojson(storm_dict, weight=weight)["features"]
+        self.segments = [
+            [[lat, lon] for lon, lat in feature["geometry"]["coordinates"]]
+            for feature in features
+        ]
+        self.segment_colors = [
+            feature["properties"]["style"]["color"] for feature in features
+        ]
+        lat = np.asarray(storm_dict["lat"], dtype=float)
+        lon = np.asarray(storm_dict["lon"], dtype=float)
+        vmax = np.asarray(storm_dict["vmax"], dtype=float)
+        mslp = np.asarray(storm_dict.get("mslp", np.full(len(vmax), np.nan)), float)
+        codes = classify_vmax(vmax)
+
+        self.locations = np.column_stack([lat, lon]).tolist()
+        self.categories = np.array(CATEGORIES)[codes].tolist()
+        self.colors = np.array(list(CATEGORY_COLORS.values()))[codes].tolist()
+        self.radii = (6 + 2 * codes).tolist()
+        times = pd.to_datetime(np.asarray(storm_dict["time"])).strftime(
+            "%Y-%m-%d %H:%M UTC"
+        )
+        self.labels = [
+            f"<b>{t}</b><br>{category} &middot; "
+            + ("n/a" if np.isnan(wind) else f"{wind:.0f} kt")
+            + ("" if np.isnan(pressure) else f" &middot; {pressure:.0f} hPa")
+            for t, category, wind, pressure in zip(times, self.categories, vmax, mslp)
+        ]
+        self.bounds = track_bounds(lon, lat)
+
+    def __len__(self):
+        return len(self.locations)
+
+    def changed_segments(self, previous, i):
+        """Lists the segments that differ between two frames.
+
+        Args:
+            previous (int): The observation index shown so far.
+            i (int): The observation index to show.
+
+        Returns:
+            list: (segment index, [[lat, lon], [lat, lon]]) pairs, with an empty
+                location list for segments to hide.
+        """
+        if i >= previous:
+            return [(j, self.segments[j]) for j in range(previous, i)]
+        return [(j, []) for j in range(i, previous)]
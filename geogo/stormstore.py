@@ -0,0 +1,548 @@
+"""The stormstore module keeps a columnar, memory-mapped snapshot of a storm basin on disk."""
+
+import datetime as dt
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+COLUMNS = ("time", "lat", "lon", "vmax", "mslp", "type")
+INDEX = ("ids", "names", "years", "seasons", "offsets")
+
+_stores = {}
+_stores_lock = threading.Lock()
+_store_locks = {}
+
+# The listing of the HURDAT files that tropycal reads by default.
+HURDAT_URL = "https://www.nhc.noaa.gov/data/hurdat/"
+
+# The IBTrACS file that tropycal reads by default.
+IBTRACS_URL = (
+    "https://www.ncei.noaa.gov/data/international-best-track-archive-for-climate-"
+    "stewardship-ibtracs/v04r01/access/csv/ibtracs.(basin).list.v04r01.csv"
+)
+IBTRACS_BASINS = {
+    "all": "ALL",
+    "australia": "ALL",
+    "east_pacific": "EP",
+    "north_atlantic": "NA",
+    "north_indian": "NI",
+    "south_atlantic": "SA",
+    "south_indian": "SI",
+    "south_pacific": "SP",
+    "west_pacific": "WP",
+}
+
+
+def default_store_dir():
+    """Returns the directory that holds storm snapshots.
+
+    The location can be overridden with the GEOGO_CACHE_DIR environment variable.
+
+    Returns:
+        str: The snapshot directory.
+    """
+    root = os.environ.get("GEOGO_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "geogo"
+    )
+    return os.path.join(root, "storms")
+
+
+def _tropycal_version():
+    try:
+        from importlib.metadata import version
+
+        return version("tropycal")
+    except Exception:
+        return None
+
+
+def latest_hurdat_urls(timeout=10):
+    """Looks up the latest HURDAT files in NHC's listing, as tropycal does.
+
+    Args:
+        timeout (float, optional): Timeout of the request in seconds. Defaults to 10.
+
+    Returns:
+        tuple: The URLs of the Atlantic and the Pacific file, either None if
+            it is not listed.
+    """
+    import re
+    import urllib.request
+
+    with urllib.request.urlopen(HURDAT_URL, timeout=timeout) as response:
+        page = response.read().decode("utf-8", "replace")
+
+    latest = {}
+    for name in re.findall(r'href="(hurdat2-[^"]+\.txt)"', page):
+        basin = "pacific" if "nepac" in name else "atlantic"
+        # Files end in their release date, as MMDDYY or MMDDYYYY.
+        digits = re.sub("[^0-9]", "", name.split("-")[-1])
+        if len(digits) == 6:
+            digits = f"{digits[:4]}20{digits[4:]}"
+        try:
+            date = dt.datetime.strptime(digits, "%m%d%Y")
+        except ValueError:
+            continue
+        if basin not in latest or date > latest[basin][0]:
+            latest[basin] = (date, HURDAT_URL + name)
+    return tuple(latest[b][1] if b in latest else None for b in ("atlantic", "pacific"))
+
+
+def source_urls(basin="north_atlantic", source="hurdat", dataset=None, timeout=10):
+    """Returns the files that tropycal reads the storms of a basin from.
+
+    Args:
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        dataset (tropycal.tracks.TrackDataset, optional): A dataset to take the files from.
+            Defaults to None, which looks up the latest HURDAT files.
+        timeout (float, optional): Timeout of the HURDAT lookup in seconds. Defaults to 10.
+
+    Returns:
+        list: The URLs or paths of the source files, empty if they are unknown.
+    """
+    if source == "hurdat":
+        if dataset is None:
+            atlantic, pacific = latest_hurdat_urls(timeout)
+        else:
+            atlantic = getattr(dataset, "atlantic_url", None)
+            pacific = getattr(dataset, "pacific_url", None)
+        urls = {
+            "north_atlantic": [atlantic],
+            "east_pacific": [pacific],
+            "both": [atlantic, pacific],
+        }.get(basin, [])
+    elif source == "ibtracs":
+        if dataset is None:
+            url = IBTRACS_URL
+        else:
+            url = getattr(dataset, "ibtracs_url", None)
+        urls = [url.replace("(basin)", IBTRACS_BASINS.get(basin, ""))] if url else []
+    else:
+        urls = []
+    return [str(url) for url in urls if url]
+
+
+def source_stamp(urls, timeout=10):
+    """Identifies the version of source files.
+
+    Remote files are identified by their URL and their ETag or Last-Modified
+    header, local files by their path, size and modification time. HURDAT
+    releases are published under new file names and IBTrACS files are
+    replaced in place, so either kind of update changes the stamp.
+
+    Args:
+        urls (list): The URLs or paths of the source files.
+        timeout (float, optional): Timeout of the HEAD requests in seconds. Defaults to 10.
+
+    Returns:
+        str or None: The stamp, or None if a file could not be reached.
+    """
+    import urllib.request
+
+    parts = []
+    for url in urls:
+        try:
+            if url.startswith(("http://", "https://")):
+                request = urllib.request.Request(url, method="HEAD")
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    version = response.headers.get("ETag") or response.headers.get(
+                        "Last-Modified"
+                    )
+            else:
+                stat = os.stat(url)
+                version = f"{stat.st_size}:{stat.st_mtime_ns}"
+        except (OSError, ValueError):
+            return None
+        parts.append(f"{url} {version or ''}")
+    return "\n".join(parts) or None
+
+
+def dataset_columns(dataset):
+    """Flattens a TrackDataset into observation columns and a storm index.
+
+    Storm dicts are read directly from ``dataset.data``, so no tropycal Storm
+    objects are built.
+
+    Args:
+        dataset (tropycal.tracks.TrackDataset): The dataset to flatten.
+
+    Returns:
+        dict: NumPy arrays for the observation columns (time, lat, lon, vmax,
+            mslp, type) and the storm index (ids, names, years, seasons and
+            offsets, where storm i spans offsets[i]:offsets[i + 1]).
+    """
+    keys = list(dataset.keys)
+    storms = [dataset.data[key] for key in keys]
+    lengths = np.array([len(storm["time"]) for storm in storms], dtype=np.int64)
+
+    return {
+        "time": np.array(
+            [t for storm in storms for t in storm["time"]], dtype="datetime64[s]"
+        ),
+        "lat": np.array(
+            [x for storm in storms for x in storm["lat"]], dtype=np.float64
+        ),
+        "lon": np.array(
+            [x for storm in storms for x in storm["lon"]], dtype=np.float64
+        ),
+        "vmax": np.array(
+            [x for storm in storms for x in storm["vmax"]], dtype=np.float64
+        ),
+        "mslp": np.array(
+            [x for storm in storms for x in storm["mslp"]], dtype=np.float64
+        ),
+        "type": np.array(
+            [str(x) for storm in storms for x in storm["type"]], dtype=str
+        ),
+        "ids": np.array(keys, dtype=str),
+        "names": np.array([str(storm["name"]) for storm in storms], dtype=str),
+        "years": np.array([storm["year"] for storm in storms], dtype=np.int64),
+        "seasons": np.array([storm["season"] for storm in storms], dtype=np.int64),
+        "offsets": np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+    }
+
+
+class StoredStorm:
+    """A storm read from a StormStore.
+
+    It exposes the parts of tropycal's Storm used by geogo: ``dict``, ``id``,
+    ``name`` and ``season``. Observation columns in ``dict`` are NumPy views
+    into the memory-mapped snapshot.
+    """
+
+    def __init__(self, storm_dict):
+        self.dict = storm_dict
+        self.id = storm_dict["id"]
+        self.name = storm_dict["name"]
+        self.season = storm_dict["season"]
+
+    def __repr__(self):
+        return f"<StoredStorm {self.id} {self.name} {self.season}>"
+
+
+class StormStore:
+    """A columnar snapshot of a TrackDataset basin.
+
+    Observations of every storm are concatenated into one ``.npy`` file per
+    column and an ``offsets`` array marks where each storm starts. Files are
+    memory-mapped, so opening a store is cheap and lookups only read the
+    slices they need.
+
+    Args:
+        path (str): The snapshot directory written by StormStore.build.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported storm store format in {path}")
+
+        self.columns = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in COLUMNS
+        }
+        for name in INDEX:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy")))
+        self._positions = {key: i for i, key in enumerate(self.ids.tolist())}
+        self._catalog = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return (
+            f"<StormStore {self.meta['basin']}/{self.meta['source']}: "
+            f"{len(self)} storms, {len(self.columns['time'])} observations>"
+        )
+
+    @property
+    def keys(self):
+        """list: The storm IDs in the store."""
+        return self.ids.tolist()
+
+    @property
+    def stamp(self):
+        """str: A digest of the snapshot contents."""
+        return self.meta["stamp"]
+
+    def is_stale(self, max_age_days=None, check_source_days=None):
+        """Checks whether the snapshot should be rebuilt.
+
+        A snapshot is stale when it was written by another tropycal version,
+        when it is older than max_age_days, or when its source files have
+        changed. The source is only checked when check_source_days is set, at
+        most every check_source_days, and the time of the last check is stored
+        with the snapshot. A source that cannot be reached, e.g. offline,
+        counts as unchanged.
+
+        Args:
+            max_age_days (float, optional): The maximum snapshot age. Defaults to None.
+            check_source_days (float, optional): Days between checks of the source files.
+                Defaults to None, which never checks them.
+
+        Returns:
+            bool: True if the snapshot should be rebuilt.
+        """
+        if self.meta.get("tropycal_version") != _tropycal_version():
+            return True
+        now = dt.datetime.now()
+        if max_age_days is not None:
+            created = dt.datetime.fromisoformat(self.meta["created"])
+            if now - created > dt.timedelta(days=max_age_days):
+                return True
+        if check_source_days is None:
+            return False
+
+        checked = self.meta.get("source_checked") or self.meta["created"]
+        if now - dt.datetime.fromisoformat(checked) < dt.timedelta(
+            days=check_source_days
+        ):
+            return False
+        try:
+            stamp = source_stamp(source_urls(self.meta["basin"], self.meta["source"]))
+        except Exception:
+            stamp = None
+        if stamp is None:
+            return False
+        if stamp != self.meta.get("source_stamp"):
+            return True
+        self.meta["source_checked"] = now.isoformat()
+        _write_meta(self.path, self.meta)
+        return False
+
+    def as_columns(self):
+        """Returns the snapshot in the layout of dataset_columns.
+
+        Returns:
+            dict: The memory-mapped observation columns and the storm index.
+        """
+        columns = dict(self.columns)
+        for name in INDEX:
+            columns[name] = getattr(self, name)
+        return columns
+
+    def catalog(self):
+        """Returns the storm catalogue of the snapshot.
+
+        The catalogue is built from the memory-mapped columns on first use.
+
+        Returns:
+            geogo.storms.StormCatalog: The storm catalogue.
+        """
+        from .storms import StormCatalog
+
+        if self._catalog is None:
+            self._catalog = StormCatalog.from_columns(self.as_columns())
+        return self._catalog
+
+    def get_storm_id(self, storm):
+        """Returns the storm ID given the storm name and year.
+
+        Args:
+            storm (tuple): Tuple containing the storm name and year (e.g., ("Matthew", 2016)).
+
+        Returns:
+            str or list: The storm ID, or a list of IDs if several storms match.
+        """
+        name, year = storm
+        matches = self.ids[(self.names == name.upper()) & (self.years == year)]
+        if len(matches) == 0:
+            raise RuntimeError("Storm not found")
+        if len(matches) == 1:
+            return str(matches[0])
+        return matches.tolist()
+
+    def storm_slice(self, key):
+        """Returns the observation slice of a storm.
+
+        Args:
+            key (str): The storm ID.
+
+        Returns:
+            slice: The storm's rows in the observation columns.
+        """
+        i = self._positions[key]
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def get_storm(self, storm):
+        """Retrieves a storm from the snapshot.
+
+        Args:
+            storm (str or tuple): The storm ID, or a tuple with the storm name and year.
+
+        Returns:
+            StoredStorm: The requested storm.
+        """
+        if isinstance(storm, str):
+            key = storm
+        elif isinstance(storm, tuple):
+            key = self.get_storm_id(storm)
+        else:
+            raise RuntimeError(
+                "Storm must be a string (e.g., 'AL052019') or tuple (e.g., ('Matthew',2016))."
+            )
+        if not isinstance(key, str):
+            raise RuntimeError(
+                f"Multiple IDs were identified for the requested storm: {', '.join(key)}"
+            )
+
+        i = self._positions[key]
+        rows = self.storm_slice(key)
+        storm_dict = {
+            "id": key,
+            "name": str(self.names[i]),
+            "year": int(self.years[i]),
+            "season": int(self.seasons[i]),
+            "basin": self.meta["basin"],
+            "source": self.meta["source"],
+        }
+        for name, column in self.columns.items():
+            storm_dict[name] = column[rows]
+        return StoredStorm(storm_dict)
+
+    @classmethod
+    def build(cls, dataset, path, basin="north_atlantic", source="hurdat", stamp=None):
+        """Writes a snapshot of a TrackDataset.
+
+        If a snapshot with the same contents already exists at path, only its
+        metadata is refreshed.
+
+        Args:
+            dataset (tropycal.tracks.TrackDataset): The dataset to convert.
+            path (str): The snapshot directory.
+            basin (str, optional): The basin of the dataset. Defaults to 'north_atlantic'.
+            source (str, optional): The source of the dataset. Defaults to 'hurdat'.
+            stamp (str, optional): The source_stamp of the dataset's files. Defaults to None.
+
+        Returns:
+            StormStore: The opened snapshot.
+        """
+        arrays = dataset_columns(dataset)
+
+        digest = hashlib.sha1()
+        for name in COLUMNS + INDEX:
+            digest.update(name.encode())
+            digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "basin": basin,
+            "source": source,
+            "tropycal_version": _tropycal_version(),
+            "created": dt.datetime.now().isoformat(),
+            "stamp": digest.hexdigest(),
+            "source_stamp": stamp,
+        }
+
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            try:
+                with open(meta_path) as f:
+                    unchanged = json.load(f).get("stamp") == meta["stamp"]
+            except ValueError:
+                unchanged = False
+            if unchanged:
+                _write_meta(path, meta)
+                return cls(path)
+
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+        return cls(path)
+
+
+def _write_meta(path, meta):
+    meta_path = os.path.join(path, "meta.json")
+    tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def get_storm_store(
+    basin="north_atlantic",
+    source="hurdat",
+    directory=None,
+    max_age_days=None,
+    rebuild=False,
+    check_source_days=None,
+):
+    """Opens the snapshot of a basin, building it from tropycal when needed.
+
+    Valid snapshots are memory-mapped without importing tropycal. Missing or
+    stale snapshots, including those whose source files have changed since
+    they were built when check_source_days is set, are rebuilt from the shared dataset cache. Opened stores
+    are kept for the rest of the session. Callers asking for the same basin
+    wait for a single build, while other basins are served meanwhile.
+
+    Args:
+        basin (str, optional): The basin of the storms. Defaults to 'north_atlantic'.
+        source (str, optional): The source of the storm data. Defaults to 'hurdat'.
+        directory (str, optional): The snapshot root directory. Defaults to default_store_dir().
+        max_age_days (float, optional): Rebuild snapshots older than this. Defaults to None.
+        rebuild (bool, optional): Whether to rebuild the snapshot from the source data. Defaults to False.
+        check_source_days (float, optional): Days between checks for changed source files.
+            Defaults to None, which never checks them.
+
+    Returns:
+        StormStore: The opened snapshot.
+    """
+    if directory is None:
+        directory = default_store_dir()
+    path = os.path.join(directory, f"{basin}_{source}")
+    key = (basin, source, os.path.abspath(path))
+
+    with _stores_lock:
+        build_lock = _store_locks.setdefault(key, threading.Lock())
+
+    with build_lock:
+        with _stores_lock:
+            store = _stores.get(key)
+        if store is None and not rebuild and os.path.exists(path):
+            try:
+                store = StormStore(path)
+            except (OSError, ValueError, KeyError):
+                store = None
+        if store is not None and (
+            rebuild or store.is_stale(max_age_days, check_source_days)
+        ):
+            store = None
+
+        if store is None:
+            from .storms import evict_track_dataset, get_track_dataset
+
+            os.makedirs(directory, exist_ok=True)
+            if rebuild or os.path.exists(path):
+                # The shared dataset may predate the change of the source.
+                evict_track_dataset(basin, source)
+            dataset = get_track_dataset(basin, source)
+            stamp = source_stamp(source_urls(basin, source, dataset))
+            store = StormStore.build(
+                dataset, path, basin=basin, source=source, stamp=stamp
+            )
+
+        with _stores_lock:
+            _stores[key] = store
+    return store
+
+
+def clear_storm_stores():
+    """Forgets the snapshots opened in this session. Files on disk are kept."""
+    with _stores_lock:
+        _stores.clear()
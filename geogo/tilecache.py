@@ -0,0 +1,333 @@
+"""The tilecache module runs a caching proxy for remote map tiles on localhost."""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from .server import LocalServer
+
+_proxy = None
+_proxy_lock = threading.Lock()
+
+TILE_PLACEHOLDERS = ("z", "x", "y", "s", "r")
+
+# Besides images, responses of these types are tiles worth caching.
+TILE_CONTENT_TYPES = ("application/x-protobuf", "application/vnd.mapbox-vector-tile")
+
+
+def default_tile_cache_dir():
+    """Returns the directory that holds cached tiles.
+
+    The location can be overridden with the GEOGO_CACHE_DIR environment variable.
+
+    Returns:
+        str: The tile cache directory.
+    """
+    root = os.environ.get("GEOGO_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "geogo"
+    )
+    return os.path.join(root, "tiles")
+
+
+class TileCacheProxy(LocalServer):
+    """A localhost proxy that caches XYZ tiles and WMS images on disk.
+
+    Remote URLs are registered with tile_url or wms_url, which return the
+    proxied URL to give to a map layer. Responses are stored on disk, and the
+    least recently used ones are evicted once the cache outgrows max_bytes.
+    The cache persists across sessions.
+
+    Args:
+        cache_dir (str, optional): The cache directory. Defaults to default_tile_cache_dir().
+        max_bytes (int, optional): The maximum size of the cache. Defaults to 512 MiB.
+        timeout (float, optional): Timeout of upstream requests in seconds. Defaults to 30.
+        **kwargs: Additional keyword arguments for LocalServer.
+    """
+
+    _tile_path = re.compile(r"^/t/(\w+)/(\d+)/(\d+)/(\d+)$")
+    _wms_path = re.compile(r"^/w/(\w+)$")
+
+    def __init__(self, cache_dir=None, max_bytes=512 * 2**20, timeout=30, **kwargs):
+        super().__init__(**kwargs)
+        self.cache_dir = cache_dir or default_tile_cache_dir()
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+        self._sources = {}
+        self._subdomains = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".tile"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self.size = sum(self._entries.values())
+        self._evict()
+
+    def _register(self, kind, url):
+        key = hashlib.sha1(f"{kind}:{url}".encode()).hexdigest()[:16]
+        self._sources[key] = url
+        return key
+
+    def tile_url(self, url, subdomains="abc"):
+        """Registers an XYZ tile URL template and returns its proxied template.
+
+        Args:
+            url (str): The remote template, e.g. "https://tile.openstreetmap.org/{z}/{x}/{y}.png".
+                Besides {z}, {x} and {y}, it may contain {s}, which is filled in
+                with one of the subdomains, and {r}, which is dropped.
+            subdomains (str or list, optional): The subdomains for {s}. Each tile uses
+                the same one as Leaflet would, so it is always cached under one URL.
+                Defaults to "abc".
+
+        Returns:
+            str: The template to give to the map layer.
+
+        Raises:
+            ValueError: If the template has other placeholders, such as {apikey}.
+        """
+        return f"{self.url}/t/{self._register_tiles(url, subdomains)}/{{z}}/{{x}}/{{y}}"
+
+    def _register_tiles(self, url, subdomains):
+        unsupported = set(re.findall(r"{([^{}]*)}", url)) - set(TILE_PLACEHOLDERS)
+        if unsupported:
+            names = ", ".join(f"{{{name}}}" for name in sorted(unsupported))
+            raise ValueError(
+                f"Unsupported placeholders {names} in tile URL {url}. Fill them "
+                "in first, e.g. with the build_url method of an xyzservices provider."
+            )
+        subdomains = list(subdomains or [])
+        if "{s}" in url and not subdomains:
+            raise ValueError(f"Tile URL {url} has {{s}} but no subdomains were given.")
+        key = self._register("t", url)
+        self._subdomains[key] = subdomains
+        return key
+
+    def wms_url(self, url):
+        """Registers a WMS endpoint and returns its proxied URL.
+
+        Query parameters the map adds to the proxied URL, including any it
+        already carries such as TIME, are forwarded to the endpoint.
+
+        Args:
+            url (str): The WMS service URL.
+
+        Returns:
+            str: The URL to give to the WMS layer.
+        """
+        return f"{self.url}/w/{self._register('w', url)}"
+
+    def upstream(self, path, query):
+        """Returns the remote URL of a proxied request, or None if it is unknown.
+
+        Args:
+            path (str): The proxied request path.
+            query (dict): The query parameters, as lists of values.
+
+        Returns:
+            str or None: The remote URL.
+        """
+        match = self._tile_path.match(path)
+        if match:
+            key, z, x, y = match.groups()
+            template = self._sources.get(key)
+            if template is None:
+                return None
+            url = template.replace("{z}", z).replace("{x}", x).replace("{y}", y)
+            subdomains = self._subdomains.get(key)
+            if subdomains:
+                url = url.replace(
+                    "{s}", subdomains[(int(x) + int(y)) % len(subdomains)]
+                )
+            return url.replace("{r}", "")
+
+        match = self._wms_path.match(path)
+        if match:
+            base = self._sources.get(match.group(1))
+            if base is None:
+                return None
+            params = sorted((k, v) for k, values in query.items() for v in values)
+            return f"{base}{'&' if '?' in base else '?'}{urlencode(params)}"
+        return None
+
+    def _file(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            try:
+                os.remove(self._file(name))
+            except OSError:
+                pass
+            self.size -= size
+            self.evictions += 1
+
+    def _read(self, name):
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        try:
+            with open(self._file(name), "rb") as f:
+                content_type, body = f.read().split(b"\n", 1)
+            os.utime(self._file(name))
+        except (OSError, ValueError):
+            with self._lock:
+                self.size -= self._entries.pop(name, 0)
+            return None
+        return content_type.decode(), body
+
+    def _write(self, name, content_type, body):
+        data = content_type.encode() + b"\n" + body
+        tmp = self._file(f"{name}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._file(name))
+        with self._lock:
+            self.size += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._evict()
+
+    def fetch(self, url):
+        """Returns a remote resource, from the cache when possible.
+
+        Only images and vector tiles are cached, so error pages and WMS
+        exceptions are fetched again on the next request.
+
+        Args:
+            url (str): The remote URL.
+
+        Returns:
+            tuple: The status code, the content type and the body.
+        """
+        import urllib.error
+        import urllib.request
+
+        from . import __version__
+
+        name = hashlib.sha1(url.encode()).hexdigest() + ".tile"
+        cached = self._read(name)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            return (200,) + cached
+
+        with self._lock:
+            self.misses += 1
+        request = urllib.request.Request(
+            url, headers={"User-Agent": f"geogo/{__version__}"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content_type = response.headers.get(
+                    "Content-Type", "application/octet-stream"
+                )
+                body = response.read()
+        except urllib.error.HTTPError as e:
+            with self._lock:
+                self.errors += 1
+            return e.code, "text/plain", b""
+        except OSError as e:
+            with self._lock:
+                self.errors += 1
+            return 502, "text/plain", str(e).encode()
+
+        # Error pages and WMS exceptions can come with a 200 status.
+        media_type = content_type.split(";")[0].strip().lower()
+        if media_type.startswith("image/") or media_type in TILE_CONTENT_TYPES:
+            self._write(name, content_type, body)
+        return 200, content_type, body
+
+    def handle(self, path, query, headers):
+        url = self.upstream(path, query)
+        if url is None:
+            return 404, {}, b""
+        status, content_type, body = self.fetch(url)
+        return status, {"Content-Type": content_type}, body
+
+    def seed(
+        self, url, bounds, zooms, max_workers=4, max_tiles=10000, subdomains="abc"
+    ):
+        """Downloads the tiles of an area into the cache.
+
+        Args:
+            url (str): The remote XYZ template.
+            bounds (tuple): ((south, west), (north, east)) of the area.
+            zooms (iterable): The zoom levels to download.
+            max_workers (int, optional): Number of parallel downloads. Defaults to 4.
+            max_tiles (int, optional): Refuse to seed more tiles than this. Defaults to 10000.
+            subdomains (str or list, optional): The subdomains for {s}. Defaults to "abc".
+
+        Returns:
+            int: The number of tiles that were downloaded or already cached.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        from .vectors import tiles_for_bounds
+
+        tiles = [tile for z in zooms for tile in tiles_for_bounds(bounds, z)]
+        if len(tiles) > max_tiles:
+            raise ValueError(
+                f"Seeding would download {len(tiles)} tiles, more than max_tiles={max_tiles}."
+            )
+        key = self._register_tiles(url, subdomains)
+        paths = [f"/t/{key}/{z}/{x}/{y}" for z, x, y in tiles]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            statuses = executor.map(
+                lambda path: self.fetch(self.upstream(path, {}))[0], paths
+            )
+            return sum(status == 200 for status in statuses)
+
+    def stats(self):
+        """Returns the cache statistics.
+
+        Returns:
+            dict: Hits, misses, upstream errors, evictions, the number of
+                cached entries and their size in bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.size,
+            }
+
+    def clear(self):
+        """Deletes every cached tile."""
+        with self._lock:
+            for name in self._entries:
+                try:
+                    os.remove(self._file(name))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self.size = 0
+
+
+def get_tile_cache(**kwargs):
+    """Returns the shared tile cache proxy, starting it on first use.
+
+    Args:
+        **kwargs: Keyword arguments for TileCacheProxy, used when it is created.
+
+    Returns:
+        TileCacheProxy: The running proxy.
+    """
+    global _proxy
+    with _proxy_lock:
+        if _proxy is None or not _proxy.running:
+            _proxy = TileCacheProxy(**kwargs).start()
+        return _proxy
@@ -0,0 +1,167 @@
+"""The timeseries module prepares frames for playing back time-enabled WMS layers."""
+
+import base64
+import datetime as dt
+import math
+from urllib.parse import urlencode
+
+from .prefetch import Prefetcher
+
+EARTH_RADIUS = 6378137.0
+MAX_LATITUDE = 85.0511287798
+
+
+def date_range(start, end, step_days=1):
+    """Lists the dates from start to end, inclusive.
+
+    Args:
+        start (str or datetime.date): The first date.
+        end (str or datetime.date): The last date.
+        step_days (int, optional): Days between dates. Defaults to 1.
+
+    Returns:
+        list: The dates as ISO strings.
+    """
+    if isinstance(start, str):
+        start = dt.date.fromisoformat(start)
+    if isinstance(end, str):
+        end = dt.date.fromisoformat(end)
+    days = (end - start).days
+    return [
+        (start + dt.timedelta(days=d)).isoformat()
+        for d in range(0, days + 1, step_days)
+    ]
+
+
+def mercator_bbox(bounds):
+    """Projects map bounds to a Web Mercator bounding box.
+
+    Args:
+        bounds (tuple): ((south, west), (north, east)) as reported by ipyleaflet.Map.bounds.
+
+    Returns:
+        tuple: (min_x, min_y, max_x, max_y) in metres.
+    """
+    (south, west), (north, east) = bounds
+
+    def project(lon, lat):
+        lat = math.radians(min(max(lat, -MAX_LATITUDE), MAX_LATITUDE))
+        return (
+            EARTH_RADIUS * math.radians(lon),
+            EARTH_RADIUS * math.log(math.tan(math.pi / 4 + lat / 2)),
+        )
+
+    min_x, min_y = project(west, south)
+    max_x, max_y = project(east, north)
+    return min_x, min_y, max_x, max_y
+
+
+class WMSFramePrefetcher(Prefetcher):
+    """Fetches WMS frames of a map view on a background thread pool.
+
+    A frame is one GetMap image of the whole view at one time. Keys are
+    (time, view) pairs, and frames are kept as data URLs in the LRU cache of
+    geogo.prefetch.Prefetcher, so stepping back and forth between cached
+    times needs no new requests.
+
+    Args:
+        url (str): The WMS service URL.
+        layers (str): The layers to request.
+        format (str, optional): The image format. Defaults to "image/png".
+        transparent (bool, optional): Whether to request transparent images. Defaults to True.
+        max_frames (int, optional): The number of frames to keep. Defaults to 16.
+        max_workers (int, optional): Number of background threads. Defaults to 4.
+        tile_cache (geogo.tilecache.TileCacheProxy, optional): Fetch frames through this
+            cache, so they also persist on disk. Defaults to None.
+        timeout (float, optional): Timeout of the requests in seconds. Defaults to 30.
+        **params: Additional GetMap parameters.
+    """
+
+    def __init__(
+        self,
+        url,
+        layers,
+        format="image/png",
+        transparent=True,
+        max_frames=16,
+        max_workers=4,
+        tile_cache=None,
+        timeout=30,
+        **params,
+    ):
+        super().__init__(
+            self._fetch,
+            max_workers=max_workers,
+            cache_size=max_frames,
+            thread_name_prefix="geogo-frames",
+        )
+        self.url = url
+        self.params = {
+            "service": "WMS",
+            "request": "GetMap",
+            "version": "1.1.1",
+            "layers": layers,
+            "styles": "",
+            "format": format,
+            "transparent": str(transparent).lower(),
+            "srs": "EPSG:3857",
+            **params,
+        }
+        self.tile_cache = tile_cache
+        self.timeout = timeout
+
+    @staticmethod
+    def view(bounds, size):
+        """Returns the key of a map view.
+
+        Args:
+            bounds (tuple): ((south, west), (north, east)) of the view.
+            size (tuple): The (width, height) of the view in pixels.
+
+        Returns:
+            tuple: The rounded Web Mercator bbox and the image size.
+        """
+        bbox = tuple(round(v, 1) for v in mercator_bbox(bounds))
+        return bbox, (int(size[0]), int(size[1]))
+
+    def frame_url(self, time, view):
+        """Returns the GetMap URL of a frame.
+
+        Args:
+            time (str): The TIME parameter.
+            view (tuple): The view key returned by view().
+
+        Returns:
+            str: The request URL.
+        """
+        bbox, (width, height) = view
+        params = dict(
+            self.params,
+            bbox=",".join(str(v) for v in bbox),
+            width=width,
+            height=height,
+            TIME=time,
+        )
+        separator = "&" if "?" in self.url else "?"
+        return f"{self.url}{separator}{urlencode(sorted(params.items()))}"
+
+    def _fetch(self, key):
+        import urllib.request
+
+        from . import __version__
+
+        url = self.frame_url(*key)
+        if self.tile_cache is not None:
+            status, content_type, body = self.tile_cache.fetch(url)
+            if status != 200:
+                raise OSError(f"WMS request failed with status {status}: {url}")
+        else:
+            request = urllib.request.Request(
+                url, headers={"User-Agent": f"geogo/{__version__}"}
+            )
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content_type = response.headers.get("Content-Type", "image/png")
+                body = response.read()
+        if not content_type.startswith("image/"):
+            raise OSError(f"WMS request returned {content_type}: {url}")
+        return f"data:{content_type};base64," + base64.b64encode(body).decode()
@@ -0,0 +1,429 @@
+"""The vectors module loads large vector files into a map piece by piece."""
+
+import math
+import threading
+import warnings
+from collections import OrderedDict
+
+import geopandas as gpd
+import pandas as pd
+
+MAX_LATITUDE = 85.0511287798
+
+
+def tile_bounds(x, y, z):
+    """Returns the lon/lat bounds of an XYZ tile.
+
+    Args:
+        x (int): The tile column.
+        y (int): The tile row, counted from the north.
+        z (int): The zoom level.
+
+    Returns:
+        tuple: (west, south, east, north) in degrees.
+    """
+    n = 2**z
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (x / n * 360 - 180, latitude(y + 1), (x + 1) / n * 360 - 180, latitude(y))
+
+
+def tiles_for_bounds(bounds, zoom):
+    """Lists the XYZ tiles that cover a map view.
+
+    Args:
+        bounds (tuple): ((south, west), (north, east)) as reported by ipyleaflet.Map.bounds.
+        zoom (int): The zoom level of the tiles.
+
+    Returns:
+        list: (z, x, y) tuples, row by row from the north-west corner.
+    """
+    (south, west), (north, east) = bounds
+    z = max(int(zoom), 0)
+    n = 2**z
+
+    def column(lon):
+        lon = min(max(lon, -180.0), 180.0)
+        return min(int((lon + 180) / 360 * n), n - 1)
+
+    def row(lat):
+        lat = math.radians(min(max(lat, -MAX_LATITUDE), MAX_LATITUDE))
+        y = (1 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2 * n
+        return min(max(int(y), 0), n - 1)
+
+    return [
+        (z, x, y)
+        for y in range(row(north), row(south) + 1)
+        for x in range(column(west), column(east) + 1)
+    ]
+
+
+class VectorTileReader:
+    """Reads the features of a vector file one XYZ tile at a time.
+
+    Each tile is read with a bounding-box filter, which GDAL answers from the
+    file's spatial index (the .qix of a shapefile or the R-tree of a
+    GeoPackage) when there is one. Tiles are reprojected to EPSG:4326 and kept
+    in a bounded LRU cache.
+
+    Args:
+        path (str): The vector file.
+        layer (str or int, optional): The layer to read. Defaults to the first layer.
+        columns (list, optional): The attribute columns to read. Defaults to all columns.
+        max_features (int, optional): The maximum number of features in one view. Defaults to 5000.
+        cache_size (int, optional): The number of tiles to keep. Defaults to 256.
+    """
+
+    def __init__(
+        self, path, layer=None, columns=None, max_features=5000, cache_size=256
+    ):
+        import pyogrio
+        from pyproj import CRS, Transformer
+
+        self.path = path
+        self.layer = layer
+        self.columns = columns
+        self.max_features = max_features
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        info = pyogrio.read_info(path, layer=layer, force_total_bounds=True)
+        self.crs = CRS.from_user_input(info["crs"]) if info["crs"] else None
+        self._transformer = None
+        if self.crs is not None and not self.crs.equals("EPSG:4326"):
+            self._transformer = Transformer.from_crs(
+                "EPSG:4326", self.crs, always_xy=True
+            )
+        self.total_bounds = info["total_bounds"]
+        if self.total_bounds is not None and self._transformer is not None:
+            self.total_bounds = Transformer.from_crs(
+                self.crs, "EPSG:4326", always_xy=True
+            ).transform_bounds(*self.total_bounds)
+
+    def __repr__(self):
+        return f"<VectorTileReader {self.path}: {len(self._cache)} cached tiles>"
+
+    def read_tile(self, tile):
+        """Reads the features that intersect a tile.
+
+        At most max_features + 1 features are read, so callers can tell when a
+        tile holds more features than a view may show.
+
+        Args:
+            tile (tuple): The (z, x, y) tile.
+
+        Returns:
+            geopandas.GeoDataFrame: The features in EPSG:4326, indexed by feature ID.
+        """
+        with self._lock:
+            gdf = self._cache.get(tile)
+            if gdf is not None:
+                self._cache.move_to_end(tile)
+                self.hits += 1
+                return gdf
+            self.misses += 1
+
+        bbox = tile_bounds(tile[1], tile[2], tile[0])
+        if self._transformer is not None:
+            bbox = self._transformer.transform_bounds(*bbox)
+        gdf = gpd.read_file(
+            self.path,
+            layer=self.layer,
+            columns=self.columns,
+            bbox=bbox,
+            rows=self.max_features + 1,
+            engine="pyogrio",
+            fid_as_index=True,
+        )
+        if gdf.crs is not None and not gdf.crs.equals("EPSG:4326"):
+            gdf = gdf.to_crs(epsg=4326)
+
+        with self._lock:
+            self._cache[tile] = gdf
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return gdf
+
+    def read_view(self, bounds, zoom):
+        """Reads the features in a map view.
+
+        Features that span several tiles are returned once.
+
+        Args:
+            bounds (tuple): ((south, west), (north, east)) as reported by ipyleaflet.Map.bounds.
+            zoom (int): The zoom level of the view.
+
+        Returns:
+            tuple: The features as a GeoDataFrame in EPSG:4326, and whether
+                they were cut off at max_features.
+        """
+        frames = [self.read_tile(tile) for tile in tiles_for_bounds(bounds, zoom)]
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return gpd.GeoDataFrame(geometry=[], crs="EPSG:4326"), False
+
+        gdf = pd.concat(frames)
+        gdf = gdf[~gdf.index.duplicated()]
+        truncated = len(gdf) > self.max_features
+        return gdf.iloc[: self.max_features], truncated
+
+    def clear(self):
+        """Empties the tile cache."""
+        with self._lock:
+            self._cache.clear()
+
+
+class ViewportLoader:
+    """Keeps a GeoJSON layer filled with the features in a map's view.
+
+    Map moves are debounced, so panning only triggers a read once the view has
+    settled. Reads run on a background thread and results are applied on the
+    kernel's event loop. Results of reads that were overtaken by a newer view
+    are dropped.
+
+    Args:
+        m (geogo.Map): The map to follow.
+        reader (VectorTileReader): The reader of the vector file.
+        layer (ipyleaflet.GeoJSON): The layer to fill.
+        style (dict, optional): Style applied to every feature. Defaults to None.
+        min_zoom (int, optional): Below this zoom the layer is left empty. Defaults to None.
+        debounce (float, optional): Seconds to wait after the last map move. Defaults to 0.25.
+    """
+
+    def __init__(self, m, reader, layer, style=None, min_zoom=None, debounce=0.25):
+        self.map = m
+        self.reader = reader
+        self.layer = layer
+        self.style = style
+        self.min_zoom = min_zoom
+        self.debounce = debounce
+        self.truncated = False
+        self._timer = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._apply_on_kernel = m._on_kernel_loop(self._apply)
+        m.observe(self.schedule, names=["bounds", "zoom"])
+
+    def schedule(self, change=None):
+        """Reloads the view once the map has stopped moving for the debounce delay."""
+        with self._lock:
+            self._generation += 1
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(
+                self.debounce, self._load, args=(self._generation,)
+            )
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _load(self, generation):
+        try:
+            geojson, truncated = self.read()
+        except Exception as e:
+            warnings.warn(f"Could not load {self.reader.path}: {e}")
+            return
+        self._apply_on_kernel(generation, geojson, truncated)
+
+    def _apply(self, generation, geojson, truncated):
+        if generation != self._generation:
+            return
+        self.truncated = truncated
+        self.layer.data = geojson
+
+    def read(self, bounds=None, zoom=None):
+        """Reads the features of a view as GeoJSON.
+
+        Args:
+            bounds (tuple, optional): ((south, west), (north, east)). Defaults to the map's bounds.
+            zoom (int, optional): The zoom level. Defaults to the map's zoom.
+
+        Returns:
+            tuple: The GeoJSON FeatureCollection and whether it was cut off at max_features.
+        """
+        from .common import gdf_to_geojson
+
+        bounds = bounds or self.map.bounds
+        zoom = self.map.zoom if zoom is None else zoom
+        if not bounds or (self.min_zoom is not None and zoom < self.min_zoom):
+            return {"type": "FeatureCollection", "features": []}, False
+        gdf, truncated = self.reader.read_view(bounds, zoom)
+        return gdf_to_geojson(gdf, style=self.style), truncated
+
+    def refresh(self, bounds=None, zoom=None):
+        """Reloads the view immediately.
+
+        Args:
+            bounds (tuple, optional): ((south, west), (north, east)). Defaults to the map's bounds.
+            zoom (int, optional): The zoom level. Defaults to the map's zoom.
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        geojson, truncated = self.read(bounds, zoom)
+        self._apply(generation, geojson, truncated)
+
+    def close(self):
+        """Stops following the map."""
+        self.map.unobserve(self.schedule, names=["bounds", "zoom"])
+        with self._lock:
+            self._generation += 1
+            if self._timer is not None:
+                self._timer.cancel()
+
+
+def zoom_tolerance(zoom, pixels=1.0):
+    """Returns the size of a number of screen pixels at a zoom level.
+
+    Args:
+        zoom (float): The zoom level.
+        pixels (float, optional): The number of 256-pixel tile pixels. Defaults to 1.0.
+
+    Returns:
+        float: The size in degrees of longitude.
+    """
+    return pixels * 360 / (256 * 2**zoom)
+
+
+def simplify_geometries(geometries, tolerance):
+    """Simplifies geometries without breaking their topology.
+
+    Polygon layers are simplified as a coverage, so neighbouring polygons keep
+    their shared edges. Other layers, and polygons that do not form a coverage,
+    are simplified one geometry at a time with topology preserved.
+
+    Args:
+        geometries (geopandas.GeoSeries): The geometries to simplify.
+        tolerance (float): The simplification tolerance in the units of the geometries.
+
+    Returns:
+        geopandas.GeoSeries: The simplified geometries.
+    """
+    import shapely
+
+    values = geometries.values
+    if len(values) and geometries.geom_type.isin(["Polygon", "MultiPolygon"]).all():
+        try:
+            simplified = shapely.coverage_simplify(values, tolerance)
+            return gpd.GeoSeries(simplified, index=geometries.index, crs=geometries.crs)
+        except shapely.errors.GEOSException:
+            pass
+    return geometries.simplify(tolerance, preserve_topology=True)
+
+
+class LevelOfDetailCache:
+    """Keeps simplified versions of a GeoDataFrame for a few zoom levels.
+
+    Each level is simplified to within a number of pixels at its zoom and
+    converted to GeoJSON once, even when several threads ask for it at the
+    same time. Versions are kept in a bounded LRU cache. A map
+    zoom uses the first level at or above it, and zooms beyond the last level
+    use the full geometries.
+
+    Args:
+        gdf (geopandas.GeoDataFrame): The features.
+        levels (tuple, optional): The zoom levels with simplified versions. Defaults to (3, 6, 9, 12).
+        pixels (float, optional): The simplification tolerance in pixels. Defaults to 1.0.
+        style (dict, optional): Style applied to every feature. Defaults to None.
+        cache_size (int, optional): The number of versions to keep. Defaults to 5.
+        precision (int, optional): The number of decimals to keep in coordinates. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        gdf,
+        levels=(3, 6, 9, 12),
+        pixels=1.0,
+        style=None,
+        cache_size=5,
+        precision=None,
+    ):
+        if gdf.crs is not None and not gdf.crs.equals("EPSG:4326"):
+            gdf = gdf.to_crs(epsg=4326)
+        self.gdf = gdf
+        self.levels = tuple(sorted(levels))
+        self.pixels = pixels
+        self.style = style
+        self.cache_size = cache_size
+        self.precision = precision
+        self._cache = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<LevelOfDetailCache levels={self.levels} cached={list(self._cache)}>"
+
+    def level(self, zoom):
+        """Returns the level used at a zoom.
+
+        Args:
+            zoom (float): The map zoom.
+
+        Returns:
+            int or None: The zoom level of the simplified version, or None for the full geometries.
+        """
+        for level in self.levels:
+            if zoom <= level:
+                return level
+        return None
+
+    def _build(self, level):
+        from .common import gdf_to_geojson
+
+        gdf = self.gdf
+        if level is not None:
+            tolerance = zoom_tolerance(level, self.pixels)
+            gdf = gdf.set_geometry(simplify_geometries(gdf.geometry, tolerance))
+        return gdf_to_geojson(gdf, style=self.style, precision=self.precision)
+
+    def geojson(self, zoom):
+        """Returns the GeoJSON to show at a zoom.
+
+        Args:
+            zoom (float): The map zoom.
+
+        Returns:
+            dict: The GeoJSON FeatureCollection.
+        """
+        from concurrent.futures import Future
+
+        level = self.level(zoom)
+        with self._lock:
+            if level in self._cache:
+                self._cache.move_to_end(level)
+                return self._cache[level]
+            # Callers that need a level being built wait for that build.
+            future = self._building.get(level)
+            waiting = future is not None
+            if not waiting:
+                future = self._building[level] = Future()
+        if waiting:
+            return future.result()
+
+        try:
+            geojson = self._build(level)
+        except BaseException as e:
+            with self._lock:
+                del self._building[level]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._cache[level] = geojson
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            del self._building[level]
+        future.set_result(geojson)
+        return geojson
+
+    def precompute(self):
+        """Builds the simplified levels that fit in the cache, coarsest first.
+
+        The full geometries are only converted when a zoom beyond the last
+        level needs them.
+        """
+        for level in self.levels[: self.cache_size]:
+            self.geojson(level)
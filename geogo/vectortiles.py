@@ -0,0 +1,333 @@
+"""The vectortiles module serves GeoDataFrames as Mapbox Vector Tiles from localhost."""
+
+import math
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .server import LocalServer
+
+EARTH_HALF_CIRCUMFERENCE = 20037508.342789244
+
+GEOMETRY_TYPES = {"Point": 1, "LineString": 2, "Polygon": 3}
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field(number, wire_type, payload):
+    key = _varint(number << 3 | wire_type)
+    if wire_type == 2:
+        return key + _varint(len(payload)) + payload
+    return key + payload
+
+
+def _packed(number, values):
+    return _field(number, 2, b"".join(_varint(int(v)) for v in values))
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _encode_value(value):
+    import struct
+
+    if isinstance(value, str):
+        return _field(1, 2, value.encode())
+    if isinstance(value, bool):
+        return _field(7, 0, _varint(int(value)))
+    if isinstance(value, int):
+        return _field(6, 0, _varint(_zigzag(value) & 0xFFFFFFFFFFFFFFFF))
+    if isinstance(value, float):
+        return _field(3, 1, struct.pack("<d", value))
+    return _field(1, 2, str(value).encode())
+
+
+def _command(command_id, count):
+    return command_id & 0x7 | count << 3
+
+
+def _geometry_commands(geometry):
+    """Encodes a geometry in integer tile coordinates as MVT draw commands."""
+    if geometry.geom_type.startswith("Multi"):
+        parts = list(geometry.geoms)
+    else:
+        parts = [geometry]
+    geom_type = parts[0].geom_type
+
+    rings = []
+    if geom_type == "Point":
+        points = np.array([part.coords[0] for part in parts], dtype=np.int64)
+        rings.append((points, "points"))
+    elif geom_type == "LineString":
+        rings.extend(
+            (np.asarray(part.coords, dtype=np.int64), "line") for part in parts
+        )
+    else:
+        for part in parts:
+            rings.append((np.asarray(part.exterior.coords, dtype=np.int64), "ring"))
+            rings.extend(
+                (np.asarray(hole.coords, dtype=np.int64), "ring")
+                for hole in part.interiors
+            )
+
+    commands = []
+    cursor = np.zeros(2, dtype=np.int64)
+    for coords, kind in rings:
+        coords = coords[:, :2]
+        if kind == "points":
+            deltas = np.diff(np.vstack([cursor, coords]), axis=0)
+            commands.append(_command(1, len(coords)))
+            commands.extend(_zigzag(deltas).ravel().tolist())
+            cursor = coords[-1]
+            continue
+
+        if kind == "ring":
+            coords = coords[:-1]
+        # LineTo must move, so repeated points are dropped.
+        keep = np.ones(len(coords), dtype=bool)
+        keep[1:] = np.any(coords[1:] != coords[:-1], axis=1)
+        coords = coords[keep]
+        if len(coords) < (3 if kind == "ring" else 2):
+            continue
+
+        deltas = _zigzag(np.diff(np.vstack([cursor, coords]), axis=0))
+        commands.append(_command(1, 1))
+        commands.extend(deltas[0].tolist())
+        commands.append(_command(2, len(coords) - 1))
+        commands.extend(deltas[1:].ravel().tolist())
+        if kind == "ring":
+            commands.append(_command(7, 1))
+        cursor = coords[-1]
+
+    return GEOMETRY_TYPES[geom_type], commands
+
+
+def encode_layer(name, geometries, properties=None, ids=None, extent=4096):
+    """Encodes features as a Mapbox Vector Tile layer.
+
+    Args:
+        name (str): The layer name.
+        geometries (list): Shapely geometries in integer tile coordinates, with y pointing down.
+        properties (list, optional): A dict of attributes per feature. Defaults to None.
+        ids (list, optional): An unsigned integer ID per feature. Defaults to None.
+        extent (int, optional): The tile extent. Defaults to 4096.
+
+    Returns:
+        bytes: The encoded layer, ready to be concatenated into a tile.
+    """
+    keys, values = {}, {}
+    features = []
+    for i, geometry in enumerate(geometries):
+        if geometry is None or geometry.is_empty:
+            continue
+        if geometry.geom_type == "GeometryCollection":
+            continue
+        geom_type, commands = _geometry_commands(geometry)
+        if not commands:
+            continue
+
+        tags = []
+        for key, value in (properties[i] if properties else {}).items():
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            encoded = _encode_value(value)
+            tags.append(values.setdefault(encoded, len(values)))
+
+        feature = b""
+        if ids is not None:
+            feature += _field(1, 0, _varint(int(ids[i])))
+        if tags:
+            feature += _packed(2, tags)
+        feature += _field(3, 0, _varint(geom_type))
+        feature += _packed(4, commands)
+        features.append(_field(2, 2, feature))
+
+    layer = _field(15, 0, _varint(2)) + _field(1, 2, name.encode())
+    layer += b"".join(features)
+    layer += b"".join(_field(3, 2, key.encode()) for key in keys)
+    layer += b"".join(_field(4, 2, value) for value in values)
+    layer += _field(5, 0, _varint(extent))
+    return _field(3, 2, layer)
+
+
+def mercator_tile_bounds(x, y, z):
+    """Returns the Web Mercator bounds of an XYZ tile.
+
+    Args:
+        x (int): The tile column.
+        y (int): The tile row, counted from the north.
+        z (int): The zoom level.
+
+    Returns:
+        tuple: (min_x, min_y, max_x, max_y) in metres.
+    """
+    size = 2 * EARTH_HALF_CIRCUMFERENCE / 2**z
+    min_x = -EARTH_HALF_CIRCUMFERENCE + x * size
+    max_y = EARTH_HALF_CIRCUMFERENCE - y * size
+    return min_x, max_y - size, min_x + size, max_y
+
+
+class VectorTileServer(LocalServer):
+    """Serves a GeoDataFrame as Mapbox Vector Tiles on localhost.
+
+    The frame is projected to Web Mercator once and indexed with an STRtree.
+    Each tile is cut from the features its bounds select, clipped, simplified
+    and snapped to the tile grid, then encoded. Encoded tiles are kept in an
+    LRU cache. Tiles are served at ``{url}/{z}/{x}/{y}.pbf``.
+
+    Args:
+        gdf (geopandas.GeoDataFrame): The features to serve.
+        layer_name (str, optional): The name of the layer in the tiles. Defaults to "features".
+        columns (list, optional): The attribute columns to include. Defaults to all columns.
+        extent (int, optional): The tile extent. Defaults to 4096.
+        buffer (int, optional): Tile buffer in tile units, so that clipped edges do not show. Defaults to 64.
+        simplify (float, optional): Simplification tolerance in tile units. Defaults to 8.
+        cache_size (int, optional): The number of encoded tiles to keep. Defaults to 512.
+        **kwargs: Additional keyword arguments for LocalServer.
+    """
+
+    _path = re.compile(r"^/(\d+)/(\d+)/(\d+)\.(pbf|mvt)$")
+
+    def __init__(
+        self,
+        gdf,
+        layer_name="features",
+        columns=None,
+        extent=4096,
+        buffer=64,
+        simplify=8,
+        cache_size=512,
+        **kwargs,
+    ):
+        import shapely
+
+        super().__init__(**kwargs)
+        if gdf.crs is not None and not gdf.crs.equals("EPSG:3857"):
+            gdf = gdf.to_crs(epsg=3857)
+        if columns is None:
+            columns = [c for c in gdf.columns if c != gdf.geometry.name]
+
+        self.layer_name = layer_name
+        self.extent = extent
+        self.buffer = buffer
+        self.simplify = simplify
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.geometries = gdf.geometry.values.to_numpy()
+        self.tree = shapely.STRtree(self.geometries)
+        self._columns = {name: gdf[name].tolist() for name in columns}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        bounds = shapely.total_bounds(self.geometries)
+        self.bounds = None
+        if np.isfinite(bounds).all():
+            from pyproj import Transformer
+
+            self.bounds = Transformer.from_crs(
+                "EPSG:3857", "EPSG:4326", always_xy=True
+            ).transform_bounds(*bounds)
+
+    @property
+    def tile_url(self):
+        """str: The XYZ URL template of the tiles."""
+        return f"{self.url}/{{z}}/{{x}}/{{y}}.pbf"
+
+    def tile(self, z, x, y):
+        """Returns an encoded tile.
+
+        Args:
+            z (int): The zoom level.
+            x (int): The tile column.
+            y (int): The tile row, counted from the north.
+
+        Returns:
+            bytes: The Mapbox Vector Tile. Tiles without features are empty.
+        """
+        import shapely
+
+        key = (z, x, y)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+
+        min_x, min_y, max_x, max_y = mercator_tile_bounds(x, y, z)
+        scale = self.extent / (max_x - min_x)
+        pad = self.buffer / scale
+        rows = np.sort(
+            self.tree.query(
+                shapely.box(min_x - pad, min_y - pad, max_x + pad, max_y + pad)
+            )
+        )
+
+        data = b""
+        if len(rows):
+            geometries = shapely.clip_by_rect(
+                self.geometries[rows],
+                min_x - pad,
+                min_y - pad,
+                max_x + pad,
+                max_y + pad,
+            )
+            geometries = shapely.transform(
+                geometries,
+                lambda c: np.column_stack(
+                    ((c[:, 0] - min_x) * scale, (max_y - c[:, 1]) * scale)
+                ),
+            )
+            if self.simplify:
+                geometries = shapely.simplify(
+                    geometries, self.simplify, preserve_topology=True
+                )
+            geometries = shapely.orient_polygons(shapely.set_precision(geometries, 1.0))
+            keep = ~shapely.is_empty(geometries)
+            rows, geometries = rows[keep], geometries[keep]
+            if len(rows):
+                properties = [
+                    {name: values[row] for name, values in self._columns.items()}
+                    for row in rows
+                ]
+                data = encode_layer(
+                    self.layer_name,
+                    geometries,
+                    properties=properties,
+                    ids=rows,
+                    extent=self.extent,
+                )
+
+        with self._lock:
+            self._cache[key] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+    def handle(self, path, query, headers):
+        match = self._path.match(path)
+        if match is None:
+            return 404, {}, b""
+        z, x, y = (int(v) for v in match.groups()[:3])
+        if x >= 2**z or y >= 2**z:
+            return 404, {}, b""
+        return (
+            200,
+            {"Content-Type": "application/x-protobuf", "Cache-Control": "max-age=3600"},
+            self.tile(z, x, y),
+        )
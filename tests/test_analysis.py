@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.analysis` module."""
+
+import datetime as dt
+import types
+import unittest
+from unittest import mock
+
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import box
+
+from geogo import analysis, storms
+
+
+def make_dataset():
+    """Builds a one-storm stand-in for a tropycal TrackDataset."""
+    data = {
+        "AL012005": {
+            "id": "AL012005",
+            "name": "ALPHA",
+            "year": 2005,
+            "season": 2005,
+            "time": [dt.datetime(2005, 8, 1, 6 * i) for i in range(3)],
+            "lon": [-30.0, -20.0, -10.0],
+            "lat": [0.0, 0.0, 0.0],
+            "vmax": [40.0, 80.0, 80.0],
+            "mslp": [1000.0, 990.0, 990.0],
+            "type": ["TS", "HU", "HU"],
+        }
+    }
+    storm = mock.Mock()
+    storm.dict = data["AL012005"]
+    return types.SimpleNamespace(
+        keys=list(data), data=data, get_storm=lambda key: storm
+    )
+
+
+class TestAnalysis(unittest.TestCase):
+    """Tests for `geogo.analysis` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        # ALPHA runs east along the equator, BETA runs north along 10 W.
+        self.columns = {
+            "time": np.array(
+                [
+                    "2005-08-01T00",
+                    "2005-08-01T06",
+                    "2005-08-01T12",
+                    "2006-09-01T00",
+                    "2006-09-01T06",
+                ],
+                dtype="datetime64[s]",
+            ),
+            "lon": np.array([-30.0, -20.0, -10.0, -10.0, -10.0]),
+            "lat": np.array([0.0, 0.0, 0.0, 5.0, 15.0]),
+            "vmax": np.array([40.0, 60.0, 80.0, 40.0, 60.0]),
+            "ids": np.array(["AL012005", "AL022006"]),
+            "offsets": np.array([0, 3, 5]),
+        }
+        self.index = analysis.StormIndex(self.columns)
+
+    def test_storms_near(self):
+        """Test that proximity is measured to segments, not observations."""
+        self.assertEqual(len(self.index), 3)
+        # 1 degree north of the middle of ALPHA's first segment is ~111 km away.
+        self.assertEqual(self.index.storms_near((-25.0, 1.0), 120), ["AL012005"])
+        self.assertEqual(self.index.storms_near((-25.0, 1.0), 100), [])
+        self.assertEqual(self.index.storms_near((-10.5, 6.0), 100), ["AL022006"])
+
+    def test_storms_intersecting(self):
+        """Test region and time window queries."""
+        region = box(-12.0, -1.0, -8.0, 10.0)
+        self.assertEqual(
+            self.index.storms_intersecting(region), ["AL012005", "AL022006"]
+        )
+        self.assertEqual(
+            self.index.storms_intersecting(region, start="2006-01-01"), ["AL022006"]
+        )
+        self.assertEqual(self.index.storms_in_window(end="2005-12-31"), ["AL012005"])
+
+    def test_track_density(self):
+        """Test that observations are binned and the grid is cached."""
+        with mock.patch.object(storms, "get_storm_columns", return_value=self.columns):
+            with mock.patch.object(
+                storms,
+                "get_storm_catalog",
+                return_value=storms.StormCatalog.from_columns(
+                    dict(
+                        self.columns,
+                        mslp=self.columns["vmax"],
+                        names=np.array(["ALPHA", "BETA"]),
+                        seasons=np.array([2005, 2006]),
+                    )
+                ),
+            ):
+                try:
+                    grid, bounds = analysis.track_density(resolution=5.0)
+                    again = analysis.track_density(resolution=5.0)
+                    hours, _ = analysis.track_density(
+                        resolution=5.0, weight="hours", years=2005
+                    )
+                    self.columns["offsets"] = self.columns["offsets"].copy()
+                    rebuilt = analysis.track_density(resolution=5.0)
+                finally:
+                    analysis.clear_track_densities()
+
+        self.assertIs(again[0], grid)
+        self.assertIsNot(rebuilt[0], grid)
+        self.assertEqual(bounds, [[0.0, -30.0], [20.0, -5.0]])
+        self.assertEqual(grid.sum(), 5)
+        # Northernmost row first: BETA's last fix at 15 N lands in row 0.
+        self.assertEqual(grid[0, 4], 1)
+        self.assertEqual(hours.sum(), 12)
+
+    def test_storm_exposure(self):
+        """Test that swaths are joined against polygons."""
+        dataset = make_dataset()
+        polygons = gpd.GeoDataFrame(
+            {"name": ["near", "far"]},
+            geometry=[box(-25.5, 0.5, -24.5, 1.5), box(-25.5, 5.0, -24.5, 6.0)],
+            crs="EPSG:4326",
+        )
+        with mock.patch.object(storms, "_build_track_dataset", return_value=dataset):
+            try:
+                table = analysis.storm_exposure(polygons, max_workers=1)
+                wide = analysis.storm_exposure(polygons, radius_km=700, max_workers=1)
+            finally:
+                storms.clear_track_datasets()
+
+        self.assertEqual(table["polygon"].tolist(), [0])
+        self.assertEqual(table["id"].tolist(), ["AL012005"])
+        self.assertEqual(table["category"].tolist(), ["TS"])
+        self.assertEqual(wide["polygon"].tolist(), [0, 1])
+
+    def test_storm_exposure_workers(self):
+        """Test that worker processes find the same exposure as one process."""
+        from geogo import Map
+
+        dataset = make_dataset()
+        dataset.data["AL022006"] = dict(
+            dataset.data["AL012005"],
+            id="AL022006",
+            name="BETA",
+            year=2006,
+            season=2006,
+            lon=[-25.0, -25.0, -25.0],
+            lat=[3.0, 5.5, 8.0],
+        )
+        dataset.keys = list(dataset.data)
+        polygons = gpd.GeoDataFrame(
+            {"name": ["near", "far"]},
+            geometry=[box(-25.5, 0.5, -24.5, 1.5), box(-25.5, 5.0, -24.5, 6.0)],
+            index=[7, 7],
+        )
+        with mock.patch.object(storms, "_build_track_dataset", return_value=dataset):
+            try:
+                single = analysis.storm_exposure(polygons, chunk_size=1, max_workers=1)
+                pooled = analysis.storm_exposure(polygons, chunk_size=1, max_workers=2)
+                table = Map().add_storm_exposure(polygons, max_workers=1)
+            finally:
+                storms.clear_track_datasets()
+
+        self.assertEqual(single.to_dict("records"), pooled.to_dict("records"))
+        self.assertEqual(single["id"].tolist(), ["AL012005", "AL022006"])
+        self.assertEqual(single["polygon"].tolist(), [7, 7])
+        self.assertEqual(table["polygon"].tolist(), [7, 7])
+        self.assertEqual(table["id"].tolist(), single["id"].tolist())
+
+    def test_storm_wind_swath(self):
+        """Test that the chunked swath matches a single-window swath."""
+        import os
+        import shutil
+        import tempfile
+
+        import rasterio
+
+        directory = tempfile.mkdtemp()
+        paths = [os.path.join(directory, f"{n}.tif") for n in ("small", "large")]
+        with mock.patch.object(
+            storms, "_build_track_dataset", return_value=make_dataset()
+        ):
+            try:
+                for path, chunk_size in zip(paths, (37, 4096)):
+                    analysis.storm_wind_swath(
+                        "AL012005", path, resolution_km=20, chunk_size=chunk_size
+                    )
+                arrays = []
+                for path in paths:
+                    with rasterio.open(path) as src:
+                        arrays.append(src.read(1))
+            finally:
+                storms.clear_track_datasets()
+                shutil.rmtree(directory)
+
+        np.testing.assert_array_equal(arrays[0], arrays[1])
+        self.assertAlmostEqual(float(arrays[0].max()), 80.0, delta=5)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.batch` module."""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from geogo.batch import export_storms, format_summary
+from geogo.cli import main
+from geogo.stormstore import StormStore
+
+from .test_stormstore import make_dataset
+
+
+class TestBatch(unittest.TestCase):
+    """Tests for `batch` module."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.snapshots = os.path.join(self.directory, "storms")
+        self.output = os.path.join(self.directory, "maps")
+        StormStore.build(
+            make_dataset(), os.path.join(self.snapshots, "north_atlantic_hurdat")
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_export_storms(self):
+        results = export_storms(
+            ["AL012005", ("Beta", 2006)],
+            self.output,
+            max_workers=2,
+            directory=self.snapshots,
+        )
+        self.assertEqual([r["storm"] for r in results], ["AL012005", "AL022006"])
+        self.assertEqual([r["status"] for r in results], ["written", "written"])
+        with open(results[1]["path"]) as f:
+            self.assertIn("[[10.0, -43.0], [13.0, -40.0]]", f.read())
+        self.assertEqual(
+            sorted(os.listdir(self.output)), ["AL012005.html", "AL022006.html"]
+        )
+
+        os.remove(results[0]["path"])
+        results = export_storms(
+            ["AL012005", "AL022006", "AL992005", ("Gamma", 2007)],
+            self.output,
+            max_workers=1,
+            directory=self.snapshots,
+        )
+        self.assertEqual(
+            [r["status"] for r in results], ["written", "skipped", "failed", "failed"]
+        )
+        self.assertEqual(results[3]["storm"], "Gamma 2007")
+        summary = format_summary(results)
+        self.assertIn("2 failed, 1 skipped, 1 written", summary)
+
+    def test_failed_save_leaves_no_file(self):
+        from geogo import batch, foliummap
+
+        store = StormStore(os.path.join(self.snapshots, "north_atlantic_hurdat"))
+        path = os.path.join(self.directory, "AL012005.html")
+
+        def save(m, outfile, **kwargs):
+            with open(outfile, "w") as f:
+                f.write("<html>")
+            raise OSError("disk full")
+
+        with mock.patch.object(foliummap.Map, "save", save):
+            with self.assertRaises(OSError):
+                batch.export_storm("AL012005", path, store)
+        self.assertEqual(os.listdir(self.directory), ["storms"])
+
+    def test_cli(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            status = main(
+                [
+                    "export-storms",
+                    "--season",
+                    "2005",
+                    "-o",
+                    self.output,
+                    "-j",
+                    "1",
+                    "--snapshot-dir",
+                    self.snapshots,
+                ]
+            )
+        self.assertEqual(status, 0)
+        self.assertIn("AL012005", out.getvalue())
+        self.assertEqual(os.listdir(self.output), ["AL012005.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
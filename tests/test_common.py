@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.common` module."""
+
+import unittest
+
+import geopandas as gpd
+from shapely.geometry import LineString, Point, Polygon
+
+from geogo.common import geojson_bounds
+
+
+class TestGeojsonBounds(unittest.TestCase):
+    """Tests for `geojson_bounds`."""
+
+    def test_matches_total_bounds(self):
+        """Scanned bounds match the GeoDataFrame bounds."""
+        gdf = gpd.GeoDataFrame(
+            geometry=[
+                Point(-80, 25),
+                LineString([(-90, 30), (-85, 35)]),
+                Polygon([(-70, 20), (-60, 20), (-60, 40), (-70, 20)]),
+            ],
+            crs="EPSG:4326",
+        )
+        self.assertEqual(geojson_bounds(gdf.__geo_interface__), list(gdf.total_bounds))
+
+    def test_bbox_and_empty(self):
+        """A bbox member is used as is and empty data has no bounds."""
+        self.assertEqual(
+            geojson_bounds({"type": "Feature", "bbox": [0, 1, 5, 2, 3, 9]}),
+            [0, 1, 2, 3],
+        )
+        geometry = {
+            "type": "GeometryCollection",
+            "geometries": [{"type": "Point", "coordinates": [1.5, -2]}],
+        }
+        self.assertEqual(geojson_bounds(geometry), [1.5, -2, 1.5, -2])
+        self.assertIsNone(geojson_bounds({"type": "FeatureCollection", "features": []}))
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.encoding` module."""
+
+import json
+import unittest
+
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import LineString, MultiPolygon, Point, Polygon, shape
+
+from geogo.encoding import round_coordinates, to_topojson
+
+
+def decode_topojson(topology, name="data"):
+    """Decodes a TopoJSON object into GeoJSON geometries."""
+    scale = np.array(topology["transform"]["scale"])
+    translate = np.array(topology["transform"]["translate"])
+    arcs = [np.cumsum(arc, axis=0) * scale + translate for arc in topology["arcs"]]
+
+    def line(refs):
+        points = []
+        for ref in refs:
+            arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+            points.extend(arc[1:] if points else arc)
+        return [p.tolist() for p in points]
+
+    def geometry(obj):
+        kind = obj["type"]
+        if kind == "Point":
+            return {
+                "type": kind,
+                "coordinates": (obj["coordinates"] * scale + translate).tolist(),
+            }
+        if kind == "LineString":
+            return {"type": kind, "coordinates": line(obj["arcs"])}
+        if kind == "Polygon":
+            return {"type": kind, "coordinates": [line(r) for r in obj["arcs"]]}
+        if kind == "MultiPolygon":
+            return {
+                "type": kind,
+                "coordinates": [[line(r) for r in p] for p in obj["arcs"]],
+            }
+        raise ValueError(kind)
+
+    return [geometry(g) for g in topology["objects"][name]["geometries"]]
+
+
+class TestTopojson(unittest.TestCase):
+    """Tests for `to_topojson`."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        cells = []
+        # Offsets with full-precision floats, as in real data.
+        x0, y0 = -80 + np.pi / 10, 25 + np.e / 10
+        for i in range(4):
+            for j in range(4):
+                x, y = x0 + i, y0 + j
+                cells.append(Polygon([(x, y), (x + 1, y), (x + 1, y + 1), (x, y + 1)]))
+        # Densify the shared edges so there is something to share.
+        cells = [cell.segmentize(0.01) for cell in cells]
+        self.gdf = gpd.GeoDataFrame(
+            {"cell": range(16), "value": rng.uniform(size=16)},
+            geometry=cells,
+            crs="EPSG:4326",
+        )
+
+    def test_roundtrip(self):
+        """Decoded geometries match the input within the precision."""
+        gdf = gpd.GeoDataFrame(
+            {"name": ["p", "l", "m"]},
+            geometry=[
+                Point(-80.123456, 25.5),
+                LineString([(0, 0), (1, 1), (2, 0)]),
+                MultiPolygon(
+                    [
+                        Polygon([(0, 0), (1, 0), (1, 1), (0, 0)]),
+                        Polygon(
+                            [(5, 5), (9, 5), (9, 9), (5, 9)],
+                            [[(6, 6), (7, 6), (7, 7), (6, 6)]],
+                        ),
+                    ]
+                ),
+            ],
+            crs="EPSG:4326",
+        )
+        topology = to_topojson(gdf, precision=4)
+        decoded = decode_topojson(topology)
+        for original, geometry in zip(gdf.geometry, decoded):
+            self.assertTrue(shape(geometry).equals_exact(original, 1e-4))
+        geometries = topology["objects"]["data"]["geometries"]
+        self.assertEqual([g["properties"]["name"] for g in geometries], ["p", "l", "m"])
+
+        decoded = decode_topojson(to_topojson(self.gdf))
+        for original, geometry in zip(self.gdf.geometry, decoded):
+            self.assertAlmostEqual(
+                shape(geometry).symmetric_difference(original).area, 0
+            )
+
+    def test_shares_borders(self):
+        """Shared borders are stored once and the payload shrinks."""
+        topology = to_topojson(self.gdf)
+        points = sum(len(arc) for arc in topology["arcs"])
+        vertices = sum(len(cell.exterior.coords) for cell in self.gdf.geometry)
+        self.assertLess(points, vertices * 0.65)
+
+        full = len(json.dumps(self.gdf.__geo_interface__))
+        compact = len(json.dumps(topology, separators=(",", ":")))
+        self.assertLess(compact * 4, full)
+
+    def test_round_coordinates(self):
+        """Coordinates are rounded to the precision."""
+        rounded = round_coordinates(gpd.GeoSeries([Point(1.23456789, 2.0)]), 3)
+        self.assertEqual(rounded.iloc[0].coords[0], (1.235, 2.0))
+
+    def test_folium_compact(self):
+        """The folium map embeds compact layers as TopoJSON."""
+        from geogo.foliummap import Map
+
+        m = Map()
+        m.add_gdf(self.gdf, compact=True)
+        compact = len(m.get_root().render())
+        m = Map()
+        m.add_gdf(self.gdf)
+        self.assertLess(compact * 4, len(m.get_root().render()))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.foliummap` module."""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import geopandas as gpd
+from shapely.geometry import Point
+
+from geogo.foliummap import Map
+
+
+class TestSidecars(unittest.TestCase):
+    """Tests for sidecar output of `foliummap.Map`."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.gdf = gpd.GeoDataFrame(
+            {"name": [f"p{i}" for i in range(50)]},
+            geometry=[
+                Point(-90 + i * 0.123456789, 30 + i * 0.0987654321) for i in range(50)
+            ],
+            crs="EPSG:4326",
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_sidecar_files(self):
+        m = Map(sidecar=True)
+        m.add_gdf(self.gdf, name="points")
+        m.add_gdf(self.gdf, name="copy")
+        m.add_gdf(self.gdf.iloc[:5], sidecar=False, name="inline")
+
+        path = os.path.join(self.directory, "map.html")
+        m.save(path)
+        files = os.listdir(os.path.join(self.directory, "map_files"))
+        self.assertEqual(len(files), 1)
+        with open(path) as f:
+            html = f.read()
+        self.assertIn(f"map_files/{files[0]}", html)
+        self.assertNotIn("p49", html)
+        self.assertIn(".catch(", html)
+
+        with gzip.open(os.path.join(self.directory, "map_files", files[0])) as f:
+            data = json.load(f)
+        self.assertEqual(len(data["features"]), 50)
+        self.assertEqual(
+            data["features"][1]["geometry"]["coordinates"], [-89.876543, 30.098765]
+        )
+
+        report = m.layer_sizes()
+        self.assertEqual(report["format"].tolist(), ["sidecar", "sidecar", "geojson"])
+        self.assertEqual(report["shared"].tolist(), [False, True, False])
+        self.assertEqual(report["page_bytes"].tolist()[:2], [0, 0])
+        self.assertGreater(report["sidecar_bytes"][0], 0)
+        self.assertEqual(report["sidecar_bytes"][1], 0)
+        self.assertLess(report["sidecar_bytes"][0], report["raw_bytes"][0])
+        self.assertGreater(report["page_bytes"][2], 0)
+
+    def test_sidecar_options(self):
+        m = Map(sidecar=True)
+        layer = m.add_gdf(
+            self.gdf.iloc[:2],
+            style_function=lambda feature: {"color": feature["properties"]["name"]},
+        )
+        features = json.loads(layer.data())["features"]
+        self.assertEqual(features[1]["properties"]["style"], {"color": "p1"})
+        with self.assertRaisesRegex(ValueError, "tooltip"):
+            m.add_gdf(self.gdf, tooltip="name")
+
+    def test_unsaved_map_embeds_data(self):
+        m = Map()
+        m.add_geojson(json.loads(self.gdf.to_json()), sidecar=True)
+        html = m.get_root().render()
+        self.assertIn("p49", html)
+        self.assertNotIn("fetch(", html)
+
+    def test_embedded_data_is_escaped(self):
+        m = Map()
+        gdf = self.gdf.iloc[:1].assign(name="</script><b>x & 'y'")
+        layer = m.add_gdf(gdf, sidecar=True)
+        html = m.get_root().render()
+        self.assertNotIn("</script><b>", html)
+        self.assertIn("\\u003c/script\\u003e\\u003cb\\u003ex \\u0026", html)
+        self.assertEqual(
+            json.loads(layer.script_data())["features"][0]["properties"]["name"],
+            "</script><b>x & 'y'",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
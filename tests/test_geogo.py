@@ -19,3 +19,49 @@ class TestGeogo(unittest.TestCase):
 
     def test_000_something(self):
         """Test something."""
+
+
+class TestImport(unittest.TestCase):
+    """Tests for the lazy imports of the `geogo` package."""
+
+    # Seconds that a bare ``import geogo`` may take.
+    budget = 0.25
+
+    def run_python(self, code):
+        import os
+        import subprocess
+        import sys
+
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+
+    def test_import_budget(self):
+        """Test that importing geogo is fast and loads no mapping libraries."""
+        seconds, loaded = self.run_python(
+            "import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import geogo\n"
+            "seconds = time.perf_counter() - start\n"
+            "heavy = ['ipyleaflet', 'folium', 'geopandas', 'pandas', 'shapely', 'pyproj', 'numpy']\n"
+            "print(seconds, ','.join(m for m in heavy if m in sys.modules) or '-')"
+        )
+        self.assertEqual(loaded, "-")
+        self.assertLess(float(seconds), self.budget)
+
+    def test_lazy_attributes(self):
+        """Test that the public names resolve on first use."""
+        import geogo as package
+
+        self.assertIs(package.Map, geogo.Map)
+        self.assertEqual(package.FoliumMap.__module__, "geogo.foliummap")
+        self.assertTrue(callable(package.storm_exposure))
+        self.assertIn("Map", dir(package))
+        with self.assertRaises(AttributeError):
+            package.missing
+        names = self.run_python("from geogo import *\nprint(Map.__name__)")
+        self.assertEqual(names, ["Map"])
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.media` module."""
+
+import contextlib
+import io
+import os
+import socket
+import struct
+import tempfile
+import time
+import unittest
+from unittest import mock
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from PIL import Image
+
+from geogo import geogo
+from geogo.media import (
+    ImagePyramid,
+    MediaServer,
+    default_image_cache_dir,
+    image_size,
+    parse_range,
+)
+
+
+class TestMedia(unittest.TestCase):
+    """Tests for `media` module."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.video = os.path.join(self.tmp.name, "clip.mp4")
+        with open(self.video, "wb") as f:
+            f.write(bytes(range(256)) * 40)
+        self.image = os.path.join(self.tmp.name, "mosaic.png")
+        Image.new("RGB", (1024, 512), (200, 30, 30)).save(self.image)
+        self.bounds = [[20, -100], [30, -80]]
+        self.env = mock.patch.dict(os.environ, {"GEOGO_CACHE_DIR": self.tmp.name})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def get(self, url, byte_range=None):
+        headers = {"Range": byte_range} if byte_range else {}
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as r:
+            return r.status, r.headers, r.read()
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=990-2000", 1000), (990, 999))
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range("bytes=0-1,5-9", 1000))
+        with self.assertRaises(ValueError):
+            parse_range("bytes=1000-", 1000)
+
+    def test_range_requests(self):
+        with MediaServer(chunk_size=1000) as server:
+            url = server.file_url(self.video)
+            with open(self.video, "rb") as f:
+                data = f.read()
+
+            status, headers, body = self.get(url)
+            self.assertEqual((status, body), (200, data))
+            self.assertEqual(headers["Accept-Ranges"], "bytes")
+            self.assertEqual(headers["Content-Type"], "video/mp4")
+
+            status, headers, body = self.get(url, "bytes=1500-4499")
+            self.assertEqual((status, body), (206, data[1500:4500]))
+            self.assertEqual(headers["Content-Range"], f"bytes 1500-4499/{len(data)}")
+
+            with self.assertRaises(urllib.error.HTTPError) as e:
+                self.get(url, f"bytes={len(data)}-")
+            self.assertEqual(e.exception.code, 416)
+
+    def test_aborted_range_request(self):
+        with open(self.video, "wb") as f:
+            f.write(bytes(2**22))
+        server = MediaServer(chunk_size=2**12)
+        streams = []
+
+        def chunks(*args):
+            streams.append(MediaServer._chunks(server, *args))
+            return streams[-1]
+
+        server._chunks = chunks
+        stderr = io.StringIO()
+        with server, contextlib.redirect_stderr(stderr):
+            path = urllib.parse.urlsplit(server.file_url(self.video)).path
+            sock = socket.create_connection((server.host, server.port))
+            sock.sendall(f"GET {path} HTTP/1.1\r\nRange: bytes=0-\r\n\r\n".encode())
+            sock.recv(2**12)
+            # Closing with a zero linger time resets the connection.
+            sock.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+            )
+            sock.close()
+            deadline = time.time() + 5
+            while streams[0].gi_frame is not None and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertIsNone(streams[0].gi_frame)
+        self.assertEqual(stderr.getvalue(), "")
+
+    def test_image_pyramid(self):
+        pyramid = ImagePyramid(self.image, self.bounds)
+        self.assertEqual(pyramid.levels, [(1024, 512), (512, 256), (256, 128)])
+        self.assertTrue(pyramid.cache_path.startswith(default_image_cache_dir()))
+        self.assertGreaterEqual(pyramid.max_zoom, 6)
+
+        tile = Image.open(io.BytesIO(pyramid.tile(4, 3, 6)))
+        self.assertEqual(tile.size, (256, 256))
+        self.assertEqual(tile.getpixel((200, 240)), (200, 30, 30, 255))
+        self.assertEqual(tile.getpixel((0, 0))[3], 0)
+        self.assertIsNone(pyramid.tile(4, 0, 0))
+
+        with MediaServer() as server:
+            url = server.tile_url(pyramid).format(z=4, x=3, y=6)
+            self.assertEqual(self.get(url)[2], pyramid.tile(4, 3, 6))
+
+    def test_image_pyramid_cache(self):
+        # PIL refuses images this large, so the pyramid must not decode with it.
+        image = os.path.join(self.tmp.name, "gray.png")
+        Image.new("L", (1000, 700), 90).save(image)
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            pyramid = ImagePyramid(image, self.bounds, strip_bytes=2**16)
+            self.assertEqual(image_size(image), (1000, 700))
+            data = pyramid.tile(4, 3, 6)
+        tile = Image.open(io.BytesIO(data))
+        self.assertEqual(tile.getpixel((200, 240)), (90, 90, 90, 255))
+
+        mtime = os.path.getmtime(pyramid.cache_path)
+        self.assertEqual(
+            ImagePyramid(image, self.bounds).cache_path, pyramid.cache_path
+        )
+        self.assertEqual(os.path.getmtime(pyramid.cache_path), mtime)
+
+        Image.new("L", (1000, 700), 30).save(image)
+        os.utime(image, ns=(0, 0))
+        changed = ImagePyramid(image, self.bounds)
+        self.assertNotEqual(changed.cache_path, pyramid.cache_path)
+        self.assertFalse(os.path.exists(pyramid.cache_path))
+
+    def test_add_image_and_video(self):
+        m = geogo.Map()
+        overlay = m.add_image(self.image, self.bounds)
+        self.assertTrue(overlay.url.startswith("http://127.0.0.1"))
+        layer = m.add_image(self.image, self.bounds, tile_threshold=512)
+        self.assertTrue(layer.url.endswith("/{z}/{x}/{y}.png"))
+        self.assertEqual(layer.max_native_zoom, layer.pyramid.max_zoom)
+
+        svg = os.path.join(self.tmp.name, "logo.svg")
+        with open(svg, "w") as f:
+            f.write('<svg xmlns="http://www.w3.org/2000/svg" width="8" height="8"/>')
+        overlay = m.add_image(svg, self.bounds)
+        self.assertEqual(self.get(overlay.url)[0], 200)
+
+        video = m.add_video(self.video, self.bounds)
+        self.assertEqual(self.get(video.url)[0], 200)
+        remote = m.add_video("https://example.com/clip.mp4", self.bounds)
+        self.assertEqual(remote.url, "https://example.com/clip.mp4")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.prefetch` module."""
+
+import threading
+import unittest
+
+from geogo.prefetch import Prefetcher
+
+
+class TestPrefetcher(unittest.TestCase):
+    """Tests for `Prefetcher`."""
+
+    def setUp(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+        def build(key):
+            self.release.wait(5)
+            self.calls.append(key)
+            return key * 2
+
+        self.prefetcher = Prefetcher(build, max_workers=1, cache_size=2)
+
+    def tearDown(self):
+        self.release.set()
+        self.prefetcher.shutdown()
+
+    def test_values_are_cached(self):
+        """Built values are shared and the cache is bounded."""
+        self.prefetcher.prefetch([1, 2])
+        self.assertEqual(self.prefetcher.prepare(1), 2)
+        self.assertEqual(self.prefetcher.prepare(2), 4)
+        self.assertEqual(self.prefetcher.submit(1).result(), 2)
+        self.assertEqual(self.calls, [1, 2])
+
+        self.prefetcher.prepare(3)
+        self.assertIsNone(self.prefetcher.cached(2))
+        self.assertEqual(self.prefetcher.cached(1), 2)
+
+    def test_cancel(self):
+        """Pending builds are cancelled unless they are kept."""
+        self.release.clear()
+        running = self.prefetcher.submit(1)
+        dropped = self.prefetcher.submit(2)
+        kept = self.prefetcher.submit(3)
+        self.prefetcher.cancel(keep=[3])
+        self.release.set()
+        self.assertTrue(dropped.cancelled())
+        self.assertEqual((running.result(), kept.result()), (2, 6))
+        self.assertEqual(self.calls, [1, 3])
+        self.assertEqual(self.prefetcher.submit(2).result(), 4)
+
+    def test_failed_build(self):
+        """A build that fails at once is reported without blocking."""
+
+        def fail(key):
+            raise KeyError(key)
+
+        prefetcher = Prefetcher(fail, max_workers=1)
+        try:
+            for _ in range(5):
+                with self.assertRaises(KeyError):
+                    prefetcher.submit("AL992005").result(timeout=5)
+        finally:
+            prefetcher.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
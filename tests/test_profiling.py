@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.profiling` module."""
+
+import unittest
+
+import geopandas as gpd
+from shapely.geometry import Polygon
+
+from geogo import foliummap, geogo
+from geogo.profiling import Profiler, payload_stats, phase
+
+
+class TestProfiling(unittest.TestCase):
+    """Tests for `profiling` module."""
+
+    def setUp(self):
+        self.gdf = gpd.GeoDataFrame(
+            {"name": ["a", "b"]},
+            geometry=[
+                Polygon([(0, 0), (1, 0), (1, 1), (0, 0)]),
+                Polygon([(2, 2), (3, 2), (3, 3), (2, 3), (2, 2)]),
+            ],
+            crs="EPSG:4326",
+        ).to_crs(epsg=3857)
+
+    def test_payload_stats(self):
+        geojson = self.gdf.to_crs(epsg=4326).__geo_interface__
+        self.assertEqual(payload_stats(geojson), (2, 9))
+        self.assertIs(phase("load"), phase("sync"))
+
+    def test_profile_map(self):
+        m = geogo.Map()
+        m.add_gdf(self.gdf)
+        with m.profile() as profiler:
+            m.add_gdf(self.gdf)
+            m.add_geojson(self.gdf)
+        m.add_gdf(self.gdf)
+        self.assertIsNone(getattr(m, "_profiler", None))
+
+        report = profiler.report()
+        self.assertEqual(report["method"].tolist(), ["add_gdf", "add_geojson"])
+        self.assertEqual(report["features"].tolist(), [2, 2])
+        self.assertEqual(report["vertices"].tolist(), [9, 9])
+        self.assertEqual(report["layers"].tolist(), [3, 4])
+        self.assertTrue((report["bytes"] > 0).all())
+        self.assertTrue((report["reproject"] > 0).all())
+        self.assertTrue((report["serialize"] > 0).all())
+        phases = report[["load", "geometry", "reproject", "serialize", "sync", "other"]]
+        for total, parts in zip(report["seconds"], phases.sum(axis=1)):
+            self.assertAlmostEqual(total, parts, places=6)
+
+    def test_profile_folium_map(self):
+        m = foliummap.Map()
+        profiler = Profiler()
+        with m.profile(profiler):
+            m.add_gdf(self.gdf, sidecar=True)
+        with m.profile(profiler):
+            m.add_gdf(self.gdf, compact=True)
+        report = profiler.report()
+        self.assertEqual(len(report), 2)
+        self.assertEqual(report["features"].tolist(), [2, 2])
+        self.assertEqual(report["layers"].tolist(), [2, 3])
+        self.assertGreater(report["serialize"][1], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.rasters` module."""
+
+import os
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+from geogo import geogo
+from geogo.rasters import (
+    TileClientPool,
+    check_overviews,
+    get_tile_client_pool,
+    has_overviews,
+)
+
+
+def write_raster(path, size=64, west=-90.0, north=30.0):
+    data = np.arange(size * size, dtype=np.uint8).reshape(1, size, size)
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=size,
+        height=size,
+        count=1,
+        dtype="uint8",
+        crs="EPSG:4326",
+        transform=from_origin(west, north, 0.01, 0.01),
+    ) as ds:
+        ds.write(data)
+    return path
+
+
+class TestRasters(unittest.TestCase):
+    """Tests for `rasters` module."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = write_raster(os.path.join(self.tmp.name, "a.tif"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_check_overviews(self):
+        self.assertTrue(check_overviews(self.path))
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self.assertFalse(check_overviews(self.path, min_size=32))
+        self.assertTrue(any("no overviews" in str(w.message) for w in caught))
+
+        large = write_raster(os.path.join(self.tmp.name, "large.tif"), size=600)
+        self.assertFalse(has_overviews(large))
+        self.assertTrue(check_overviews(large, "build", min_size=512))
+        self.assertTrue(has_overviews(large))
+        with self.assertRaises(ValueError):
+            check_overviews(write_raster(self.path + "2.tif"), "fail", min_size=32)
+
+    def test_pool_shares_clients(self):
+        pool = TileClientPool()
+        first = pool.acquire(self.path)
+        second = pool.acquire(os.path.relpath(self.path))
+        self.assertIs(first, second)
+        self.assertEqual(pool.count(self.path), 2)
+
+        pool.release(self.path)
+        self.assertEqual(len(pool), 1)
+        pool.release(self.path)
+        self.assertEqual(len(pool), 0)
+        self.assertEqual(pool.count(self.path), 0)
+
+    def test_add_rasters(self):
+        other = write_raster(os.path.join(self.tmp.name, "b.tif"), west=-80.0)
+        m = geogo.Map()
+        layers = m.add_rasters([self.path, other, self.path])
+        self.assertEqual(len(layers), 3)
+        self.assertTrue(all(layer in m.layers for layer in layers))
+
+        pool = get_tile_client_pool()
+        self.assertEqual(pool.count(self.path), 2)
+        m.remove(layers[0])
+        self.assertEqual(pool.count(self.path), 1)
+        m.remove(layers[2])
+        m.remove(layers[1])
+        self.assertEqual(pool.count(self.path), 0)
+        self.assertEqual(pool.count(other), 0)
+
+        m.add(layers[0])
+        self.assertEqual(pool.count(self.path), 1)
+        self.assertIs(layers[0].tile_server, pool.acquire(self.path))
+        pool.release(self.path)
+        m.remove(layers[0])
+        self.assertEqual(pool.count(self.path), 0)
+        self.assertEqual(pool._opening, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.storms` module."""
+
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from geogo import storms
+
+
+class TestStorms(unittest.TestCase):
+    """Tests for `geogo.storms` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        self.storm_dict = {
+            "lon": [-60.0, -61.0, -62.0, -63.0],
+            "lat": [15.0, 16.0, 17.0, 18.0],
+            "vmax": [30, 80, 140, 160],
+        }
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        storms.clear_track_datasets()
+        storms.set_track_dataset_cache_size(4)
+
+    def test_classify_vmax(self):
+        """Test that category thresholds match the track colors."""
+        codes = storms.classify_vmax([38, 39, 73, 95, 110, 129, 156, 157])
+        labels = [storms.CATEGORIES[c] for c in codes]
+        self.assertEqual(labels, ["TD", "TS", "TS", "C1", "C2", "C3", "C4", "C5"])
+
+    def test_storm_track_geojson(self):
+        """Test that a track becomes one styled feature per segment."""
+        geojson = storms.storm_track_geojson(self.storm_dict)
+        features = geojson["features"]
+        self.assertEqual(len(features), 3)
+        self.assertEqual(
+            features[0]["geometry"]["coordinates"], [[-60.0, 15.0], [-61.0, 16.0]]
+        )
+        self.assertEqual(
+            [f["properties"]["style"]["color"] for f in features],
+            [
+                storms.CATEGORY_COLORS["TD"],
+                storms.CATEGORY_COLORS["C1"],
+                storms.CATEGORY_COLORS["C4"],
+            ],
+        )
+
+    def test_track_dataset_cache(self):
+        """Test that each basin is built once and the cache stays bounded."""
+        with mock.patch.object(
+            storms, "_build_track_dataset", side_effect=lambda b, s: object()
+        ) as build:
+            first = storms.get_track_dataset("north_atlantic", "hurdat")
+            self.assertIs(storms.get_track_dataset("north_atlantic", "hurdat"), first)
+            self.assertEqual(build.call_count, 1)
+
+            storms.set_track_dataset_cache_size(2)
+            storms.get_track_dataset("east_pacific", "hurdat")
+            storms.get_track_dataset("west_pacific", "ibtracs")
+            self.assertEqual(
+                storms.cached_track_datasets(),
+                [("east_pacific", "hurdat"), ("west_pacific", "ibtracs")],
+            )
+
+            self.assertTrue(storms.evict_track_dataset("east_pacific", "hurdat"))
+            self.assertFalse(storms.evict_track_dataset("east_pacific", "hurdat"))
+            storms.clear_track_datasets()
+            self.assertEqual(storms.cached_track_datasets(), [])
+
+    def test_storm_catalog(self):
+        """Test that the catalogue summarizes and filters storms."""
+        catalog = storms.StormCatalog.from_columns(
+            {
+                "time": np.arange(5).astype("datetime64[D]").astype("datetime64[s]"),
+                "lat": np.array([10.0, 11.0, 12.0, 20.0, 21.0]),
+                "lon": np.array([-40.0, -41.0, -42.0, -70.0, -71.0]),
+                "vmax": np.array([30.0, 120.0, 60.0, 40.0, np.nan]),
+                "mslp": np.array([1000.0, 960.0, 990.0, 1004.0, 1006.0]),
+                "ids": np.array(["AL012005", "AL022006"]),
+                "names": np.array(["ALPHA", "UNNAMED"]),
+                "seasons": np.array([2005, 2006]),
+                "offsets": np.array([0, 3, 5]),
+            }
+        )
+        row = catalog.df.loc["AL012005"]
+        self.assertEqual(row["vmax"], 120.0)
+        self.assertEqual(row["mslp"], 960.0)
+        self.assertEqual(row["category"], "C3")
+        self.assertEqual(row["max_lon"], -40.0)
+        self.assertEqual(catalog.options(), [("AL012005", 2005), ("AL022006", 2006)])
+        self.assertEqual(len(catalog.filter(years=(2006, None))), 1)
+        self.assertEqual(len(catalog.filter(name_prefix="al")), 1)
+        self.assertEqual(len(catalog.filter(min_category="C1")), 1)
+        self.assertEqual(len(catalog.filter(named_only=True, years=2006)), 0)
+
+    def test_storms_geojson(self):
+        """Test that batch tracks are split by storm and category."""
+        columns = {
+            "lon": np.array([0.0, 1.0, 2.0, 3.0, 10.0, 11.0]),
+            "lat": np.zeros(6),
+            "vmax": np.array([30.0, 80.0, 30.0, 30.0, 80.0, 80.0]),
+            "ids": np.array(["AL012005", "AL022005"]),
+            "names": np.array(["ALPHA", "BETA"]),
+            "seasons": np.array([2005, 2005]),
+            "offsets": np.array([0, 4, 6]),
+        }
+        collections = storms.storms_geojson(columns, [0, 1])
+        self.assertEqual(list(collections), ["TD", "C1"])
+
+        (td,) = collections["TD"]["features"]
+        self.assertEqual(
+            td["geometry"],
+            {
+                "type": "MultiLineString",
+                "coordinates": [[[0.0, 0.0], [1.0, 0.0]], [[2.0, 0.0], [3.0, 0.0]]],
+            },
+        )
+        c1 = collections["C1"]["features"]
+        self.assertEqual([f["properties"]["name"] for f in c1], ["ALPHA", "BETA"])
+        self.assertEqual(c1[1]["geometry"]["coordinates"], [[10.0, 0.0], [11.0, 0.0]])
+
+    def test_track_prefetcher(self):
+        """Test that prepared tracks are cached and reused."""
+        dataset = mock.Mock()
+        dataset.get_storm.return_value = types.SimpleNamespace(dict=self.storm_dict)
+        with mock.patch.object(storms, "_build_track_dataset", return_value=dataset):
+            prefetcher = storms.TrackPrefetcher()
+            try:
+                prefetcher.prefetch(["AL012005"])
+                geojson, bounds = prefetcher.prepare("AL012005")
+                self.assertEqual(len(geojson["features"]), 3)
+                self.assertEqual(bounds, [[15.0, -63.0], [18.0, -60.0]])
+                self.assertIs(prefetcher.submit("AL012005").result()[0], geojson)
+                self.assertEqual(dataset.get_storm.call_count, 1)
+            finally:
+                prefetcher.shutdown()
+
+    def test_storm_playback(self):
+        """Test that playback frames update the track segment by segment."""
+        import datetime as dt
+
+        from geogo import Map
+
+        storm_dict = dict(
+            self.storm_dict,
+            time=[dt.datetime(2005, 8, 25, 6 * i) for i in range(4)],
+            vmax=[30, 80, np.nan, 160],
+            mslp=[1005, 990, np.nan, 905],
+            name="KATRINA",
+            year=2005,
+        )
+        playback = storms.StormPlayback(storm_dict)
+        self.assertEqual(len(playback), 4)
+        self.assertEqual(len(playback.segments), 3)
+        self.assertEqual(len(playback.segment_colors), 3)
+        self.assertEqual(playback.changed_segments(2, 2), [])
+        self.assertEqual(
+            playback.changed_segments(0, 3), list(enumerate(playback.segments))
+        )
+        self.assertEqual(playback.locations[1], [16.0, -61.0])
+        self.assertEqual(playback.segments[0], [[15.0, -60.0], [16.0, -61.0]])
+        self.assertEqual(playback.changed_segments(1, 2), [(1, playback.segments[1])])
+        self.assertEqual(playback.changed_segments(3, 1), [(1, []), (2, [])])
+        self.assertIn("2005-08-25 06:00 UTC", playback.labels[1])
+        self.assertIn("80 kt", playback.labels[1])
+
+        dataset = mock.Mock()
+        dataset.get_storm.return_value = types.SimpleNamespace(dict=storm_dict)
+        with mock.patch.object(storms, "_build_track_dataset", return_value=dataset):
+            m = Map()
+            group = m.add_storm_playback("AL122005")
+        layers = len(m.layers)
+        track, marker = group.layers
+        self.assertEqual(len(track.layers), 3)
+        updates = []
+        for line in track.layers:
+            line.observe(updates.append, names="locations")
+
+        group.slider.value = 2
+        self.assertEqual(
+            [line.locations != [] for line in track.layers], [True, True, False]
+        )
+        self.assertEqual(len(updates), 2)
+        group.slider.value = 3
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(marker.location, [18.0, -63.0])
+        group.slider.value = 2
+        self.assertEqual(track.layers[2].locations, [])
+        self.assertEqual(len(updates), 4)
+        self.assertEqual(marker.fill_color, storms.CATEGORY_COLORS["C5"])
+        self.assertEqual(len(m.layers), layers)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.stormstore` module."""
+
+import datetime as dt
+import io
+import os
+import shutil
+import tempfile
+import threading
+import types
+import unittest
+from unittest import mock
+
+from geogo import storms, stormstore
+from geogo.stormstore import StormStore, get_storm_store, source_stamp
+
+
+def make_dataset():
+    """Builds a two-storm stand-in for a tropycal TrackDataset."""
+    data = {}
+    for i, (name, year) in enumerate([("ALPHA", 2005), ("BETA", 2006)]):
+        key = f"AL0{i + 1}{year}"
+        data[key] = {
+            "id": key,
+            "name": name,
+            "year": year,
+            "season": year,
+            "time": [
+                dt.datetime(year, 8, 1) + dt.timedelta(hours=6 * j)
+                for j in range(3 + i)
+            ],
+            "lat": [10.0 + j for j in range(3 + i)],
+            "lon": [-40.0 - j for j in range(3 + i)],
+            "vmax": [30.0 + 20 * j for j in range(3 + i)],
+            "mslp": [1005.0 - 5 * j for j in range(3 + i)],
+            "type": ["TS"] * (3 + i),
+        }
+    return types.SimpleNamespace(keys=list(data), data=data)
+
+
+class TestStormStore(unittest.TestCase):
+    """Tests for `geogo.stormstore` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "north_atlantic_hurdat")
+        self.dataset = make_dataset()
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        shutil.rmtree(self.directory)
+
+    def test_roundtrip(self):
+        """Test that storms read from the snapshot match the dataset."""
+        StormStore.build(self.dataset, self.path)
+        store = StormStore(self.path)
+        storm = store.get_storm(("beta", 2006))
+        self.assertEqual(storm.id, "AL022006")
+        self.assertEqual(
+            storm.dict["lat"].tolist(), self.dataset.data["AL022006"]["lat"]
+        )
+        self.assertEqual(storm.dict["time"][0].astype(object), dt.datetime(2006, 8, 1))
+        self.assertEqual(store.keys, ["AL012005", "AL022006"])
+
+    def test_stamp_changes_with_data(self):
+        """Test that the stamp follows the source data."""
+        stamp = StormStore.build(self.dataset, self.path).stamp
+        self.assertEqual(StormStore.build(self.dataset, self.path).stamp, stamp)
+        self.dataset.data["AL012005"]["vmax"][0] = 45.0
+        store = StormStore.build(self.dataset, self.path)
+        self.assertNotEqual(store.stamp, stamp)
+        self.assertEqual(store.get_storm("AL012005").dict["vmax"][0], 45.0)
+
+    def test_source_change_makes_store_stale(self):
+        """Test that a changed source file is detected."""
+        source = os.path.join(self.directory, "hurdat2.txt")
+        with open(source, "w") as f:
+            f.write("AL012005")
+        store = StormStore.build(self.dataset, self.path, stamp=source_stamp([source]))
+        self.assertIsNone(source_stamp([os.path.join(self.directory, "missing")]))
+
+        with mock.patch.object(stormstore, "source_urls", return_value=[source]):
+            self.assertFalse(store.is_stale())
+            self.assertFalse(store.is_stale(check_source_days=0))
+            self.assertIn("source_checked", StormStore(self.path).meta)
+            with open(source, "a") as f:
+                f.write("AL022006")
+            self.assertFalse(store.is_stale())
+            self.assertTrue(store.is_stale(check_source_days=0))
+            self.assertFalse(store.is_stale(check_source_days=None))
+
+    def test_latest_hurdat_urls(self):
+        """Test that the latest HURDAT files are read from NHC's listing."""
+        page = io.BytesIO(
+            b'<a href="hurdat2-1851-2022-050423.txt">a</a>\n'
+            b'<a href="hurdat2-1851-2023-051124.txt">a</a>\n'
+            b'<a href="hurdat2-nepac-1949-2023-042624.txt">p</a>\n'
+            b'<a href="hurdat2-format.pdf">f</a>\n'
+        )
+        with mock.patch("urllib.request.urlopen", return_value=page) as urlopen:
+            atlantic, pacific = stormstore.latest_hurdat_urls(timeout=3)
+        self.assertEqual(urlopen.call_args.kwargs["timeout"], 3)
+        self.assertTrue(atlantic.endswith("hurdat2-1851-2023-051124.txt"))
+        self.assertTrue(pacific.endswith("hurdat2-nepac-1949-2023-042624.txt"))
+
+        store = StormStore.build(self.dataset, self.path, stamp="hurdat2.txt")
+        with mock.patch("urllib.request.urlopen", side_effect=OSError("offline")):
+            self.assertFalse(store.is_stale(check_source_days=0))
+
+    def test_basins_build_independently(self):
+        """Test that building one basin does not block another."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def build(basin, source):
+            if basin == "east_pacific":
+                started.set()
+                release.wait(10)
+            return self.dataset
+
+        with mock.patch.object(storms, "_build_track_dataset", side_effect=build):
+            thread = threading.Thread(
+                target=get_storm_store,
+                args=("east_pacific",),
+                kwargs={"directory": self.directory},
+            )
+            thread.start()
+            try:
+                self.assertTrue(started.wait(10))
+                store = get_storm_store(directory=self.directory)
+                self.assertEqual(len(store), 2)
+                self.assertTrue(thread.is_alive())
+            finally:
+                release.set()
+                thread.join()
+        stormstore.clear_storm_stores()
+        storms.clear_track_datasets()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.tilecache` module."""
+
+import tempfile
+import unittest
+import urllib.request
+
+from geogo.server import LocalServer
+from geogo.tilecache import TileCacheProxy
+
+
+class StandInTileServer(LocalServer):
+    """Serves 1 KiB tiles and WMS images that name the request."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def handle(self, path, query, headers):
+        self.requests.append((path, query))
+        if path == "/missing/0/0/0.png":
+            return 404, {}, b""
+        if path == "/exception":
+            return 200, {"Content-Type": "application/vnd.ogc.se_xml"}, b"<error/>"
+        if path.endswith(".pbf"):
+            return 200, {"Content-Type": "application/x-protobuf"}, b"\x1a\x00"
+        body = (path + repr(sorted(query.items()))).encode().ljust(1024, b".")
+        return 200, {"Content-Type": "image/png"}, body
+
+
+class TestTileCacheProxy(unittest.TestCase):
+    """Tests for `TileCacheProxy`."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.upstream = StandInTileServer().start()
+        self.proxy = TileCacheProxy(cache_dir=self.tmp.name).start()
+
+    def tearDown(self):
+        self.proxy.stop()
+        self.upstream.stop()
+        self.tmp.cleanup()
+
+    def get(self, url):
+        with urllib.request.urlopen(url) as response:
+            return response.headers["Content-Type"], response.read()
+
+    def test_caches_tiles(self):
+        """Repeated tiles are served from the cache."""
+        template = self.proxy.tile_url(f"{self.upstream.url}/{{z}}/{{x}}/{{y}}.png")
+        first = self.get(template.format(z=3, x=1, y=2))
+        second = self.get(template.format(z=3, x=1, y=2))
+        self.assertEqual(first, second)
+        self.assertEqual(first[0], "image/png")
+        self.assertTrue(first[1].startswith(b"/3/1/2.png"))
+        self.assertEqual(len(self.upstream.requests), 1)
+        self.assertEqual(self.proxy.stats()["hits"], 1)
+        self.assertEqual(self.proxy.stats()["misses"], 1)
+
+        # The cache is reused by a new proxy on the same directory.
+        proxy = TileCacheProxy(cache_dir=self.tmp.name)
+        status, _, body = proxy.fetch(f"{self.upstream.url}/3/1/2.png")
+        self.assertEqual((status, body), (200, first[1]))
+        self.assertEqual(proxy.stats()["hits"], 1)
+
+    def test_subdomains_and_placeholders(self):
+        """Subdomains rotate per tile and unknown placeholders are rejected."""
+        template = self.proxy.tile_url(
+            f"{self.upstream.url}/{{s}}/{{z}}/{{x}}/{{y}}{{r}}.png", subdomains="0123"
+        )
+        for x in range(3):
+            self.get(template.format(z=3, x=x, y=2))
+        self.get(template.format(z=3, x=0, y=2))
+        paths = [request[0] for request in self.upstream.requests]
+        self.assertEqual(paths, ["/2/3/0/2.png", "/3/3/1/2.png", "/0/3/2/2.png"])
+
+        with self.assertRaises(ValueError) as e:
+            self.proxy.tile_url(f"{self.upstream.url}/{{z}}/{{x}}/{{y}}?key={{apikey}}")
+        self.assertIn("{apikey}", str(e.exception))
+        with self.assertRaises(ValueError):
+            self.proxy.tile_url(f"{self.upstream.url}/{{s}}/{{z}}/{{x}}/{{y}}", [])
+
+    def test_errors_are_not_cached(self):
+        """Upstream errors are passed on and not stored."""
+        template = self.proxy.tile_url(
+            f"{self.upstream.url}/missing/{{z}}/{{x}}/{{y}}.png"
+        )
+        for _ in range(2):
+            with self.assertRaises(urllib.error.HTTPError) as e:
+                self.get(template.format(z=0, x=0, y=0))
+            self.assertEqual(e.exception.code, 404)
+        self.assertEqual(self.proxy.stats()["errors"], 2)
+        self.assertEqual(self.proxy.stats()["entries"], 0)
+
+        url = self.proxy.wms_url(f"{self.upstream.url}/exception")
+        for _ in range(2):
+            self.assertEqual(self.get(url)[1], b"<error/>")
+        self.assertEqual(len(self.upstream.requests), 4)
+        self.assertEqual(self.proxy.stats()["entries"], 0)
+
+        template = self.proxy.tile_url(f"{self.upstream.url}/{{z}}/{{x}}/{{y}}.pbf")
+        self.get(template.format(z=0, x=0, y=0))
+        self.assertEqual(self.proxy.stats()["entries"], 1)
+
+    def test_wms_queries(self):
+        """WMS requests are keyed by their query, including TIME."""
+        url = self.proxy.wms_url(f"{self.upstream.url}/wms")
+        self.get(f"{url}?TIME=2020-07-05&bbox=1,2,3,4")
+        self.get(f"{url}?bbox=1,2,3,4&TIME=2020-07-05")
+        self.get(f"{url}?TIME=2020-07-06&bbox=1,2,3,4")
+        self.assertEqual(len(self.upstream.requests), 2)
+        self.assertEqual(self.upstream.requests[1][1]["TIME"], ["2020-07-06"])
+
+    def test_size_cap_and_seed(self):
+        """Seeding fills the cache and the size cap evicts old tiles."""
+        self.proxy.max_bytes = 5 * 1100
+        template = f"{self.upstream.url}/{{z}}/{{x}}/{{y}}.png"
+        seeded = self.proxy.seed(template, ((-80, -180), (80, 180)), range(2))
+        self.assertEqual(seeded, 5)
+        stats = self.proxy.stats()
+        self.assertEqual(stats["entries"], 5)
+        self.assertLessEqual(stats["bytes"], self.proxy.max_bytes)
+
+        self.proxy.seed(template, ((-80, -180), (80, 180)), [2])
+        stats = self.proxy.stats()
+        self.assertEqual(stats["entries"], 5)
+        self.assertEqual(stats["evictions"], 16)
+        with self.assertRaises(ValueError):
+            self.proxy.seed(template, ((-80, -180), (80, 180)), [10], max_tiles=100)
+
+    def test_map_routes_layers(self):
+        """Maps route basemaps and WMS layers through the proxy."""
+        from geogo import Map
+
+        m = Map()
+        m.use_tile_cache(self.proxy)
+        m.add_basemap("OpenTopoMap")
+        layer = m.add_wms_layer(f"{self.upstream.url}/wms", layers="a")
+        self.assertTrue(m.layers[-2].url.startswith(self.proxy.url))
+        self.assertTrue(layer.url.startswith(self.proxy.url))
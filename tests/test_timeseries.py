@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.timeseries` module."""
+
+import base64
+import time
+import unittest
+
+from geogo.server import LocalServer
+from geogo.timeseries import WMSFramePrefetcher, date_range
+
+
+class StandInWMS(LocalServer):
+    """Returns an "image" that names the requested TIME."""
+
+    def __init__(self):
+        super().__init__()
+        self.times = []
+
+    def handle(self, path, query, headers):
+        self.times.append(query["TIME"][0])
+        return 200, {"Content-Type": "image/png"}, query["TIME"][0].encode()
+
+
+def frame_time(frame):
+    return base64.b64decode(frame.split(",", 1)[1]).decode()
+
+
+class TestWMSFramePrefetcher(unittest.TestCase):
+    """Tests for `WMSFramePrefetcher`."""
+
+    def setUp(self):
+        self.wms = StandInWMS().start()
+        self.bounds = ((20, -90), (30, -80))
+
+    def tearDown(self):
+        self.wms.stop()
+
+    def test_date_range(self):
+        self.assertEqual(
+            date_range("2020-02-27", "2020-03-02", 2),
+            ["2020-02-27", "2020-02-29", "2020-03-02"],
+        )
+
+    def test_frames_are_cached(self):
+        """Prefetched frames are served from a bounded cache."""
+        frames = WMSFramePrefetcher(f"{self.wms.url}/wms", "layer", max_frames=3)
+        view = frames.view(self.bounds, (400, 300))
+        dates = date_range("2020-07-01", "2020-07-04")
+        frames.prefetch([(date, view) for date in dates[:3]])
+        self.assertEqual(frame_time(frames.submit((dates[0], view)).result()), dates[0])
+        for date in dates[:3]:
+            frames.submit((date, view)).result()
+        self.assertEqual(sorted(self.wms.times), dates[:3])
+
+        frames.submit((dates[3], view)).result()
+        self.assertIsNone(frames.cached((dates[0], view)))
+        self.assertIsNotNone(frames.cached((dates[3], view)))
+        self.assertIn("width=400", frames.frame_url(dates[0], view))
+        frames.shutdown()
+
+    def test_map_playback(self):
+        """Stepping through dates swaps frames in one overlay."""
+        from geogo import Map
+
+        m = Map()
+        layer = m.add_time_wms_layer(
+            url=f"{self.wms.url}/wms",
+            time="2020-07-01",
+            end="2020-07-10",
+            prefetch=2,
+            legend=False,
+        )
+        slider = m.controls[-1].widget.children[1]
+        deadline = time.time() + 5
+        while frame_time(layer.url or "x,") != "2020-07-01" and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(frame_time(layer.url), "2020-07-01")
+
+        slider.index = 1
+        deadline = time.time() + 5
+        while frame_time(layer.url) != "2020-07-02" and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(frame_time(layer.url), "2020-07-02")
+        self.assertEqual(len([l for l in m.layers if l is layer]), 1)
+
+        slider.index = 0
+        self.assertEqual(frame_time(layer.url), "2020-07-01")
+        self.assertEqual(self.wms.times.count("2020-07-01"), 1)
+        layer.frames.shutdown()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.vectors` module."""
+
+import os
+import tempfile
+import time
+import unittest
+
+import geopandas as gpd
+import numpy as np
+from shapely import points
+
+from geogo import Map
+from geogo.vectors import VectorTileReader, tile_bounds, tiles_for_bounds
+
+
+class TestTiles(unittest.TestCase):
+    """Tests for the tile helpers."""
+
+    def test_tiles_cover_view(self):
+        """The tiles of a view cover it and nothing more."""
+        self.assertEqual(
+            tiles_for_bounds(((-80, -180), (80, 180)), 1),
+            [(1, 0, 0), (1, 1, 0), (1, 0, 1), (1, 1, 1)],
+        )
+        tiles = tiles_for_bounds(((10, 10), (20, 30)), 5)
+        west, south, east, north = np.array(
+            [tile_bounds(x, y, z) for z, x, y in tiles]
+        ).T
+        self.assertLessEqual(west.min(), 10)
+        self.assertLessEqual(south.min(), 10)
+        self.assertGreaterEqual(east.max(), 30)
+        self.assertGreaterEqual(north.max(), 20)
+
+
+class TestVectorTileReader(unittest.TestCase):
+    """Tests for `VectorTileReader`."""
+
+    def setUp(self):
+        """Writes a grid of points in Web Mercator."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "points.gpkg")
+        lon, lat = np.meshgrid(np.arange(-90.5, -79, 1.0), np.arange(20.5, 32, 1.0))
+        gdf = gpd.GeoDataFrame(
+            {"value": np.arange(lon.size)},
+            geometry=points(lon.ravel(), lat.ravel()),
+            crs="EPSG:4326",
+        ).to_crs(epsg=3857)
+        gdf.to_file(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reads_view_only(self):
+        """Only features in the view are read, once each, in EPSG:4326."""
+        reader = VectorTileReader(self.path)
+        np.testing.assert_allclose(reader.total_bounds, [-90.5, 20.5, -79.5, 31.5])
+
+        gdf, truncated = reader.read_view(((24, -86), (26, -84)), 7)
+        self.assertFalse(truncated)
+        self.assertTrue(gdf.crs.equals("EPSG:4326"))
+        self.assertFalse(gdf.index.duplicated().any())
+        x, y = gdf.geometry.x, gdf.geometry.y
+        tiles = tiles_for_bounds(((24, -86), (26, -84)), 7)
+        west, south, east, north = np.array(
+            [tile_bounds(tx, ty, tz) for tz, tx, ty in tiles]
+        ).T
+        inside = (x >= west.min()) & (x <= east.max())
+        self.assertTrue((inside & (y >= south.min()) & (y <= north.max())).all())
+        self.assertLess(len(gdf), 144)
+        self.assertIn((-84.5, 24.5), list(zip(x.round(6), y.round(6))))
+
+        misses = reader.misses
+        reader.read_view(((24, -86), (26, -84)), 7)
+        self.assertEqual(reader.misses, misses)
+        self.assertGreater(reader.hits, 0)
+
+    def test_caps_features(self):
+        """Views with too many features are cut off."""
+        reader = VectorTileReader(self.path, max_features=10)
+        gdf, truncated = reader.read_view(((0, -100), (40, -70)), 2)
+        self.assertTrue(truncated)
+        self.assertEqual(len(gdf), 10)
+
+    def test_map_follows_view(self):
+        """Map moves are debounced into a single reload."""
+        m = Map()
+        layer = m.add_lazy_vector(self.path, debounce=0.05)
+        self.assertEqual(layer.data["features"], [])
+
+        layer.loader.refresh(((24, -86), (26, -84)), 7)
+        self.assertGreater(len(layer.data["features"]), 0)
+
+        m.set_trait("bounds", ((29, -90), (31, -88)))
+        m.set_trait("bounds", ((20, -91), (32, -79)))
+        time.sleep(0.5)
+        self.assertEqual(len(layer.data["features"]), 144)
+        layer.loader.close()
+
+
+class TestLevelOfDetail(unittest.TestCase):
+    """Tests for `LevelOfDetailCache`."""
+
+    def setUp(self):
+        """Builds a coverage of squares with wiggly shared edges."""
+        from shapely import Polygon
+
+        t = np.linspace(0, 1, 200)
+        wiggle = 0.01 * np.sin(t * 12 * np.pi)
+        wiggle[[0, -1]] = 0
+        cells = []
+        for i in range(3):
+            for j in range(3):
+                x0, y0 = float(i), float(j)
+                bottom = list(zip(x0 + t, y0 + wiggle))
+                right = list(zip(x0 + 1 + wiggle, y0 + t))
+                top = list(zip(x0 + t, y0 + 1 + wiggle))[::-1]
+                left = list(zip(x0 + wiggle, y0 + t))[::-1]
+                cells.append(Polygon(bottom + right[1:] + top[1:] + left[1:]))
+        self.gdf = gpd.GeoDataFrame({"cell": range(9)}, geometry=cells, crs="EPSG:4326")
+
+    def test_levels_shrink_payload(self):
+        """Coarse levels send fewer vertices and keep shared edges."""
+        import json
+
+        import shapely
+        from geogo.vectors import LevelOfDetailCache
+
+        self.assertTrue(shapely.coverage_is_valid(self.gdf.geometry.values))
+        cache = LevelOfDetailCache(self.gdf, levels=(3, 6, 9), cache_size=2)
+        self.assertEqual(cache.level(0), 3)
+        self.assertEqual(cache.level(3.5), 6)
+        self.assertIsNone(cache.level(10))
+
+        sizes = [len(json.dumps(cache.geojson(zoom))) for zoom in (2, 10)]
+        self.assertLess(sizes[0] * 10, sizes[1])
+        self.assertEqual(len(cache._cache), 2)
+
+        coarse = gpd.GeoDataFrame.from_features(cache.geojson(2)["features"])
+        self.assertEqual(len(coarse), 9)
+        self.assertTrue(shapely.coverage_is_valid(coarse.geometry.values))
+
+    def test_map_swaps_levels(self):
+        """The layer data follows the map zoom."""
+        m = Map(zoom=2)
+        layer = m.add_gdf(self.gdf, zoom_to_layer=False, lod=True)
+        coarse = layer.data
+        m.zoom = 14
+        self.assertIsNot(layer.data, coarse)
+        self.assertIs(layer.data, layer.lod.geojson(14))
+
+        m.remove(layer)
+        fine = layer.data
+        m.zoom = 2
+        self.assertIs(layer.data, fine)
+
+    def test_levels_are_built_once(self):
+        """Concurrent requests for a level share one build."""
+        import threading
+
+        from geogo.vectors import LevelOfDetailCache
+
+        cache = LevelOfDetailCache(self.gdf, levels=(3, 6))
+        build = cache._build
+        release = threading.Event()
+        built = []
+
+        def slow_build(level):
+            built.append(level)
+            release.wait(10)
+            return build(level)
+
+        cache._build = slow_build
+        threads = [threading.Thread(target=cache.geojson, args=(2,)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(built, [3])
+
+        cache.precompute()
+        self.assertEqual(built, [3, 6])
+        self.assertNotIn(None, cache._cache)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+"""Tests for `geogo.vectortiles` module."""
+
+import struct
+import unittest
+import urllib.request
+
+import geopandas as gpd
+from shapely.geometry import LineString, Point, Polygon
+
+from geogo.vectortiles import VectorTileServer
+
+
+def read_message(data):
+    """Decodes a protobuf message into {field: [values]}."""
+    fields, i = {}, 0
+
+    def varint():
+        nonlocal i
+        value, shift = 0, 0
+        while True:
+            byte = data[i]
+            i += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value
+
+    while i < len(data):
+        key = varint()
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value = varint()
+        elif wire_type == 1:
+            value = data[i : i + 8]
+            i += 8
+        else:
+            length = varint()
+            value = data[i : i + length]
+            i += length
+        fields.setdefault(number, []).append(value)
+    return fields
+
+
+def read_packed(data):
+    values, value, shift = [], 0, 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            values.append(value)
+            value, shift = 0, 0
+    return values
+
+
+def read_tile(data):
+    """Decodes the features of a single-layer tile."""
+    layer = read_message(read_message(data)[3][0])
+    keys = [key.decode() for key in layer.get(3, [])]
+    values = []
+    for value in layer.get(4, []):
+        value = read_message(value)
+        if 1 in value:
+            values.append(value[1][0].decode())
+        elif 3 in value:
+            values.append(struct.unpack("<d", value[3][0])[0])
+        else:
+            raw = value[6][0]
+            values.append((raw >> 1) ^ -(raw & 1))
+    features = []
+    for feature in layer.get(2, []):
+        feature = read_message(feature)
+        tags = read_packed(feature.get(2, [b""])[0])
+        features.append(
+            {
+                "id": feature[1][0],
+                "type": feature[3][0],
+                "geometry": read_packed(feature[4][0]),
+                "properties": {
+                    keys[k]: values[v] for k, v in zip(tags[::2], tags[1::2])
+                },
+            }
+        )
+    return layer[1][0].decode(), layer[5][0], features
+
+
+class TestVectorTileServer(unittest.TestCase):
+    """Tests for `VectorTileServer`."""
+
+    def setUp(self):
+        self.gdf = gpd.GeoDataFrame(
+            {"name": ["a", "b", "c"], "value": [1.5, -2.0, 3.0], "rank": [1, -2, 3]},
+            geometry=[
+                Point(-80, 25),
+                LineString([(-85, 20), (-75, 30)]),
+                Polygon([(100, 10), (110, 10), (110, 20), (100, 10)]),
+            ],
+            crs="EPSG:4326",
+        )
+
+    def test_encodes_tile(self):
+        """Tiles hold the features they cover, with attributes."""
+        server = VectorTileServer(self.gdf, layer_name="test")
+        name, extent, features = read_tile(server.tile(1, 0, 0))
+        self.assertEqual((name, extent), ("test", 4096))
+        self.assertEqual([f["id"] for f in features], [0, 1])
+        self.assertEqual([f["type"] for f in features], [1, 2])
+        self.assertEqual(
+            features[1]["properties"], {"name": "b", "value": -2.0, "rank": -2}
+        )
+        # A single MoveTo for the point.
+        self.assertEqual(features[0]["geometry"][0], 1 | 1 << 3)
+
+        _, _, features = read_tile(server.tile(1, 1, 0))
+        self.assertEqual([f["type"] for f in features], [3])
+        geometry = features[0]["geometry"]
+        self.assertEqual(geometry[0], 1 | 1 << 3)
+        self.assertEqual(geometry[-1], 7 | 1 << 3)
+
+        self.assertEqual(server.tile(3, 0, 7), b"")
+        server.tile(1, 0, 0)
+        self.assertEqual(server.hits, 1)
+
+    def test_serves_over_http(self):
+        """Tiles are served from localhost."""
+        with VectorTileServer(self.gdf) as server:
+            url = server.tile_url.format(z=1, x=0, y=0)
+            with urllib.request.urlopen(url) as response:
+                self.assertEqual(
+                    response.headers["Content-Type"], "application/x-protobuf"
+                )
+                self.assertEqual(response.read(), server.tile(1, 0, 0))
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{server.url}/bad")
+        self.assertFalse(server.running)